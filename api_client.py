@@ -0,0 +1,210 @@
+"""
+The pipeline calls app.py makes. With WELLNESS_API_URL set (for example
+http://localhost:8000) they go to api_server.py over HTTP, and the Streamlit
+process holds no storage or model clients: backend.py and main.py are not
+imported at all. Unset, these names are the in-process backend.py and
+main.py functions. Sentiment helpers (sentiment.py) are pure CPU and always
+run locally.
+"""
+import os
+import copy
+import contextvars
+from urllib.parse import quote
+
+from sentiment import (
+    analyze_sentiment,
+    backfill_sentiment,
+    detect_mood,
+    detect_emotion,
+    get_emoji_for_mood
+)
+from languages import resolve_language_code
+
+WELLNESS_API_URL = os.getenv("WELLNESS_API_URL", "").rstrip("/")
+WELLNESS_API_TIMEOUT = float(os.getenv("WELLNESS_API_TIMEOUT", "60"))
+# Shared secret api_server.py checks on every request.
+WELLNESS_API_TOKEN = os.getenv("WELLNESS_API_TOKEN", "")
+# Messages and earlier suggestions sent with a chat turn; the prompt only uses the last few.
+API_CHAT_HISTORY = int(os.getenv("API_CHAT_HISTORY", "20"))
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status} {message}")
+        self.status = status
+
+
+if not WELLNESS_API_URL:
+    from backend import (
+        record_turn,
+        get_messages,
+        update_habits,
+        get_mood_history,
+        get_mood_summary,
+        get_mood_trends,
+        get_rolling_summary,
+        get_user_profile,
+        update_user_profile,
+        add_goal,
+        update_goal_progress,
+        get_goals,
+        get_daily_tip,
+        get_guided_exercises,
+        get_resources,
+        get_all_profiles,
+        create_profile,
+        begin_request,
+        translate_batch,
+        translate_text,
+        translate_ui_labels
+    )
+    from main import stream_wellness_response, refresh_rolling_summary, schedule_summary_refresh
+else:
+    _session = None
+    # GET responses for the current rerun; any write clears them.
+    _reads = contextvars.ContextVar("api_reads", default=None)
+
+    def _http():
+        global _session
+        if _session is None:
+            import requests
+            _session = requests.Session()
+            _session.headers["Authorization"] = f"Bearer {WELLNESS_API_TOKEN}"
+        return _session
+
+    def _request(method, path, params=None, body=None, stream=False):
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        response = _http().request(method, WELLNESS_API_URL + path, params=params, json=body, stream=stream,
+                                   timeout=(3, WELLNESS_API_TIMEOUT))
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error")
+            except ValueError:
+                message = response.text
+            response.close()
+            raise ApiError(response.status_code, message)
+        return response
+
+    def _get(path, **params):
+        cache = _reads.get()
+        key = (path, tuple(sorted((k, str(v)) for k, v in params.items() if v is not None)))
+        if cache is None or key not in cache:
+            value = _request("GET", path, params).json()
+            if cache is None:
+                return value
+            cache[key] = value
+        return copy.deepcopy(cache[key])
+
+    def _send(method, path, body=None):
+        cache = _reads.get()
+        if cache:
+            cache.clear()
+        response = _request(method, path, body=body)
+        return response.json() if response.content else None
+
+    def _user(user_id, *parts):
+        return "/users/" + "/".join(quote(str(part), safe="") for part in (user_id,) + parts)
+
+    def begin_request():
+        """Start a fresh read cache; app.py calls this at the top of every rerun."""
+        _reads.set({})
+
+    def stream_wellness_response(user_input, conversation_messages, previous_suggestions=None, target_lang="en",
+                                 habits_summary="", user_id=None, profile=None, stats=None, mood_sample=None):
+        """Reply text chunks from POST /chat as the server streams them; stats is not filled in over HTTP."""
+        body = {
+            "message": user_input,
+            "messages": list(conversation_messages)[-API_CHAT_HISTORY:],
+            "previous_suggestions": list(previous_suggestions or [])[-API_CHAT_HISTORY:],
+            "target_lang": target_lang,
+            "habits_summary": habits_summary,
+            "user_id": user_id,
+            "profile": profile,
+            "mood_sample": mood_sample
+        }
+        try:
+            with _request("POST", "/chat", body=body, stream=True) as response:
+                for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+                    yield chunk
+        except Exception as e:
+            yield f"\n\n⚠️ Error contacting the wellness API: {str(e)}"
+
+    def refresh_rolling_summary(user_id, force=False):
+        return _send("POST", _user(user_id, "summary"), {"force": force})
+
+    def schedule_summary_refresh(user_id):
+        _send("POST", _user(user_id, "summary", "schedule"))
+
+    def record_turn(user_id, user_msg, ai_msg, mood_sample=None):
+        _send("POST", _user(user_id, "turns"), {"user_msg": user_msg, "ai_msg": ai_msg, "mood_sample": mood_sample})
+
+    def get_messages(user_id, limit=50, before=None):
+        page = _get(_user(user_id, "messages"), limit=limit, before=before)
+        return page["messages"], page["cursor"]
+
+    def update_habits(user_id, habits_text):
+        _send("PUT", _user(user_id, "habits"), {"habits": habits_text})
+
+    def get_mood_history(user_id, limit=None):
+        return _get(_user(user_id, "mood"), limit=limit)
+
+    def get_mood_summary(user_id):
+        return _get(_user(user_id, "mood", "summary"))
+
+    def get_mood_trends(user_id, period="day", last=14):
+        return _get(_user(user_id, "mood", "trends"), period=period, last=last)
+
+    def get_rolling_summary(user_id):
+        return _get(_user(user_id, "summary"))
+
+    def get_user_profile(user_id):
+        return _get(_user(user_id, "profile"))
+
+    def update_user_profile(user_id, profile):
+        _send("PUT", _user(user_id, "profile"), profile)
+
+    def add_goal(user_id, goal_text):
+        _send("POST", _user(user_id, "goals"), {"text": goal_text})
+
+    def update_goal_progress(user_id, goal_id, progress):
+        _send("PUT", _user(user_id, "goals", goal_id), {"progress": progress})
+
+    def get_goals(user_id):
+        return _get(_user(user_id, "goals"))
+
+    def _catalogue(kind, profile, emotion=None):
+        preferences = (profile or {}).get("preferences", {})
+        return _get("/catalogue/" + kind, emotion=emotion, language=preferences.get("language"), tone=preferences.get("tone"))
+
+    def get_daily_tip(profile=None):
+        return _catalogue("tip", profile)
+
+    def get_guided_exercises(emotion, profile=None):
+        return _catalogue("exercises", profile, emotion)
+
+    def get_resources(emotion, profile=None):
+        return _catalogue("resources", profile, emotion)
+
+    def get_all_profiles(limit=None, offset=0, prefix=None):
+        return _get("/profiles", limit=limit, offset=offset or None, prefix=prefix)
+
+    def create_profile(profile_name):
+        _send("POST", "/profiles", {"name": profile_name})
+
+    def translate_batch(texts, target_lang="en", cache=True):
+        """Same contract as backend.translate_batch; English never leaves the process."""
+        texts = list(dict.fromkeys(t for t in texts if t))
+        if resolve_language_code(target_lang) == "en" or not texts:
+            return {t: t for t in texts}
+        try:
+            return _request("POST", "/translate", body={"texts": texts, "target_lang": target_lang, "cache": cache}).json()["translations"]
+        except Exception as e:
+            print(f"Batch translation error ({target_lang}): {e}")
+            return {t: t for t in texts}
+
+    def translate_text(text, target_lang="en", cache=True):
+        return translate_batch([text], target_lang, cache).get(text, text) if text else text
+
+    def translate_ui_labels(labels_dict, target_lang="en"):
+        translated = translate_batch(labels_dict.values(), target_lang)
+        return {key: translated.get(text, text) for key, text in labels_dict.items()}
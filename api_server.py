@@ -0,0 +1,388 @@
+"""
+Headless HTTP API for the wellness pipeline: the backend.py and main.py
+calls app.py makes, served by tornado on asyncio. Storage, Gemini and
+translation calls are blocking, so they run on a pool of API_WORKERS threads
+and the event loop only parses requests and streams bytes. Once
+API_MAX_INFLIGHT requests are in flight, new ones get 503 with Retry-After
+instead of queueing behind them.
+
+Every endpoint but /health reads and writes any user's data, so requests
+must carry "Authorization: Bearer $WELLNESS_API_TOKEN", and the server only
+listens on API_HOST (127.0.0.1 unless set otherwise).
+
+    WELLNESS_API_TOKEN=... python api_server.py [--host 127.0.0.1] [--port 8000] [--workers 16] [--max-inflight 64] [--fake]
+
+--fake (or WELLNESS_API_FAKES=1) serves from in-memory storage, with the
+benchmark fakes standing in for Gemini and Google Translate, so nothing
+touches the network. app.py uses the API when WELLNESS_API_URL is set (see
+api_client.py).
+"""
+import os
+import hmac
+import json
+import asyncio
+import argparse
+import tempfile
+from functools import partial
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import tornado.web
+from tornado.iostream import StreamClosedError
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_TOKEN = os.getenv("WELLNESS_API_TOKEN", "")
+API_WORKERS = int(os.getenv("API_WORKERS", "16"))
+API_MAX_INFLIGHT = int(os.getenv("API_MAX_INFLIGHT", str(API_WORKERS * 4)))
+API_FAKES = os.getenv("WELLNESS_API_FAKES") == "1"
+FAKE_MODEL_LATENCY = float(os.getenv("FAKE_MODEL_LATENCY", "0.3"))
+FAKE_CHUNK_LATENCY = float(os.getenv("FAKE_CHUNK_LATENCY", "0.03"))
+FAKE_TRANSLATE_LATENCY = float(os.getenv("FAKE_TRANSLATE_LATENCY", "0.05"))
+
+# Set by load_pipeline(); `pipeline` is main.py.
+backend = None
+pipeline = None
+
+
+def load_pipeline(fakes=API_FAKES):
+    """
+    Import backend.py and main.py. With fakes, storage is in memory and the
+    model and translator are the deterministic fakes from benchmarks.fakes;
+    the scratch paths only apply if backend was not imported yet.
+    """
+    global backend, pipeline
+    if fakes:
+        scratch = tempfile.mkdtemp(prefix="wellness-api-")
+        os.environ.setdefault("STORAGE_BACKEND", "memory")
+        # Keep fake translations out of the shared translation cache and content bundles.
+        os.environ.setdefault("TRANSLATION_CACHE_DB", os.path.join(scratch, "translations.sqlite"))
+        os.environ.setdefault("CONTENT_BUNDLE_DIR", os.path.join(scratch, "bundles"))
+    import backend as backend_module
+    import main as main_module
+    backend, pipeline = backend_module, main_module
+    if fakes:
+        from benchmarks.fakes import FakeGenerativeModel, FakeTranslator
+        FakeTranslator.latency = FAKE_TRANSLATE_LATENCY
+        backend.GoogleTranslator = FakeTranslator
+        pipeline.model = FakeGenerativeModel(latency=FAKE_MODEL_LATENCY, chunk_latency=FAKE_CHUNK_LATENCY)
+    return backend, pipeline
+
+
+def _scoped(fn, *args, **kwargs):
+    # Each call gets its own read cache, like one app.py rerun.
+    with backend.request_scope():
+        return fn(*args, **kwargs)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Mapping):
+        return dict(value)  # catalogue links are read-only mappings
+    return str(value)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    """JSON in and out, blocking calls on the executor, and the in-flight limit."""
+
+    counted = False
+
+    def prepare(self):
+        supplied = self.request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied.encode(), self.settings["token"].encode()):
+            raise tornado.web.HTTPError(401, reason="Missing or wrong API token")
+        app = self.application
+        if app.inflight >= self.settings["max_inflight"]:
+            app.rejected += 1
+            raise tornado.web.HTTPError(503, reason="Too many requests in flight")
+        app.inflight += 1
+        self.counted = True
+
+    def _release(self):
+        if self.counted:
+            self.counted = False
+            self.application.inflight -= 1
+
+    def on_finish(self):
+        self._release()
+
+    def on_connection_close(self):
+        self._release()
+
+    async def call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.settings["executor"], partial(_scoped, fn, *args, **kwargs))
+
+    def body(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Request body must be a JSON object")
+        return body
+
+    def int_argument(self, name, default=None):
+        value = self.get_query_argument(name, "")
+        if not value:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason=f"{name} must be an integer")
+
+    def send(self, value, status=200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps(value, default=_json_default))
+
+    def write_error(self, status_code, **kwargs):
+        if status_code == 503:
+            self.set_header("Retry-After", "1")
+        elif status_code == 401:
+            self.set_header("WWW-Authenticate", "Bearer")
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps({"error": self._reason}))
+
+
+class HealthHandler(BaseHandler):
+    def prepare(self):
+        pass  # always answers, without a token, so load balancers can see a saturated server
+
+    def get(self):
+        status = backend.storage.status() if hasattr(backend.storage, "status") else {}
+        self.send({"inflight": self.application.inflight, "max_inflight": self.settings["max_inflight"],
+                   "rejected": self.application.rejected, "workers": self.settings["workers"], "storage": status})
+
+
+class ChatHandler(BaseHandler):
+    """
+    POST /chat streams the reply as plain UTF-8 text, chunk by chunk.
+    Body: {"message", "user_id", "messages", "previous_suggestions",
+    "target_lang", "habits_summary", "profile", "mood_sample"}; only message
+    is required. Missing history, habits and profile are read from storage;
+    without mood_sample the message's sentiment is used.
+    """
+
+    async def post(self):
+        body = self.body()
+        message = body.get("message")
+        if not message:
+            raise tornado.web.HTTPError(400, reason="message is required")
+        user_id = body.get("user_id") or "default_user"
+        profile = body.get("profile") or await self.call(backend.get_user_profile, user_id)
+        messages = body.get("messages")
+        if messages is None:
+            messages, _ = await self.call(backend.get_messages, user_id, pipeline.CONTEXT_MESSAGES)
+            messages.append({"role": "user", "content": message})
+        habits = body.get("habits_summary")
+        if habits is None:
+            habits = await self.call(backend.get_habits, user_id)
+
+        chunks = pipeline.stream_wellness_response(message, messages, body.get("previous_suggestions"),
+                                                   body.get("target_lang") or "en", habits, user_id, profile,
+                                                   mood_sample=body.get("mood_sample"))
+        self.set_header("Content-Type", "text/plain; charset=utf-8")
+        self.set_header("Cache-Control", "no-cache")
+        try:
+            # One executor hop per chunk; the loop stays free while the model streams.
+            while True:
+                chunk = await self.call(next, chunks, None)
+                if chunk is None:
+                    break
+                self.write(chunk)
+                await self.flush()
+        except StreamClosedError:
+            return  # client went away mid-reply
+        finally:
+            chunks.close()
+        self.finish()
+
+
+class TurnsHandler(BaseHandler):
+    async def post(self, user_id):
+        body = self.body()
+        if not body.get("user_msg") or not body.get("ai_msg"):
+            raise tornado.web.HTTPError(400, reason="user_msg and ai_msg are required")
+        await self.call(backend.record_turn, user_id, body["user_msg"], body["ai_msg"], body.get("mood_sample"))
+        self.set_status(204)
+
+
+class MessagesHandler(BaseHandler):
+    async def get(self, user_id):
+        messages, cursor = await self.call(backend.get_messages, user_id, self.int_argument("limit", 50),
+                                           self.get_query_argument("before", None))
+        self.send({"messages": messages, "cursor": cursor})
+
+
+class SummaryHandler(BaseHandler):
+    async def get(self, user_id):
+        self.send(await self.call(backend.get_rolling_summary, user_id))
+
+    async def post(self, user_id):
+        """Refresh now and return the summary; {"force": true} folds in any new messages."""
+        force = bool(self.body().get("force"))
+        self.send(await self.call(pipeline.refresh_rolling_summary, user_id, force))
+
+
+class SummaryScheduleHandler(BaseHandler):
+    def post(self, user_id):
+        pipeline.schedule_summary_refresh(user_id)
+        self.set_status(202)
+
+
+class ProfileHandler(BaseHandler):
+    async def get(self, user_id):
+        self.send(await self.call(backend.get_user_profile, user_id))
+
+    async def put(self, user_id):
+        await self.call(backend.update_user_profile, user_id, self.body())
+        self.set_status(204)
+
+
+class HabitsHandler(BaseHandler):
+    async def get(self, user_id):
+        self.send({"habits": await self.call(backend.get_habits, user_id)})
+
+    async def put(self, user_id):
+        await self.call(backend.update_habits, user_id, self.body().get("habits", ""))
+        self.set_status(204)
+
+
+class GoalsHandler(BaseHandler):
+    async def get(self, user_id):
+        self.send(await self.call(backend.get_goals, user_id))
+
+    async def post(self, user_id):
+        text = self.body().get("text")
+        if not text:
+            raise tornado.web.HTTPError(400, reason="text is required")
+        await self.call(backend.add_goal, user_id, text)
+        self.set_status(201)
+
+
+class GoalHandler(BaseHandler):
+    async def put(self, user_id, goal_id):
+        progress = self.body().get("progress")
+        if not progress:
+            raise tornado.web.HTTPError(400, reason="progress is required")
+        await self.call(backend.update_goal_progress, user_id, goal_id, progress)
+        self.set_status(204)
+
+
+class MoodHandler(BaseHandler):
+    async def get(self, user_id):
+        self.send(await self.call(backend.get_mood_history, user_id, self.int_argument("limit")))
+
+
+class MoodSummaryHandler(BaseHandler):
+    async def get(self, user_id):
+        self.send(await self.call(backend.get_mood_summary, user_id))
+
+
+class MoodTrendsHandler(BaseHandler):
+    async def get(self, user_id):
+        period = self.get_query_argument("period", "day")
+        if period not in ("day", "week"):
+            raise tornado.web.HTTPError(400, reason="period must be day or week")
+        self.send(await self.call(backend.get_mood_trends, user_id, period, self.int_argument("last", 14)))
+
+
+class ProfilesHandler(BaseHandler):
+    async def get(self):
+        self.send(await self.call(backend.get_all_profiles, self.int_argument("limit"), self.int_argument("offset", 0),
+                                  self.get_query_argument("prefix", None) or None))
+
+    async def post(self):
+        name = self.body().get("name")
+        if not name:
+            raise tornado.web.HTTPError(400, reason="name is required")
+        await self.call(backend.create_profile, name)
+        self.set_status(201)
+
+
+class CatalogueHandler(BaseHandler):
+    """GET /catalogue/(tip|exercises|resources)?emotion=&language=&tone="""
+
+    async def get(self, kind):
+        preferences = {key: self.get_query_argument(key) for key in ("language", "tone") if self.get_query_argument(key, "")}
+        profile = {"preferences": preferences} if preferences else None
+        emotion = self.get_query_argument("emotion", "neutral")
+        if kind == "tip":
+            self.send(await self.call(backend.get_daily_tip, profile))
+        elif kind == "exercises":
+            self.send(await self.call(backend.get_guided_exercises, emotion, profile))
+        else:
+            self.send(await self.call(backend.get_resources, emotion, profile))
+
+
+class TranslateHandler(BaseHandler):
+    """
+    POST /translate {"texts": [...], "target_lang", "cache"} -> {"translations": {text: translated}}.
+    "cache": false keeps free-form text (replies, summaries) out of the translation cache.
+    """
+
+    async def post(self):
+        body = self.body()
+        texts = body.get("texts")
+        if not isinstance(texts, list):
+            raise tornado.web.HTTPError(400, reason="texts must be a list")
+        self.send({"translations": await self.call(backend.translate_batch, texts, body.get("target_lang") or "en",
+                                                        cache=body.get("cache", True) is not False)})
+
+
+def make_app(workers=API_WORKERS, max_inflight=API_MAX_INFLIGHT, executor=None, token=None):
+    token = token or API_TOKEN
+    if not token:
+        raise ValueError("WELLNESS_API_TOKEN must be set; every endpoint but /health requires it")
+    if backend is None:
+        load_pipeline()
+    user = r"/users/([^/]+)"
+    app = tornado.web.Application([
+        (r"/health", HealthHandler),
+        (r"/chat", ChatHandler),
+        (user + r"/turns", TurnsHandler),
+        (user + r"/messages", MessagesHandler),
+        (user + r"/summary", SummaryHandler),
+        (user + r"/summary/schedule", SummaryScheduleHandler),
+        (user + r"/profile", ProfileHandler),
+        (user + r"/habits", HabitsHandler),
+        (user + r"/goals", GoalsHandler),
+        (user + r"/goals/([^/]+)", GoalHandler),
+        (user + r"/mood", MoodHandler),
+        (user + r"/mood/summary", MoodSummaryHandler),
+        (user + r"/mood/trends", MoodTrendsHandler),
+        (r"/profiles", ProfilesHandler),
+        (r"/catalogue/(tip|exercises|resources)", CatalogueHandler),
+        (r"/translate", TranslateHandler),
+    ], executor=executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api"),
+        workers=workers, max_inflight=max_inflight, token=token)
+    app.inflight = 0
+    app.rejected = 0
+    return app
+
+
+async def serve(port=API_PORT, host=API_HOST, **kwargs):
+    app = make_app(**kwargs)
+    app.listen(port, address=host)
+    print(f"✅ Wellness API listening on {host}:{port} ({app.settings['workers']} workers, "
+          f"max {app.settings['max_inflight']} in flight)")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless HTTP API for the wellness pipeline.")
+    parser.add_argument("--host", default=API_HOST, help="address to bind; 0.0.0.0 exposes the API to the network")
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS)
+    parser.add_argument("--max-inflight", type=int, default=None)
+    parser.add_argument("--fake", action="store_true", default=API_FAKES,
+                        help="in-memory storage with fake Gemini and translator, no network")
+    args = parser.parse_args()
+    if not API_TOKEN:
+        parser.error("set WELLNESS_API_TOKEN to the shared token clients send")
+    load_pipeline(args.fake)
+    max_inflight = args.max_inflight or (API_MAX_INFLIGHT if args.workers == API_WORKERS else args.workers * 4)
+    asyncio.run(serve(args.port, args.host, workers=args.workers, max_inflight=max_inflight))
@@ -1,21 +1,25 @@
 # app.py (full updated file with full sidebar translations)
 import os
 import streamlit as st
-import time
 from datetime import datetime, timezone
 import streamlit.components.v1 as components
-from main import get_wellness_response, synthesize_speech_and_save
-from backend import (
+from tts_cache import audio_cache, synthesize_speech, strip_markdown_for_tts
+# In-process pipeline, or a thin client of api_server.py when WELLNESS_API_URL is set.
+from api_client import (
+    stream_wellness_response,
+    refresh_rolling_summary,
+    schedule_summary_refresh,
+    analyze_sentiment,
+    backfill_sentiment,
     detect_mood,
     detect_emotion,
     get_emoji_for_mood,
-    log_conversation,
-    log_summary,
-    get_conversation,
+    record_turn,
+    get_messages,
     update_habits,
-    update_mood_history,
-    get_mood_history,
-    get_session_summary,
+    get_mood_summary,
+    get_mood_trends,
+    get_rolling_summary,
     get_user_profile,
     update_user_profile,
     add_goal,
@@ -26,13 +30,13 @@ from backend import (
     get_resources,
     get_all_profiles,
     create_profile,
-    translate_text
+    begin_request,
+    translate_text,
+    translate_ui_labels
 )
 
-AUDIO_DIR = os.path.join(os.getcwd(), "audio_cache")
-os.makedirs(AUDIO_DIR, exist_ok=True)
-
 st.set_page_config(page_title="🧘 Mental Wellness AI", page_icon="🧘", layout="centered")
+begin_request()  # profile/goals/habits are read from storage at most once per rerun
 
 # --------------------------
 # Configuration / Defaults
@@ -45,31 +49,97 @@ language_options = {
     "German": "de"
 }
 
+PROGRESS_STATES = ["Not Started", "Started", "In Progress", "Completed"]
+
+# Chat history is loaded from storage a page at a time; the session never
+# holds more than MAX_SESSION_MESSAGES, so rerun cost stays flat.
+CHAT_PAGE_SIZE = 30
+MAX_SESSION_MESSAGES = 300
+# Profiles listed in the picker at once; the search box narrows the rest.
+PROFILE_PICKER_SIZE = 50
+
+# Every static label the page renders; translated in one batch per rerun.
+UI_LABELS = {
+    "dark_mode": "Dark Mode",
+    "title": "Mental Wellness AI Advisor",
+    "intro": "I’m here to listen and support your mental wellness journey. (Not a substitute for professional help.)",
+    "profile_settings": "🧑 Profile Settings",
+    "name": "Name",
+    "age": "Age",
+    "tone_preference": "Tone Preference",
+    "save_profile": "Save Profile",
+    "profile_updated": "Profile updated!",
+    "chat_placeholder": "How are you feeling today?",
+    "log_error": "Could not log conversation: ",
+    "load_older": "⬆️ Load older messages",
+    "history_capped": "Older messages are saved but not shown in this session.",
+    "summarize": "📄 Summarize this session",
+    "session_summary": "📊 Session Summary:",
+    "summary_empty": "Not enough conversation yet to summarize.",
+    "mood_trends": "📈 Mood Trends",
+    "mood_period": "Show",
+    "daily": "Daily",
+    "weekly": "Weekly",
+    "mood_average": "Average mood",
+    "mood_recent": "Recent",
+    "mood_volatility": "Volatility",
+    "checkin_streak": "Check-in streak (days)",
+    "positive_streak": "Positive in a row",
+    "mood_rolling": "Rolling average mood score",
+    "mood_empty": "No mood check-ins yet.",
+    "habits_heading": "Your habits / tracking",
+    "habits_input": "Describe your recent wellness habits",
+    "save_habits": "Save habits",
+    "habits_saved": "Habits saved.",
+    "goals_heading": "🎯 Wellness Goals",
+    "Not Started": "Not Started",
+    "Started": "Started",
+    "In Progress": "In Progress",
+    "Completed": "Completed",
+    "goal_status": "Current Status for above-mentioned goal",
+    "update_goal": "Update Current Status of above-mentioned Goal",
+    "goal_updated": "Goal updated!",
+    "new_goal": "Add new wellness goal",
+    "add_goal": "Add Goal",
+    "goal_added": "Goal added!",
+    "tip_heading": "🌿 Daily Wellness Tip",
+    "resources_heading": "📚 Guided Exercises & Resources"
+}
+
 if "mode" not in st.session_state:
     st.session_state.mode = "dark"
 mode_options = ["light", "dark"]
 if st.session_state.mode not in mode_options:
     st.session_state.mode = "dark"
 
-if "all_profiles" not in st.session_state:
-    st.session_state.all_profiles = get_all_profiles() or ["default_user"]
-
 # --------------------------
 # Profile selection / creation
 # --------------------------
 with st.sidebar.expander(translate_text("👤 Select / Create Profile", "en")):
-    profile_choice_list = st.session_state.all_profiles + [translate_text("Create New Profile", "en")]
+    # Only one page of the directory is listed; typing narrows it by name prefix.
+    profile_query = st.text_input(translate_text("Search Profiles", "en")).strip()
+    if st.session_state.get("profile_query") != profile_query or "all_profiles" not in st.session_state:
+        st.session_state.profile_query = profile_query
+        st.session_state.all_profiles = get_all_profiles(limit=PROFILE_PICKER_SIZE, prefix=profile_query or None)
+        if not st.session_state.all_profiles and not profile_query:
+            st.session_state.all_profiles = ["default_user"]
+    current_user = st.session_state.get("user_id")
+    profile_choice_list = list(st.session_state.all_profiles)
+    if current_user and current_user not in profile_choice_list:
+        profile_choice_list.insert(0, current_user)
+    profile_choice_list.append(translate_text("Create New Profile", "en"))
     profile_selection = st.selectbox(
         translate_text("Choose Profile", "en"),
-        profile_choice_list
+        profile_choice_list,
+        index=profile_choice_list.index(current_user) if current_user in profile_choice_list else 0
     )
 
     if profile_selection == translate_text("Create New Profile", "en"):
         new_profile_name = st.text_input(translate_text("Enter New Profile Name", "en"))
         if st.button(translate_text("Create Profile", "en")):
-            if new_profile_name and new_profile_name not in st.session_state.all_profiles:
+            if new_profile_name and new_profile_name not in get_all_profiles(prefix=new_profile_name):
                 create_profile(new_profile_name)
-                st.session_state.all_profiles.append(new_profile_name)
+                st.session_state.all_profiles.insert(0, new_profile_name)
                 st.session_state.user_id = new_profile_name
                 st.success(translate_text(f"Profile '{new_profile_name}' created!", "en"))
             else:
@@ -83,13 +153,17 @@ if "user_id" not in st.session_state:
 user_id = st.session_state.user_id
 profile = get_user_profile(user_id)
 
-if "loaded_history" not in st.session_state or st.session_state.user_id != user_id:
-    stored = get_conversation(user_id)
+def load_latest_history():
+    messages, cursor = get_messages(user_id, CHAT_PAGE_SIZE)
+    st.session_state.messages = backfill_sentiment(messages)
+    st.session_state.history_cursor = cursor
+    st.session_state.previous_suggestions = [m["content"] for m in messages if m.get("role") == "ai"]
+
+if st.session_state.get("loaded_user_id") != user_id:
     profile = get_user_profile(user_id)
     st.session_state.habits_summary = profile.get("habits_summary", "User is new to wellness tracking.")
-    st.session_state.messages = stored.get("conversation", [])
-    st.session_state.previous_suggestions = [m["content"] for m in st.session_state.messages if m.get("role") == "ai"]
-    st.session_state.loaded_history = True
+    load_latest_history()
+    st.session_state.loaded_user_id = user_id
 
 profile = get_user_profile(user_id)
 
@@ -121,11 +195,12 @@ if lang_choice != st.session_state.selected_lang_name:
 
 UI_LANG_NAME = st.session_state.selected_lang_name
 BACKEND_LANG_CODE = st.session_state.selected_lang_code
+ui = translate_ui_labels(UI_LABELS, UI_LANG_NAME)
 
 # --------------------------
 # Theme toggle (with emoji + translation)
 # --------------------------
-toggle_label = translate_text("Dark Mode", UI_LANG_NAME)
+toggle_label = ui["dark_mode"]
 
 if "dark_mode" not in st.session_state:
     st.session_state.dark_mode = True  # default ON
@@ -169,30 +244,43 @@ else:
 # --------------------------
 # Header
 # --------------------------
-st.title("🧘 " + translate_text("Mental Wellness AI Advisor", UI_LANG_NAME))
-st.markdown(translate_text("I’m here to listen and support your mental wellness journey. (Not a substitute for professional help.)", UI_LANG_NAME))
+st.title("🧘 " + ui["title"])
+st.markdown(ui["intro"])
 
 # --------------------------
 # Profile settings
 # --------------------------
-with st.sidebar.expander(translate_text("🧑 Profile Settings", UI_LANG_NAME)):
-    profile["name"] = st.text_input(translate_text("Name", UI_LANG_NAME), profile.get("name", ""))
-    profile["age"] = st.number_input(translate_text("Age", UI_LANG_NAME), min_value=0, max_value=120, value=profile.get("age", 0))
+with st.sidebar.expander(ui["profile_settings"]):
+    profile["name"] = st.text_input(ui["name"], profile.get("name", ""))
+    profile["age"] = st.number_input(ui["age"], min_value=0, max_value=120, value=profile.get("age", 0))
     profile["preferences"] = profile.get("preferences", {"language": profile_lang_name, "tone": "neutral"})
     profile["preferences"]["language"] = st.session_state.selected_lang_name
     profile["preferences"]["tone"] = st.selectbox(
-        translate_text("Tone Preference", UI_LANG_NAME),
+        ui["tone_preference"],
         ["neutral", "supportive", "encouraging", "calm"],
         index=["neutral", "supportive", "encouraging", "calm"].index(profile.get("preferences", {}).get("tone", "neutral"))
     )
-    if st.button(translate_text("Save Profile", UI_LANG_NAME)):
+    if st.button(ui["save_profile"]):
         update_user_profile(user_id, profile)
-        st.success(translate_text("Profile updated!", UI_LANG_NAME))
+        st.success(ui["profile_updated"])
 
 
 # --------------------------
 # Chat rendering helpers
 # --------------------------
+TTS_POLL_SECONDS = 1.0
+
+@st.fragment(run_every=TTS_POLL_SECONDS)
+def audio_when_ready(audio_path):
+    """
+    Poll while a reply's audio is still being synthesized, playing the
+    sentence chunks that are already done; rerun the page once it is joined.
+    """
+    if not audio_cache.is_pending(audio_path):
+        st.rerun()
+    for chunk_path in audio_cache.playlist(audio_path):
+        st.audio(chunk_path)
+
 def render_message(msg):
     role = msg.get("role", "ai")
     content = msg.get("content", "")
@@ -201,6 +289,8 @@ def render_message(msg):
     emotion = msg.get("emotion") or detect_emotion(content)
     emoji = msg.get("emoji") or get_emoji_for_mood(emotion or mood)
     audio_path = msg.get("audio_path")
+    if role == "ai" and not audio_path:
+        audio_path = audio_cache.lookup(strip_markdown_for_tts(content), BACKEND_LANG_CODE)
 
     if role == "user":
         html = f"""
@@ -217,56 +307,67 @@ def render_message(msg):
         </div>
         """
     st.markdown(html, unsafe_allow_html=True)
-    if role == "ai" and audio_path and os.path.exists(audio_path):
-        st.audio(audio_path)
-
-# Render existing messages
-if "messages" not in st.session_state:
-    st.session_state.messages = st.session_state.get("messages", [])
+    if role == "ai" and audio_path:
+        if os.path.exists(audio_path):
+            st.audio(audio_path)
+        elif audio_cache.is_pending(audio_path):
+            audio_when_ready(audio_path)
+
+# Render existing messages, with older pages fetched on demand by cursor
+if st.session_state.history_cursor:
+    if len(st.session_state.messages) + CHAT_PAGE_SIZE > MAX_SESSION_MESSAGES:
+        st.caption(ui["history_capped"])
+    elif st.button(ui["load_older"]):
+        older, cursor = get_messages(user_id, CHAT_PAGE_SIZE, before=st.session_state.history_cursor)
+        st.session_state.messages = backfill_sentiment(older) + st.session_state.messages
+        st.session_state.history_cursor = cursor
 for msg in st.session_state.messages:
     render_message(msg)
 
 # --------------------------
 # Chat input and response
 # --------------------------
-prompt = st.chat_input(translate_text("How are you feeling today?", UI_LANG_NAME))
+prompt = st.chat_input(ui["chat_placeholder"])
 
 if prompt:
     now_iso = datetime.now(timezone.utc).isoformat()
+    sentiment = analyze_sentiment(prompt)
     user_msg = {
         "role": "user",
         "content": prompt,
         "timestamp": now_iso,
-        "mood": detect_mood(prompt),
-        "emotion": detect_emotion(prompt),
-        "emoji": get_emoji_for_mood(detect_emotion(prompt)),
+        "mood": sentiment["mood"],
+        "emotion": sentiment["emotion"],
+        "emoji": get_emoji_for_mood(sentiment["emotion"]),
         "audio_path": None
     }
+    # The sample stored with the turn, and the one the prompt's mood history ends with.
+    mood_sample = {"mood": sentiment["mood"], "emotion": sentiment["emotion"], "score": sentiment["compound"]}
     st.session_state.messages.append(user_msg)
     render_message(user_msg)
 
-    ai_result = get_wellness_response(
+    # Same emotion get_wellness_response reported: the user's, not the reply's.
+    ai_emotion = sentiment["emotion"]
+    stream_meta = f"AI {get_emoji_for_mood(ai_emotion)} • {datetime.now(timezone.utc).isoformat()}"
+    placeholder = st.empty()
+    chunks = []
+    for chunk in stream_wellness_response(
         prompt,
         conversation_messages=st.session_state.messages,
         previous_suggestions=st.session_state.previous_suggestions,
         target_lang=BACKEND_LANG_CODE,               # model / tts expects ISO code
         habits_summary=st.session_state.habits_summary,
         user_id=user_id,
-        profile=profile
-    )
-    ai_text = ai_result.get("text", "")
-    ai_emotion = ai_result.get("emotion", detect_emotion(ai_text))
-
-    placeholder = st.empty()
-    displayed = ""
-    for ch in ai_text:
-        displayed += ch
+        profile=profile,
+        mood_sample=mood_sample
+    ):
+        chunks.append(chunk)
         placeholder.markdown(
-            f"<div class='chat-bubble'><div class='meta'>AI {get_emoji_for_mood(ai_emotion)} • {datetime.now(timezone.utc).isoformat()}</div><div style='font-size:18px; margin-top:6px;'>{displayed}</div></div>",
+            f"<div class='chat-bubble'><div class='meta'>{stream_meta}</div><div style='font-size:18px; margin-top:6px;'>{''.join(chunks)}</div></div>",
             unsafe_allow_html=True
         )
-        time.sleep(0.01)
     placeholder.empty()
+    ai_text = "".join(chunks).strip()
 
     ai_msg = {
         "role": "ai",
@@ -274,113 +375,110 @@ if prompt:
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "emotion": ai_emotion,
         "emoji": get_emoji_for_mood(ai_emotion),
-        "audio_path": None
+        # Content-addressed, so the path is known before synthesis finishes.
+        "audio_path": synthesize_speech(ai_text, lang=BACKEND_LANG_CODE).path
     }
-    audio_file = synthesize_speech_and_save(ai_text, user_id=user_id, lang=BACKEND_LANG_CODE)
-    if audio_file:
-        ai_msg["audio_path"] = audio_file
 
     st.session_state.messages.append(ai_msg)
     render_message(ai_msg)
     st.session_state.previous_suggestions.append(ai_text)
 
     try:
-        log_conversation(user_id, [user_msg, ai_msg])
-        update_mood_history(user_id, user_msg["mood"], user_msg["emotion"])
+        record_turn(user_id, user_msg, ai_msg, mood_sample)
     except Exception as e:
-        st.warning(translate_text("Could not log conversation: ", UI_LANG_NAME) + str(e))
+        st.warning(ui["log_error"] + str(e))
+    else:
+        schedule_summary_refresh(user_id)
+        # Past the cap, drop back to the latest page; older turns stay reachable by cursor.
+        if len(st.session_state.messages) > MAX_SESSION_MESSAGES:
+            load_latest_history()
 
 # --------------------------
 # Session summary button
 # --------------------------
 st.markdown("<div class='summary-button'>", unsafe_allow_html=True)
-if st.button(translate_text("📄 Summarize this session", UI_LANG_NAME)):
-    summary_result = get_wellness_response(
-        "Please provide a concise session summary and mood trend.",
-        st.session_state.messages,
-        previous_suggestions=st.session_state.previous_suggestions,
-        target_lang=BACKEND_LANG_CODE,
-        habits_summary=st.session_state.habits_summary,
-        user_id=user_id,
-        profile=profile
-    )
-    summary_text = summary_result.get("text", "")
-    st.markdown("**" + translate_text("📊 Session Summary:", UI_LANG_NAME) + "**")
-    st.markdown(summary_text)
-    log_summary(user_id, summary_text)
+if st.button(ui["summarize"]):
+    # One field read; the summary is kept up to date in the background after each turn.
+    summary = get_rolling_summary(user_id)
+    if not summary.get("text"):
+        summary = refresh_rolling_summary(user_id, force=True)
+    st.markdown("**" + ui["session_summary"] + "**")
+    st.markdown(translate_text(summary["text"], BACKEND_LANG_CODE, cache=False) if summary.get("text") else ui["summary_empty"])
 st.markdown("</div>", unsafe_allow_html=True)
 
+# --------------------------
+# Mood trends (read from the precomputed rollups)
+# --------------------------
+with st.expander(ui["mood_trends"]):
+    mood_summary = get_mood_summary(user_id)
+    if not mood_summary.get("samples"):
+        st.caption(ui["mood_empty"])
+    else:
+        cols = st.columns(5)
+        cols[0].metric(ui["mood_average"], f"{mood_summary['average']:+.2f}")
+        cols[1].metric(ui["mood_recent"], f"{mood_summary['recent_average']:+.2f}")
+        cols[2].metric(ui["mood_volatility"], f"{mood_summary['volatility']:.2f}")
+        cols[3].metric(ui["checkin_streak"], mood_summary["checkin_streak"])
+        cols[4].metric(ui["positive_streak"], mood_summary["positive_streak"])
+        period = st.radio(ui["mood_period"], [ui["daily"], ui["weekly"]], horizontal=True)
+        trends = get_mood_trends(user_id, "day" if period == ui["daily"] else "week")
+        st.bar_chart(dict(trends["counts"], period=trends["periods"]), x="period", y=list(trends["counts"]))
+        st.caption(ui["mood_rolling"])
+        st.line_chart(trends["rolling_average"])
+
 # --------------------------
 # Habits tracking
 # --------------------------
-st.sidebar.markdown("### " + translate_text("Your habits / tracking", UI_LANG_NAME))
-habit_text = st.sidebar.text_area(translate_text("Describe your recent wellness habits", UI_LANG_NAME), value=st.session_state.habits_summary or "")
-if st.sidebar.button(translate_text("Save habits", UI_LANG_NAME)):
+st.sidebar.markdown("### " + ui["habits_heading"])
+habit_text = st.sidebar.text_area(ui["habits_input"], value=st.session_state.habits_summary or "")
+if st.sidebar.button(ui["save_habits"]):
     update_habits(user_id, habit_text)
     st.session_state.habits_summary = habit_text
-    st.sidebar.success(translate_text("Habits saved.", UI_LANG_NAME))
+    st.sidebar.success(ui["habits_saved"])
 
 # --------------------------
 # Goals tracking
 # --------------------------
-with st.sidebar.expander(translate_text("🎯 Wellness Goals", UI_LANG_NAME)):
+with st.sidebar.expander(ui["goals_heading"]):
     goals = get_goals(user_id)
+    # Built once per rerun, independent of how many goals there are.
+    progress_options = [ui[state] for state in PROGRESS_STATES]
+    trans_to_en = dict(zip(progress_options, PROGRESS_STATES))
     for goal in goals:
         status_display = goal.get("progress", "Not Started")
         if status_display == "Completed":
-            st.markdown(f"<span style='color:green; font-weight:bold;'>✔ {goal['text']} ({translate_text('Completed', UI_LANG_NAME)})</span>", unsafe_allow_html=True)
+            st.markdown(f"<span style='color:green; font-weight:bold;'>✔ {goal['text']} ({ui['Completed']})</span>", unsafe_allow_html=True)
         else:
             st.markdown(f"- {goal['text']}")
 
-        progress_options = [
-            translate_text("Not Started", UI_LANG_NAME),
-            translate_text("Started", UI_LANG_NAME),
-            translate_text("In Progress", UI_LANG_NAME),
-            translate_text("Completed", UI_LANG_NAME)
-        ]
-
-        # Map stored progress (English) to translated index if necessary
         stored_progress_en = goal.get("progress", "Not Started")
-        # Use English progress value to find index in progress_options by comparing translated strings
-        # Build an English->translated lookup
-        en_to_trans = {
-            "Not Started": translate_text("Not Started", UI_LANG_NAME),
-            "Started": translate_text("Started", UI_LANG_NAME),
-            "In Progress": translate_text("In Progress", UI_LANG_NAME),
-            "Completed": translate_text("Completed", UI_LANG_NAME),
-        }
-        translated_current = en_to_trans.get(stored_progress_en, en_to_trans["Not Started"])
-        try:
-            idx = progress_options.index(translated_current)
-        except ValueError:
-            idx = 0
+        idx = PROGRESS_STATES.index(stored_progress_en) if stored_progress_en in PROGRESS_STATES else 0
 
         status = st.selectbox(
-            translate_text("Current Status for above-mentioned goal", UI_LANG_NAME),
+            ui["goal_status"],
             progress_options,
             index=idx,
             key=f"goal_{goal['goal_id']}_status"
         )
 
-        if st.button(translate_text("Update Current Status of above-mentioned Goal", UI_LANG_NAME), key=f"update_{goal['goal_id']}"):
+        if st.button(ui["update_goal"], key=f"update_{goal['goal_id']}"):
             # Map translated status back to English to store (reverse mapping)
-            trans_to_en = {v: k for k, v in en_to_trans.items()}
             status_en = trans_to_en.get(status, "Not Started")
             update_goal_progress(user_id, goal["goal_id"], status_en)
-            st.sidebar.success(translate_text("Goal updated!", UI_LANG_NAME))
+            st.sidebar.success(ui["goal_updated"])
 
-    new_goal = st.text_input(translate_text("Add new wellness goal", UI_LANG_NAME))
-    if st.button(translate_text("Add Goal", UI_LANG_NAME)):
+    new_goal = st.text_input(ui["new_goal"])
+    if st.button(ui["add_goal"]):
         add_goal(user_id, new_goal)
-        st.sidebar.success(translate_text("Goal added!", UI_LANG_NAME))
+        st.sidebar.success(ui["goal_added"])
 
 # --------------------------
 # Daily Tip & Resources (translated via backend)
 # --------------------------
-st.sidebar.markdown("### " + translate_text("🌿 Daily Wellness Tip", UI_LANG_NAME))
+st.sidebar.markdown("### " + ui["tip_heading"])
 st.sidebar.info(get_daily_tip(profile=profile))  # backend translates based on profile's language/tone
 
-st.sidebar.markdown("### " + translate_text("📚 Guided Exercises & Resources", UI_LANG_NAME))
+st.sidebar.markdown("### " + ui["resources_heading"])
 emotion = detect_emotion(prompt or "")
 exercises = get_guided_exercises(emotion, profile=profile)
 resources = get_resources(emotion, profile=profile)
@@ -1,241 +1,277 @@
 import os
-import json
-import certifi
+import copy
 import uuid
-import random
+import contextvars
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from pymongo import MongoClient, errors
 from datetime import datetime, timezone
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from deep_translator import GoogleTranslator
+from translation_cache import translation_cache
+from catalogue import catalogue
+from storage import create_backend
+from content_bundles import get_bundle, DEFAULT_TIP, ENCOURAGING_EXERCISE, SUPPORTIVE_LINK
+from retrieval_index import RetrievalIndex, RETRIEVAL_BOOTSTRAP_MESSAGES
+from mood_analytics import MoodAnalytics, EMOTIONS, MOOD_ROLLING_WINDOW, MOOD_BOOTSTRAP_SAMPLES, period_start
+# Re-exported: pure-CPU helpers that api_client.py imports without loading this module.
+from sentiment import (
+    analyzer,
+    MOOD_EMOJI_MAP,
+    analyze_sentiment,
+    analyze_sentiment_batch,
+    backfill_sentiment,
+    detect_mood,
+    detect_emotion,
+    get_emoji_for_mood
+)
+from languages import LANGUAGE_CODE_MAP, resolve_language_code
 
 load_dotenv()
 
-AUDIO_CACHE_DIR = os.path.join(os.getcwd(), "audio_cache")
-os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
-
-MONGO_URI = os.getenv("MONGO_URI")
-try:
-    client = MongoClient(
-        MONGO_URI,
-        tls=True,
-        tlsCAFile=certifi.where(),
-        serverSelectionTimeoutMS=5000
-    )
-    client.server_info()
-    db = client["sreemoyee"]
-    collection = db["pradhan"]
-    MONGO_AVAILABLE = True
-except errors.ServerSelectionTimeoutError:
-    print("⚠️ MongoDB not reachable, using local JSON storage.")
-    MONGO_AVAILABLE = False
-    LOCAL_DB_FILE = "local_chat_storage.json"
-
-analyzer = SentimentIntensityAnalyzer()
-
-MOOD_EMOJI_MAP = {
-    "happy": "🙂",
-    "calm": "😌",
-    "stressed": "😟",
-    "sad": "😢",
-    "joy": "😁",
-    "content": "😊",
-    "neutral": "😐",
-    "anxiety": "😰",
-    "anger": "😠"
-}
-
-LANGUAGE_CODE_MAP = {
-    "english": "en",
-    "german": "de",
-    "french": "fr",
-    "spanish": "es",
-    "hindi": "hi",
-    "albanian": "sq",
-    "afrikaans": "af",
-    "amharic": "am",
-    "arabic": "ar",
-    "bengali": "bn",
-    "chinese": "zh",
-    "japanese": "ja",
-    "korean": "ko",
-    "russian": "ru",
-    "turkish": "tr",
-    "urdu": "ur"
-}
-
-def translate_text(text, target_lang="en"):
-    """Translate a single text string to target language."""
+# Nothing connects here; the backend reaches Mongo (or falls back) on first use.
+storage = create_backend()
+# deep_translator pulls in requests and bs4; it is imported on the first translation.
+GoogleTranslator = None
+
+def _translator(target_lang_code):
+    global GoogleTranslator
+    if GoogleTranslator is None:
+        from deep_translator import GoogleTranslator as translator_class
+        GoogleTranslator = translator_class
+    return GoogleTranslator(source='auto', target=target_lang_code)
+
+# Long-term memory: per-user BM25 over past turns, bootstrapped from storage on first search.
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+retrieval_index = RetrievalIndex(lambda user_id: storage.get_messages(user_id, RETRIEVAL_BOOTSTRAP_MESSAGES)[0])
+# Mood rollups: per-user NumPy series, bootstrapped on first read from storage's day rollups and the newest
+# MOOD_BOOTSTRAP_SAMPLES samples, and rebuilt every MOOD_ANALYTICS_TTL seconds.
+mood_analytics = MoodAnalytics(lambda user_id: storage.get_mood_history(user_id, MOOD_BOOTSTRAP_SAMPLES),
+                               lambda user_id: storage.get_mood_rollups(user_id))
+
+def set_storage(backend):
+    """Swap the active StorageBackend (used by benchmarks and load tests)."""
+    global storage
+    storage = backend
+    retrieval_index.clear()
+    mood_analytics.clear()
+
+# Small per-user fields served from one projected read per request.
+PROFILE_FIELDS = ("profile", "habits_summary", "goals", "rolling_summary", "last_updated")
+_request_cache = contextvars.ContextVar("request_cache", default=None)
+
+def begin_request():
+    """Start a fresh read cache; app.py calls this at the top of every rerun."""
+    _request_cache.set({})
+
+@contextmanager
+def request_scope():
+    token = _request_cache.set({})
     try:
-        target_lang_code = LANGUAGE_CODE_MAP.get(target_lang.lower(), "en")
-        if target_lang_code == "en":
+        yield
+    finally:
+        _request_cache.reset(token)
+
+def _profile_fields(user_id):
+    cache = _request_cache.get()
+    if cache is not None and user_id in cache:
+        return cache[user_id]
+    doc = storage.get_user_fields(user_id, PROFILE_FIELDS)
+    if cache is not None:
+        cache[user_id] = doc
+    return doc
+
+def _invalidate(user_id):
+    cache = _request_cache.get()
+    if cache is not None:
+        cache.pop(user_id, None)
+
+
+def translate_text(text, target_lang="en", cache=True):
+    """
+    Translate a single text string to target language. cache=False skips
+    the translation cache both ways: for chat replies and summaries, which
+    are private and not repeated, unlike UI and catalogue strings.
+    """
+    try:
+        target_lang_code = resolve_language_code(target_lang)
+        if target_lang_code == "en" or not text:
             return text
-        return GoogleTranslator(source='auto', target=target_lang_code).translate(text)
+        cached = translation_cache.get(text, target_lang_code) if cache else None
+        if cached is not None:
+            return cached
+        translated = _translator(target_lang_code).translate(text)
+        if translated:
+            if cache:
+                translation_cache.put(text, target_lang_code, translated)
+            return translated
+        return text
     except Exception as e:
         print(f"Translation error ({target_lang}): {e}")
         return text
 
+TRANSLATION_BATCH_MAX_CHARS = 4500
+BATCH_SEPARATOR = "\n"
+
+def _batch_chunks(texts):
+    chunk, size = [], 0
+    for text in texts:
+        if chunk and size + len(text) + len(BATCH_SEPARATOR) > TRANSLATION_BATCH_MAX_CHARS:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text) + len(BATCH_SEPARATOR)
+    if chunk:
+        yield chunk
+
+def _translate_chunk(translator, chunk):
+    # Single-line strings are joined into one request and split back apart;
+    # fall back to per-item translation if the line count doesn't survive.
+    if not any(BATCH_SEPARATOR in text for text in chunk):
+        joined = translator.translate(BATCH_SEPARATOR.join(chunk))
+        parts = joined.split(BATCH_SEPARATOR) if joined else []
+        if len(parts) == len(chunk):
+            return [part.strip() for part in parts]
+    return translator.translate_batch(chunk)
+
+def translate_batch(texts, target_lang="en", fallback=True, cache=True):
+    """
+    Translate many strings in as few round trips as possible.
+    Duplicates are removed and cached strings skipped; the rest are sent
+    in chunks of up to TRANSLATION_BATCH_MAX_CHARS characters.
+    Returns dict { "English text": "translated text" }. Strings that failed
+    map to themselves, or are left out with fallback=False. cache=False
+    neither reads nor writes the translation cache, as in translate_text.
+    """
+    unique = list(dict.fromkeys(t for t in texts if t))
+    target_lang_code = resolve_language_code(target_lang)
+    if target_lang_code == "en":
+        return {t: t for t in unique}
+
+    translated = {}
+    missing = []
+    for text in unique:
+        cached = translation_cache.get(text, target_lang_code) if cache else None
+        if cached is None:
+            missing.append(text)
+        else:
+            translated[text] = cached
+
+    if missing:
+        translator = _translator(target_lang_code)
+        for chunk in _batch_chunks(missing):
+            try:
+                results = _translate_chunk(translator, chunk)
+                fresh = {src: dst for src, dst in zip(chunk, results) if dst}
+                if cache:
+                    translation_cache.put_many(target_lang_code, fresh)
+                translated.update(fresh)
+            except Exception as e:
+                print(f"Batch translation error ({target_lang}): {e}")
+        if fallback:
+            for text in missing:
+                translated.setdefault(text, text)
+    return translated
+
 def translate_ui_labels(labels_dict, target_lang="en"):
     """
     Translate all sidebar/UI labels (headings, dropdowns, options) into target language.
     labels_dict: dict { "key": "English text" }
     Returns translated dict.
     """
-    translated = {}
-    for key, text in labels_dict.items():
-        translated[key] = translate_text(text, target_lang)
-    return translated
-
-def detect_mood(user_message):
-    sentiment = analyzer.polarity_scores(user_message)
-    if sentiment["compound"] >= 0.5:
-        return "happy"
-    elif sentiment["compound"] <= -0.5:
-        return "sad"
-    elif sentiment["compound"] > 0:
-        return "calm"
-    else:
-        return "stressed"
-
-def detect_emotion(user_message):
-    sentiment = analyzer.polarity_scores(user_message)
-    compound = sentiment["compound"]
-    if compound >= 0.6:
-        return "joy"
-    elif 0.2 <= compound < 0.6:
-        return "content"
-    elif -0.2 < compound < 0.2:
-        return "neutral"
-    elif -0.6 < compound <= -0.2:
-        return "anxiety"
-    else:
-        return "anger"
-
-def get_emoji_for_mood(mood_or_emotion):
-    return MOOD_EMOJI_MAP.get(mood_or_emotion, "🧠")
-
-def load_local_data():
-    if os.path.exists(LOCAL_DB_FILE):
-        with open(LOCAL_DB_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-def save_local_data(data):
-    with open(LOCAL_DB_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    translated = translate_batch(labels_dict.values(), target_lang)
+    return {key: translated.get(text, text) for key, text in labels_dict.items()}
 
 def get_conversation(user_id):
-    if MONGO_AVAILABLE:
-        doc = collection.find_one({"user_id": user_id})
-        if not doc:
-            return {"user_id": user_id, "conversation": [], "last_updated": None, "habits_summary": None, "mood_history": [], "goals": [], "profile": {}}
-        doc.setdefault("conversation", [])
-        doc.setdefault("session_summaries", [])
-        doc.setdefault("habits_summary", "User is new to wellness tracking.")
-        doc.setdefault("mood_history", [])
-        doc.setdefault("goals", [])
-        doc.setdefault("profile", {})
-        return doc
-    else:
-        data = load_local_data()
-        return data.get(user_id, {"user_id": user_id, "conversation": [], "last_updated": None, "habits_summary": "User is new to wellness tracking.", "mood_history": [], "goals": [], "profile": {}})
+    """Profile document plus the latest HISTORY_WINDOW messages and mood samples."""
+    return storage.get_conversation(user_id)
 
-def log_conversation(user_id, messages):
+def get_messages(user_id, limit=50, before=None):
+    """One page of chat history: (messages oldest-first, cursor for the next older page or None)."""
+    return storage.get_messages(user_id, limit, before)
+
+def _message_defaults(messages):
     for msg in messages:
+        # A stable id, so readers (the rolling summary) can tell exactly which messages they have seen.
+        msg.setdefault("message_id", uuid.uuid4().hex)
         msg.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
         msg.setdefault("mood", None)
         msg.setdefault("emotion", None)
         msg.setdefault("emoji", None)
         msg.setdefault("audio_path", None)
+    return messages
 
-    if MONGO_AVAILABLE:
-        collection.update_one(
-            {"user_id": user_id},
-            {"$set": {"last_updated": datetime.now(timezone.utc)}, "$push": {"conversation": {"$each": messages}}},
-            upsert=True
-        )
-    else:
-        data = load_local_data()
-        if user_id not in data:
-            data[user_id] = {"conversation": []}
-        data[user_id]["conversation"].extend(messages)
-        data[user_id]["last_updated"] = datetime.now(timezone.utc).isoformat()
-        save_local_data(data)
+def log_conversation(user_id, messages):
+    storage.log_conversation(user_id, _message_defaults(messages))
+    retrieval_index.add(user_id, messages)
+
+def record_turn(user_id, user_msg, ai_msg, mood_sample=None):
+    """
+    Persist one chat turn as a single storage write: both messages, the
+    user's mood sample ({"mood", "emotion", "score"}) and last_updated.
+    """
+    messages = _message_defaults([user_msg, ai_msg])
+    if mood_sample:
+        # One timestamp for storage and the rollups, so a bootstrap that already read the sample skips it.
+        mood_sample = dict(mood_sample, timestamp=mood_sample.get("timestamp") or datetime.now(timezone.utc))
+    storage.record_turn(user_id, messages, mood_sample)
+    retrieval_index.add(user_id, messages)
+    if mood_sample:
+        mood_analytics.add(user_id, mood_sample)
+
+def search_memory(user_id, query, k=RETRIEVAL_TOP_K, exclude_last=0):
+    """Past turns most relevant to query, best first, skipping the newest exclude_last turns."""
+    return retrieval_index.search(user_id, query, k, exclude_last)
 
 def log_summary(user_id, summary_text):
-    if MONGO_AVAILABLE:
-        collection.update_one(
-            {"user_id": user_id},
-            {"$push": {"session_summaries": {"summary": summary_text, "timestamp": datetime.now(timezone.utc)}}},
-            upsert=True
-        )
-    else:
-        data = load_local_data()
-        if user_id not in data:
-            data[user_id] = {"session_summaries": []}
-        data[user_id].setdefault("session_summaries", []).append({
-            "summary": summary_text,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-        save_local_data(data)
+    storage.log_summary(user_id, summary_text)
 
 def get_session_summary(user_id):
-    if MONGO_AVAILABLE:
-        doc = collection.find_one({"user_id": user_id})
-        return doc.get("session_summaries", []) if doc else []
-    else:
-        data = load_local_data()
-        return data.get(user_id, {}).get("session_summaries", [])
+    return storage.get_session_summary(user_id)
+
+def get_rolling_summary(user_id):
+    """The user's single rolling summary: {"text", "through", "through_id", "turns", "updated"}, or {} if none yet."""
+    return dict(_profile_fields(user_id).get("rolling_summary") or {})
+
+def update_rolling_summary(user_id, summary):
+    storage.update_rolling_summary(user_id, summary)
+    _invalidate(user_id)
 
 def update_habits(user_id, habits_text):
-    if MONGO_AVAILABLE:
-        collection.update_one({"user_id": user_id}, {"$set": {"habits_summary": habits_text}}, upsert=True)
-    else:
-        data = load_local_data()
-        if user_id not in data:
-            data[user_id] = {}
-        data[user_id]["habits_summary"] = habits_text
-        save_local_data(data)
+    storage.update_habits(user_id, habits_text)
+    _invalidate(user_id)
 
 def get_habits(user_id):
-    doc = get_conversation(user_id)
+    doc = _profile_fields(user_id)
     return doc.get("habits_summary") or "User is new to wellness tracking."
 
-def make_audio_filename(user_id, role="ai"):
-    uid = uuid.uuid4().hex
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
-    filename = f"{user_id}_{role}_{timestamp}_{uid}.mp3"
-    return os.path.join(AUDIO_CACHE_DIR, filename)
-
 def update_mood_history(user_id, mood, emotion):
-    if MONGO_AVAILABLE:
-        collection.update_one(
-            {"user_id": user_id},
-            {"$push": {"mood_history": {"mood": mood, "emotion": emotion, "timestamp": datetime.now(timezone.utc)}}},
-            upsert=True
-        )
-    else:
-        data = load_local_data()
-        if user_id not in data:
-            data[user_id] = {}
-        data[user_id].setdefault("mood_history", []).append({
-            "mood": mood,
-            "emotion": emotion,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-        save_local_data(data)
-
-def get_mood_history(user_id):
-    if MONGO_AVAILABLE:
-        doc = collection.find_one({"user_id": user_id})
-        return doc.get("mood_history", []) if doc else []
-    else:
-        data = load_local_data()
-        return data.get(user_id, {}).get("mood_history", [])
+    # Same timestamp for storage and the rollups, as in record_turn.
+    timestamp = datetime.now(timezone.utc)
+    storage.update_mood_history(user_id, mood, emotion, timestamp)
+    mood_analytics.add(user_id, {"mood": mood, "emotion": emotion, "timestamp": timestamp})
+
+def get_mood_history(user_id, limit=None):
+    return storage.get_mood_history(user_id, limit)
+
+def get_mood_summary(user_id):
+    """Precomputed mood aggregates: averages, volatility, streaks, dominant emotion."""
+    return mood_analytics.summary(user_id)
+
+def get_mood_trends(user_id, period="day", last=14, window=MOOD_ROLLING_WINDOW, samples=60):
+    """
+    Chart data: emotion counts and mean score for the last `last` days or
+    weeks with check-ins, and the rolling average over the last `samples`.
+    """
+    series = mood_analytics.series(user_id)
+    periods, counts, means = series.distribution(period, last)
+    return {
+        "periods": [period_start(p, period).isoformat() for p in periods],
+        "counts": {emotion: counts[:, i].tolist() for i, emotion in enumerate(EMOTIONS)},
+        "average": means.round(3).tolist(),
+        "rolling_average": series.rolling_average(window, last=samples).round(3).tolist()
+    }
 
 def get_user_profile(user_id):
-    doc = get_conversation(user_id)
-    profile = doc.get("profile", {})
+    doc = _profile_fields(user_id)
+    profile = copy.deepcopy(doc.get("profile") or {})
     if not profile:
         profile = {
             "name": user_id,
@@ -250,132 +286,67 @@ def get_user_profile(user_id):
     return profile
 
 def update_user_profile(user_id, profile):
-    if MONGO_AVAILABLE:
-        collection.update_one({"user_id": user_id}, {"$set": {"profile": profile}}, upsert=True)
-    else:
-        data = load_local_data()
-        if user_id not in data:
-            data[user_id] = {}
-        data[user_id]["profile"] = profile
-        save_local_data(data)
+    storage.update_user_profile(user_id, profile)
+    _invalidate(user_id)
 
 def add_goal(user_id, goal_text):
     goal_id = str(uuid.uuid4())
     goal = {"goal_id": goal_id, "text": goal_text, "progress": "Not Started"}
-    if MONGO_AVAILABLE:
-        collection.update_one({"user_id": user_id}, {"$push": {"goals": goal}}, upsert=True)
-    else:
-        data = load_local_data()
-        if user_id not in data:
-            data[user_id] = {}
-        data[user_id].setdefault("goals", []).append(goal)
-        save_local_data(data)
+    storage.add_goal(user_id, goal)
+    _invalidate(user_id)
 
 def update_goal_progress(user_id, goal_id, progress):
-    if MONGO_AVAILABLE:
-        collection.update_one({"user_id": user_id, "goals.goal_id": goal_id}, {"$set": {"goals.$.progress": progress}})
-    else:
-        data = load_local_data()
-        if user_id in data:
-            for goal in data[user_id].get("goals", []):
-                if goal["goal_id"] == goal_id:
-                    goal["progress"] = progress
-            save_local_data(data)
+    storage.update_goal_progress(user_id, goal_id, progress)
+    _invalidate(user_id)
 
 def get_goals(user_id):
-    doc = get_conversation(user_id)
-    return doc.get("goals", [])
+    return [dict(goal) for goal in _profile_fields(user_id).get("goals") or []]
+
+def _profile_language(profile):
+    return profile.get("preferences", {}).get("language", "en") if profile else "en"
+
+def translate_catalogue(texts, target_lang="en"):
+    """Look catalogue strings up in the pre-built bundle; never translates live."""
+    target_lang_code = resolve_language_code(target_lang)
+    if target_lang_code == "en":
+        return list(texts)
+    strings = get_bundle(target_lang_code, translate_batch)
+    return [strings.get(text, text) for text in texts]
 
 def get_daily_tip(profile=None):
-    try:
-        with open("daily_tips.json", "r", encoding="utf-8") as f:
-            tips = json.load(f)
-        if not tips:
-            return translate_text("Remember to take a deep breath and smile 🙂.", profile.get("preferences", {}).get("language", "en") if profile else "en")
-        if profile:
-            tone = profile.get("preferences", {}).get("tone")
-            if tone:
-                filtered_tips = [t for t in tips if t.get("tone") == tone]
-                if filtered_tips:
-                    tips = filtered_tips
-        selected_tip = random.choice(tips).get("tip", "Remember to take a deep breath and smile 🙂.")
-        language_code = profile.get("preferences", {}).get("language", "en") if profile else "en"
-        return translate_text(selected_tip, language_code)
-    except Exception as e:
-        print(f"Error loading daily tips: {e}")
-        return translate_text("Remember to take a deep breath and smile 🙂.", profile.get("preferences", {}).get("language", "en") if profile else "en")
+    language = _profile_language(profile)
+    tone = profile.get("preferences", {}).get("tone") if profile else None
+    tips = catalogue.tips(tone)
+    # Same tip all day: keeps the sidebar stable across reruns and prompts repeatable for the response cache.
+    selected_tip = tips[datetime.now(timezone.utc).date().toordinal() % len(tips)] if tips else DEFAULT_TIP
+    return translate_catalogue([selected_tip], language)[0]
 
 def get_guided_exercises(emotion, profile=None):
-    try:
-        with open("resources.json", "r", encoding="utf-8") as f:
-            resources = json.load(f)
-        exercises = resources.get(emotion, {}).get("exercises", []).copy()
-        if profile:
-            tone = profile.get("preferences", {}).get("tone", "")
-            language_code = profile.get("preferences", {}).get("language", "en")
-            if tone == "encouraging":
-                exercises.append("Try a 5-minute power breathing exercise for positivity!")
-            if language_code.lower() != "en":
-                exercises = [translate_text(ex, language_code) for ex in exercises]
-        return exercises
-    except Exception as e:
-        print(f"Error loading exercises: {e}")
-        return []
+    exercises = list(catalogue.exercises(emotion))
+    if profile:
+        tone = profile.get("preferences", {}).get("tone", "")
+        if tone == "encouraging":
+            exercises.append(ENCOURAGING_EXERCISE)
+        exercises = translate_catalogue(exercises, _profile_language(profile))
+    return exercises
 
 def get_resources(emotion, profile=None):
-    try:
-        with open("resources.json", "r", encoding="utf-8") as f:
-            resources = json.load(f)
-        links = resources.get(emotion, {}).get("links", []).copy()
-        if profile:
-            tone = profile.get("preferences", {}).get("tone", "")
-            language_code = profile.get("preferences", {}).get("language", "en")
-            if tone == "supportive":
-                links.append({"title": "Supportive Mental Health Article", "url": "https://example.com/support"})
-            if language_code.lower() != "en":
-                for link in links:
-                    link["title"] = translate_text(link["title"], language_code)
-        return links
-    except Exception as e:
-        print(f"Error loading resources: {e}")
-        return []
-
-def get_all_profiles():
-    if MONGO_AVAILABLE:
-        profiles_cursor = collection.find({}, {"user_id": 1, "last_updated": 1}).sort("last_updated", -1)
-        return [doc["user_id"] for doc in profiles_cursor]
-    else:
-        data = load_local_data()
-        profiles_with_time = []
-        for uid, val in data.items():
-            last_updated_str = val.get("last_updated")
-            last_updated = datetime.min.replace(tzinfo=timezone.utc)
-            if last_updated_str:
-                try:
-                    last_updated = datetime.fromisoformat(last_updated_str)
-                    if last_updated.tzinfo is None:
-                        last_updated = last_updated.replace(tzinfo=timezone.utc)
-                except Exception:
-                    pass
-            profiles_with_time.append((uid, last_updated))
-        profiles_with_time.sort(key=lambda x: x[1], reverse=True)
-        return [uid for uid, _ in profiles_with_time]
+    """Returns read-only link mappings; translated titles come back as new dicts."""
+    links = list(catalogue.links(emotion))
+    if profile:
+        tone = profile.get("preferences", {}).get("tone", "")
+        if tone == "supportive":
+            links.append(SUPPORTIVE_LINK)
+        language = _profile_language(profile)
+        if resolve_language_code(language) != "en":
+            titles = translate_catalogue([link["title"] for link in links], language)
+            links = [{**link, "title": title} for link, title in zip(links, titles)]
+    return links
+
+def get_all_profiles(limit=None, offset=0, prefix=None):
+    """User ids, most recently active first; prefix filters case-insensitively."""
+    return storage.get_all_profiles(limit, offset, prefix)
 
 def create_profile(profile_name):
-    if MONGO_AVAILABLE:
-        if not collection.find_one({"user_id": profile_name}):
-            collection.insert_one({
-                "user_id": profile_name,
-                "conversation": [],
-                "profile": {"name": profile_name, "preferences": {"language": "English", "tone": "neutral"}},
-                "last_updated": datetime.now(timezone.utc)
-            })
-    else:
-        data = load_local_data()
-        if profile_name not in data:
-            data[profile_name] = {
-                "conversation": [],
-                "profile": {"name": profile_name, "preferences": {"language": "English", "tone": "neutral"}},
-                "last_updated": datetime.now(timezone.utc).isoformat()
-            }
-            save_local_data(data)
+    storage.create_profile(profile_name)
+    _invalidate(profile_name)
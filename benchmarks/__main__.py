@@ -0,0 +1,69 @@
+"""
+Core benchmark suite (benchmarks/suite.py) against deterministic fakes: no
+Gemini, Google Translate, gTTS or MongoDB needed. Prints p50/p95/p99 and
+ops/sec per case; --json saves them so commits can be compared:
+
+    python -m benchmarks --json before.json
+    git checkout <other commit>
+    python -m benchmarks --json after.json --compare before.json
+
+Scenario benchmarks stay separate: python -m benchmarks.bench_<name>
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+
+def parse_args(argv=None):
+    from benchmarks.suite import GROUPS
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Core benchmark suite against fakes.")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="groups to run (default: all)")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="JSON from an earlier run; exit 1 if any p50 regressed")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p50 slowdown in percent counted as a regression")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts, e.g. 0.1 for a quick run")
+    parser.add_argument("--storage", choices=("mongo", "memory", "local"), default="mongo",
+                        help="fake MongoDB collections (default), in-process dicts or SQLite")
+    parser.add_argument("--storage-latency", type=float, default=0.0, help="seconds per Mongo round trip or storage call")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds to the model's first token")
+    parser.add_argument("--chunk-latency", type=float, default=0.0, help="seconds between streamed model chunks")
+    parser.add_argument("--translate-latency", type=float, default=0.0, help="seconds per translator request")
+    parser.add_argument("--tts-latency", type=float, default=0.0, help="seconds per speech synthesis")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    scratch = tempfile.mkdtemp(prefix="wellness-bench-")
+    # Caches, bundles and audio written during the run stay in scratch, and app.py runs in-process.
+    os.environ.pop("WELLNESS_API_URL", None)
+    os.environ.update(
+        STORAGE_BACKEND="memory",
+        TRANSLATION_CACHE_DB=os.path.join(scratch, "translations.sqlite"),
+        CONTENT_BUNDLE_DIR=os.path.join(scratch, "bundles"),
+        AUDIO_CACHE_DIR=os.path.join(scratch, "audio"),
+        LOCAL_DB_FILE=os.path.join(scratch, "local.sqlite")
+    )
+    options = parse_args(argv)
+    from benchmarks import common, suite
+
+    suite.setup(options, scratch)
+    for group in suite.GROUPS:
+        if group in options.only:
+            print(f"\n## {group}")
+            suite.RUNNERS[group](options)
+
+    config = {key: value for key, value in vars(options).items() if key not in ("json", "compare", "threshold")}
+    if options.json:
+        common.save_results(options.json, common.run_info(**config))
+    if options.compare:
+        settings = {key: value for key, value in config.items() if key != "only"}
+        regressions = common.compare(options.compare, options.threshold, settings)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) more than {options.threshold:.0f}% slower at p50")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+api_server.py against its fakes (in-memory storage, fake Gemini with 0.3 s to
+the first token and 0.03 s between chunks, fake translator), served from a
+thread in this process:
+  - JSON endpoint latency over one keep-alive connection, and an app.py
+    rerun through AppTest as a thin client of the API
+  - 64 concurrent chat turns, one at a time (as one Streamlit session runs
+    them) against API_WORKERS of 4, 16 and 64
+  - backpressure: 64 concurrent turns against max_inflight 16, and /health
+    latency while the server is saturated
+
+    python -m benchmarks.bench_api [clients]
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+PORT = _free_port()
+os.environ["WELLNESS_API_URL"] = f"http://127.0.0.1:{PORT}"
+os.environ["WELLNESS_API_TOKEN"] = "bench-token"
+AUTH = {"Authorization": "Bearer bench-token"}
+
+from benchmarks.common import measure, report
+import api_server
+
+api_server.load_pipeline(fakes=True)
+
+import requests
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def start_server(port, **kwargs):
+    started = threading.Event()
+    apps = []
+
+    async def serve():
+        app = api_server.make_app(**kwargs)
+        app.listen(port, address="127.0.0.1")
+        apps.append(app)
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    started.wait()
+    return apps[0]
+
+
+def chat_turn(base, i):
+    """(status, seconds to first chunk, total seconds) for one streamed turn."""
+    start = time.perf_counter()
+    first = None
+    with requests.post(base + "/chat", json={"message": f"turn {i}: I can't sleep before exams",
+                                             "user_id": f"user_{i % 8}", "target_lang": "en"}, headers=AUTH, stream=True) as response:
+        for _ in response.iter_content(chunk_size=None):
+            if first is None:
+                first = time.perf_counter() - start
+    return response.status_code, first, time.perf_counter() - start
+
+
+def concurrent_turns(base, clients, first_turn):
+    # Distinct messages per run, so no turn is answered from the response cache.
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda i: chat_turn(base, i), range(first_turn, first_turn + clients)))
+        return results, time.perf_counter() - start
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+def run():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    base = os.environ["WELLNESS_API_URL"]
+    start_server(PORT, workers=16, max_inflight=256)
+    http = requests.Session()
+    http.headers.update(AUTH)
+    http.post(base + "/profiles", json={"name": "bench"})
+    http.post(base + "/users/bench/turns", json={"user_msg": {"role": "user", "content": "hello"},
+                                                  "ai_msg": {"role": "ai", "content": "hi there"},
+                                                  "mood_sample": {"mood": "calm", "emotion": "content", "score": 0.4}})
+    for path in ("/users/bench/profile", "/users/bench/messages?limit=30", "/users/bench/mood/summary",
+                 "/catalogue/tip?language=English&tone=neutral"):
+        report(f"GET {path}", measure(lambda: http.get(base + path).json(), iterations=500))
+    at = AppTest.from_file(APP_FILE, default_timeout=60)
+    at.run()
+    report("app.py rerun as API client", measure(at.run, iterations=20, warmup=1))
+
+    start = time.perf_counter()
+    for i in range(8):
+        chat_turn(base, 500 + i)
+    print(f"one session, turns one after another: {8 / (time.perf_counter() - start):6.1f} turns/s")
+    for workers in (4, 16, 64):
+        port = _free_port()
+        start_server(port, workers=workers, max_inflight=1024)
+        results, wall = concurrent_turns(f"http://127.0.0.1:{port}", clients, workers * 1000)
+        firsts = [r[1] for r in results if r[0] == 200]
+        print(f"{clients} concurrent turns, {workers:>2} workers: {clients / wall:6.1f} turns/s   "
+              f"first chunk p50 {percentile(firsts, 0.5) * 1000:6.0f} ms   p95 {percentile(firsts, 0.95) * 1000:6.0f} ms")
+
+    port = _free_port()
+    app = start_server(port, workers=16, max_inflight=16)
+    base_limited = f"http://127.0.0.1:{port}"
+    with ThreadPoolExecutor(max_workers=1) as probe:
+        health = probe.submit(measure, lambda: requests.get(base_limited + "/health"), iterations=50, warmup=0)
+        results, wall = concurrent_turns(base_limited, clients, 100_000)
+        health = health.result()
+    served = sum(1 for r in results if r[0] == 200)
+    print(f"{clients} concurrent turns, max_inflight 16: {served} served, {clients - served} got 503 "
+          f"(server counted {app.rejected}), {wall * 1000:.0f} ms")
+    report("GET /health while saturated", health)
+
+
+if __name__ == "__main__":
+    run()
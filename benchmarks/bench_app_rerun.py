@@ -0,0 +1,53 @@
+"""
+Wall time and Python heap size of an app.py rerun as the stored history
+grows, using Streamlit's AppTest harness against a throwaway SQLite store.
+
+    python -m benchmarks.bench_app_rerun [messages ...]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_DB_FILE", os.path.join(_tmp, "bench.sqlite"))
+
+from benchmarks.common import measure, report
+from streamlit.testing.v1 import AppTest
+import backend
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def seed(user_id, count):
+    for start in range(0, count, 1000):
+        backend.log_conversation(user_id, [
+            {"role": "user" if i % 2 == 0 else "ai", "content": f"stored message {i}", "mood": "calm", "emotion": "content"}
+            for i in range(start, min(count, start + 1000))
+        ])
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 10000]
+    for size in sizes:
+        user_id = f"user_{size}"
+        seed(user_id, size)
+        backend.create_profile(user_id)
+        at = AppTest.from_file(APP_FILE, default_timeout=60)
+        at.session_state["user_id"] = user_id
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+        tracemalloc.start()
+        at.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{size} stored messages: first run {first * 1000:.0f} ms, rerun heap peak {peak / 1024:.0f} KiB, "
+              f"{len(at.session_state['messages'])} messages in session")
+        report(f"app.py rerun ({size} stored messages)", measure(at.run, iterations=10, warmup=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Per-call cost of catalogue lookups: the old open() + json.load() on every
+call versus the in-memory Catalogue.
+
+    python -m benchmarks.bench_catalogue
+"""
+import json
+
+from benchmarks.common import measure, report
+from catalogue import catalogue, TIPS_FILE, RESOURCES_FILE
+
+
+def load_per_call_tips():
+    with open(TIPS_FILE, "r", encoding="utf-8") as f:
+        tips = json.load(f)
+    return [t for t in tips if t.get("tone") == "calm"]
+
+
+def load_per_call_exercises():
+    with open(RESOURCES_FILE, "r", encoding="utf-8") as f:
+        resources = json.load(f)
+    return resources.get("sad", {}).get("exercises", []).copy()
+
+
+def load_per_call_links():
+    with open(RESOURCES_FILE, "r", encoding="utf-8") as f:
+        resources = json.load(f)
+    return resources.get("sad", {}).get("links", []).copy()
+
+
+def main():
+    catalogue.refresh(force=True)
+    report("tips (json.load per call)", measure(load_per_call_tips))
+    report("tips (Catalogue)", measure(lambda: catalogue.tips("calm"), iterations=100000))
+    report("exercises (json.load per call)", measure(load_per_call_exercises))
+    report("exercises (Catalogue)", measure(lambda: catalogue.exercises("sad"), iterations=100000))
+    report("links (json.load per call)", measure(load_per_call_links))
+    report("links (Catalogue)", measure(lambda: catalogue.links("sad"), iterations=100000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Pre-model latency of prepare_turn with every storage call paying a 30 ms
+round-trip: stages run one after another (CONTEXT_POOL disabled) versus
+fanned out on the context pool.
+
+    python -m benchmarks.bench_context_fanout
+"""
+import os
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.common import measure, report
+from benchmarks.fakes import SlowBackend
+from storage import MemoryBackend
+import backend
+import main
+
+LATENCY = 0.03
+ARGS = dict(conversation_messages=[], previous_suggestions=[], habits_summary="", user_id="bench_user")
+
+
+def run():
+    backend.set_storage(SlowBackend(MemoryBackend(), LATENCY))
+    backend.create_profile("bench_user")
+    pool = main.CONTEXT_POOL
+    for name, context_pool in (("sequential", None), ("fan-out", pool)):
+        main.CONTEXT_POOL = context_pool
+        stats = measure(lambda: main.prepare_turn("I feel a bit low today", **ARGS), iterations=30, warmup=2)
+        report(f"prepare_turn ({name})", stats)
+        timings = main.prepare_turn("I feel a bit low today", **ARGS)["timings"]
+        print("    " + "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in sorted(timings.items())))
+    main.CONTEXT_POOL = pool
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,80 @@
+"""
+ResilientModel against a fake model that injects latency and errors:
+  - 20% transient errors, 16 threads: error replies seen by users, raw vs wrapped
+  - a hung provider (5 s per call) with a 1 s deadline
+  - a full outage: how fast the breaker starts answering offline
+  - the token bucket holding 40 requests to 5/s after a burst of 10
+
+    python -m benchmarks.bench_gemini_client
+"""
+import io
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeGenerativeModel
+import gemini_client
+from gemini_client import ResilientModel, TokenBucket, CircuitBreaker
+
+gemini_client.BACKOFF_BASE = 0.05
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def drive(model, requests=200, threads=16):
+    def one(_):
+        start = time.perf_counter()
+        try:
+            response = model.generate_content("hello")
+            ok = not getattr(response, "offline", False)
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(one, range(requests)))
+    latencies = [r[1] for r in results]
+    failed = sum(1 for ok, _ in results if not ok)
+    return failed / requests, percentile(latencies, 0.5), percentile(latencies, 0.95)
+
+
+def quiet():
+    """The wrapper prints each failed attempt; keep the report readable."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def run():
+    fake = dict(latency=0.1, error_rate=0.2, seed=1)
+    for name, model in (("raw model", FakeGenerativeModel(**fake)),
+                        ("ResilientModel", ResilientModel(FakeGenerativeModel(**fake), TokenBucket(1000, 1000),
+                                                          CircuitBreaker(threshold=50)))):
+        with quiet():
+            failed, p50, p95 = drive(model)
+        print(f"20% errors, {name:<15} failed replies {failed:6.1%}   p50 {p50 * 1000:6.0f} ms   p95 {p95 * 1000:6.0f} ms")
+
+    hung = ResilientModel(FakeGenerativeModel(latency=5.0), TokenBucket(1000, 1000), timeout=1.0, max_retries=0)
+    start = time.perf_counter()
+    with quiet():
+        response = hung.generate_content("hello")
+    print(f"hung provider, 1 s deadline: answered after {time.perf_counter() - start:.2f} s (offline={getattr(response, 'offline', False)})")
+
+    down = ResilientModel(FakeGenerativeModel(latency=0.05, error_rate=1.0), TokenBucket(1000, 1000),
+                          CircuitBreaker(threshold=5, cooldown=30), max_retries=1)
+    timings = []
+    for _ in range(10):
+        start = time.perf_counter()
+        with quiet():
+            down.generate_content("hello")
+        timings.append((time.perf_counter() - start) * 1000)
+    print("outage, per-call ms: " + " ".join(f"{t:.0f}" for t in timings) + f"   breaker={down.breaker.state}")
+
+    limited = ResilientModel(FakeGenerativeModel(), TokenBucket(rate=5, capacity=10))
+    start = time.perf_counter()
+    drive(limited, requests=40, threads=8)
+    print(f"token bucket 5/s burst 10: 40 requests took {time.perf_counter() - start:.1f} s (expected ~6 s)")
+
+
+if __name__ == "__main__":
+    run()
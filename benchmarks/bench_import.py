@@ -0,0 +1,84 @@
+"""
+Cold-start cost in fresh interpreters with MongoDB unreachable
+(STORAGE_BACKEND=auto, MONGO_URI pointing at a blackholed address):
+  - import backend, then import main on top of it
+  - the first and second storage calls after import
+  - the slowest top-level imports of main (python -X importtime)
+
+    python -m benchmarks.bench_import [--tree PATH] [--runs N]
+
+--tree measures another checkout, e.g. a `git worktree` of an older commit.
+"""
+import os
+import sys
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UNREACHABLE_MONGO = "mongodb://10.255.255.1:27017/"
+
+PROBE = """
+import time
+t0 = time.perf_counter()
+import backend
+t1 = time.perf_counter()
+import main
+t2 = time.perf_counter()
+backend.get_all_profiles()
+t3 = time.perf_counter()
+backend.get_all_profiles()
+t4 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2, t4 - t3)
+"""
+
+
+def child_env(tree, scratch):
+    env = dict(os.environ, PYTHONPATH=tree, MONGO_URI=UNREACHABLE_MONGO,
+               LOCAL_DB_FILE=os.path.join(scratch, "local.sqlite"),
+               TRANSLATION_CACHE_DB=os.path.join(scratch, "translations.sqlite"),
+               AUDIO_CACHE_DIR=os.path.join(scratch, "audio"))
+    env.pop("STORAGE_BACKEND", None)
+    return env
+
+
+def cold_start(env, scratch):
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=scratch, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return [float(x) for x in out.strip().splitlines()[-1].split()]
+
+
+def slowest_imports(env, scratch, top=5):
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], env=env,
+                         cwd=scratch, capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            # Direct children of the top level (two-space indent) are what main/backend pull in themselves.
+            if len(name) - len(name.lstrip()) <= 3:
+                rows.append((int(parts[1]), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def run(tree=ROOT, runs=3):
+    with tempfile.TemporaryDirectory() as scratch:
+        os.makedirs(os.path.join(scratch, "audio"))
+        env = child_env(tree, scratch)
+        samples = [cold_start(env, scratch) for _ in range(runs)]
+        labels = ("import backend", "import main (after backend)", "first storage call", "second storage call")
+        print(f"tree: {tree}   runs: {runs}   MONGO_URI={UNREACHABLE_MONGO}")
+        for i, label in enumerate(labels):
+            values = sorted(s[i] for s in samples)
+            print(f"{label:<30} median {values[len(values) // 2] * 1000:8.1f} ms   "
+                  f"min {values[0] * 1000:8.1f} ms   max {values[-1] * 1000:8.1f} ms")
+        print("slowest imports under main (cumulative):")
+        for micros, name in slowest_imports(env, scratch):
+            print(f"  {name:<40} {micros / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    tree = args[args.index("--tree") + 1] if "--tree" in args else ROOT
+    runs = int(args[args.index("--runs") + 1]) if "--runs" in args else 3
+    run(os.path.abspath(tree), runs)
@@ -0,0 +1,75 @@
+"""
+Cost of one log_conversation() write as a user's history grows, for the old
+whole-file JSON store versus the SQLite LocalStore.
+
+    python -m benchmarks.bench_local_store [max_messages]
+"""
+import os
+import sys
+import json
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks.common import measure, report
+from local_store import LocalStore
+
+SIZES = (1000, 10000, 100000)
+BATCH = 1000
+
+
+def make_turn(i):
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {"role": "user", "content": f"message {i} about my day", "timestamp": now, "mood": "calm",
+         "emotion": "content", "emoji": "😊", "audio_path": None},
+        {"role": "ai", "content": f"reply {i}: try a breathing exercise", "timestamp": now, "mood": None,
+         "emotion": "content", "emoji": "😊", "audio_path": None}
+    ]
+
+
+class LegacyJsonStore:
+    """The pre-SQLite behaviour: load and rewrite the whole file on every write."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def log_conversation(self, user_id, messages):
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        data.setdefault(user_id, {"conversation": []})["conversation"].extend(messages)
+        data[user_id]["last_updated"] = datetime.now(timezone.utc).isoformat()
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def seed(self, user_id, count):
+        data = {user_id: {"conversation": [m for i in range(count // 2) for m in make_turn(i)]}}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def seed_sqlite(store, user_id, current, target):
+    while current < target:
+        batch = [m for i in range(current // 2, (current + BATCH) // 2) for m in make_turn(i)]
+        store.log_conversation(user_id, batch)
+        current += len(batch)
+    return current
+
+
+def main():
+    max_messages = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyJsonStore(os.path.join(tmp, "legacy.json"))
+        store = LocalStore(os.path.join(tmp, "bench.sqlite"), legacy_json=None)
+        stored = 0
+        for size in (s for s in SIZES if s <= max_messages):
+            legacy.seed("bench_user", size)
+            iterations = 20 if size < 100000 else 3
+            report(f"json file, {size} messages", measure(lambda: legacy.log_conversation("bench_user", make_turn(0)), iterations=iterations, warmup=1))
+            stored = seed_sqlite(store, "bench_user", stored, size)
+            report(f"sqlite, {size} messages", measure(lambda: store.log_conversation("bench_user", make_turn(0)), iterations=500))
+
+
+if __name__ == "__main__":
+    main()
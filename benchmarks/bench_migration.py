@@ -0,0 +1,33 @@
+"""
+Throughput of migrate_buckets.migrate over synthetic legacy documents held
+in the in-memory fake collection (measures the bucketing work, not network).
+
+    python -m benchmarks.bench_migration [users] [messages_per_user]
+"""
+import sys
+
+from benchmarks.fakes import FakeDatabase
+import migrate_buckets
+from storage import mongo_backend
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    backend = mongo_backend(FakeDatabase())
+    for u in range(users):
+        backend.collection.insert_one({
+            "user_id": f"user_{u}",
+            "conversation": [
+                {"role": "user", "content": f"message {i}", "timestamp": f"2025-09-{1 + i % 28:02d}T12:00:00+00:00"}
+                for i in range(per_user)
+            ],
+            "mood_history": [{"mood": "calm", "emotion": "content", "timestamp": "2025-09-01T12:00:00+00:00"}] * (per_user // 2)
+        })
+    migrate_buckets.migrate(backend)
+    buckets = len(backend.message_buckets.docs) + len(backend.mood_buckets.docs)
+    print(f"{buckets} bucket documents written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Mood analytics over one user with a million samples (about three years of
+check-ins): a plain-Python scan of the stored sample dicts, as any trend view
+needed before, against the MoodSeries rollups.
+  - bootstrap: dicts -> compact arrays -> vectorized rollups
+  - per-write cost of keeping the rollups current
+  - reads: summary(), day/week distributions, rolling average
+  - memory: sample dicts against compact arrays
+
+    python -m benchmarks.bench_mood_analytics [samples]
+"""
+import sys
+import math
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.common import measure, report
+from mood_analytics import MoodSeries, samples_to_arrays, EMOTIONS, DAY
+
+
+def make_samples(count, seed=7):
+    rng = np.random.default_rng(seed)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp()
+    epochs = np.sort(start + rng.random(count) * 3 * 365 * DAY)
+    scores = np.clip(rng.normal(0.1, 0.5, count), -1, 1).round(4)
+    codes = np.digitize(-scores, [-0.6, -0.2, 0.2, 0.6])
+    return [{"mood": "calm", "emotion": EMOTIONS[c], "score": float(s), "timestamp": datetime.fromtimestamp(e, tz=timezone.utc)}
+            for c, s, e in zip(codes.tolist(), scores.tolist(), epochs.tolist())]
+
+
+def python_scan(samples):
+    """Daily distribution, mean, volatility and streaks the straightforward way."""
+    daily, total, total_sq, streak, best, last_day = {}, 0.0, 0.0, 0, 0, None
+    for s in samples:
+        day = s["timestamp"].date()
+        counts = daily.setdefault(day, {})
+        counts[s["emotion"]] = counts.get(s["emotion"], 0) + 1
+        total += s["score"]
+        total_sq += s["score"] ** 2
+        if day != last_day:
+            streak = streak + 1 if last_day is not None and (day - last_day).days == 1 else 1
+            best = max(best, streak)
+            last_day = day
+    mean = total / len(samples)
+    return daily, mean, math.sqrt(total_sq / len(samples) - mean ** 2), streak, best
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tracemalloc.start()
+    samples = make_samples(count)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    _, scan_ms = timed(lambda: python_scan(samples))
+    arrays, convert_ms = timed(lambda: samples_to_arrays(samples))
+    series, rollup_ms = timed(lambda: MoodSeries.from_arrays(*arrays))
+    array_bytes = series.codes.itemsize * len(series.codes) + series.epochs.itemsize * len(series.epochs) \
+        + series.scores.itemsize * len(series.scores)
+    print(f"{count} samples, {len(series.daily)} days, {len(series.weekly)} weeks")
+    print(f"python scan of sample dicts (per trend view)   {scan_ms:8.1f} ms")
+    print(f"bootstrap: dicts -> arrays                     {convert_ms:8.1f} ms")
+    print(f"bootstrap: vectorized rollups                  {rollup_ms:8.1f} ms")
+    print(f"memory: sample dicts {dict_bytes / 2 ** 20:7.1f} MiB, compact arrays {array_bytes / 2 ** 20:5.1f} MiB")
+
+    last = series.epochs[-1]
+    ticks = iter(range(10 ** 9))
+    report("add() one sample (rollups kept current)", measure(lambda: series.add(1, last + next(ticks), 0.4), iterations=20000))
+    report("summary()", measure(series.summary, iterations=20000))
+    report("distribution(day, 30)", measure(lambda: series.distribution("day", 30), iterations=2000))
+    report("distribution(week, 12)", measure(lambda: series.distribution("week", 12), iterations=2000))
+    report("rolling_average(7, last 60)", measure(lambda: series.rolling_average(7, last=60), iterations=500))
+    report("rolling_average(7) over all samples", measure(lambda: series.rolling_average(7), iterations=20, warmup=2))
+
+
+if __name__ == "__main__":
+    run()
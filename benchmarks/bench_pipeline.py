@@ -0,0 +1,55 @@
+"""
+Throughput of main.get_wellness_response with the model and translator
+replaced by zero-latency fakes, so the remaining cost is the pipeline itself
+plus storage. Runs once per storage backend.
+
+    python -m benchmarks.bench_pipeline [turns]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.common import measure, report
+from benchmarks.fakes import FakeGenerativeModel, FakeTranslator
+import backend
+import main
+from local_store import LocalStore
+from storage import MemoryBackend
+
+PROFILE = {"name": "bench", "preferences": {"language": "Hindi", "tone": "supportive"}}
+HISTORY = [
+    {"role": "user", "content": "I have been feeling stressed about exams."},
+    {"role": "ai", "content": "That sounds hard. Would a short breathing exercise help?"}
+]
+
+
+def run_turn():
+    return main.get_wellness_response(
+        "I can't sleep and I'm worried about tomorrow",
+        HISTORY,
+        previous_suggestions=["Try journaling before bed."],
+        target_lang="hi",
+        habits_summary="Walks in the evening.",
+        user_id="bench_user",
+        profile=PROFILE
+    )
+
+
+def main_():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    main.model = FakeGenerativeModel()
+    backend.GoogleTranslator = FakeTranslator
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MemoryBackend(),
+            "local sqlite": LocalStore(os.path.join(tmp, "bench.sqlite"), legacy_json=None)
+        }
+        for name, store in backends.items():
+            backend.set_storage(store)
+            report(f"get_wellness_response ({name})", measure(run_turn, iterations=turns))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,65 @@
+"""
+Bytes read from Mongo for one app.py rerun's profile/goal/habit reads:
+whole-document reads (every read through get_conversation) versus projected
+reads behind the per-rerun request cache.
+
+    python -m benchmarks.bench_profile_reads [messages]
+"""
+import os
+import sys
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.fakes import FakeDatabase
+import backend
+from storage import mongo_backend
+
+
+def seed(store, user_id, messages):
+    store.create_profile(user_id)
+    store.log_conversation(user_id, [
+        {"role": "user" if i % 2 == 0 else "ai", "content": f"message number {i} with some typical chat text",
+         "timestamp": "2025-09-24T17:12:32+00:00", "mood": "calm", "emotion": "content", "emoji": "😊", "audio_path": None}
+        for i in range(messages)
+    ])
+    for i in range(messages // 2):
+        store.update_mood_history(user_id, "calm", "content")
+    for i in range(5):
+        store.add_goal(user_id, {"goal_id": f"g{i}", "text": f"goal {i}", "progress": "Started"})
+    # Documents written before bucketing kept every message on the user document.
+    store.collection.update_one({"user_id": user_id}, {"$set": {
+        "conversation": store.get_messages(user_id)[0], "mood_history": store.get_mood_history(user_id)}})
+
+
+def old_rerun(store, user_id):
+    # app.py: 3x get_user_profile, get_goals; each was an unprojected find_one.
+    for _ in range(4):
+        store.collection.find_one({"user_id": user_id})
+
+
+def new_rerun(user_id):
+    backend.begin_request()
+    for _ in range(3):
+        backend.get_user_profile(user_id)
+    backend.get_goals(user_id)
+    backend.get_habits(user_id)
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    store = mongo_backend(FakeDatabase())
+    collection = store.collection
+    backend.set_storage(store)
+    seed(store, "bench_user", messages)
+
+    collection.bytes_returned = collection.round_trips = 0
+    old_rerun(store, "bench_user")
+    print(f"before: {collection.round_trips} reads, {collection.bytes_returned:,} bytes per rerun ({messages} messages)")
+
+    collection.bytes_returned = collection.round_trips = 0
+    new_rerun("bench_user")
+    print(f"after:  {collection.round_trips} reads, {collection.bytes_returned:,} bytes per rerun ({messages} messages)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Profile picker with many profiles (100k by default):
+  - LocalStore: the old full listing (ORDER BY last_updated IS NULL, ...)
+    against get_all_profiles() pages and prefix search, with query plans
+  - MemoryBackend: full listing against one page
+  - app.py first run and rerun through AppTest, with the picker listing one page
+
+    python -m benchmarks.bench_profiles [profiles]
+"""
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_DB_FILE", os.path.join(_tmp, "bench.sqlite"))
+
+from benchmarks.common import measure, report
+from streamlit.testing.v1 import AppTest
+import backend
+from storage import MemoryBackend
+from local_store import LocalStore
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+OLD_LISTING = "SELECT user_id FROM users ORDER BY last_updated IS NULL, last_updated DESC"
+
+
+def seed_sqlite(store, count):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    conn = store._conn()
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, profile, last_updated) VALUES (?, '{}', ?)",
+            ((f"user_{i:06d}", (start + timedelta(seconds=i * 37 % count)).isoformat()) for i in range(count))
+        )
+
+
+def seed_memory(store, count):
+    for i in range(count):
+        store.create_profile(f"user_{i:06d}")
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    store = backend.storage if isinstance(backend.storage, LocalStore) else LocalStore()
+    seed_sqlite(store, count)
+    conn = store._conn()
+
+    report(f"sqlite, old full listing ({count})", measure(lambda: conn.execute(OLD_LISTING).fetchall(), iterations=20, warmup=2))
+    report("sqlite, first page of 50", measure(lambda: store.get_all_profiles(limit=50), iterations=500))
+    report("sqlite, page 100 of 50", measure(lambda: store.get_all_profiles(limit=50, offset=5000), iterations=200))
+    report("sqlite, prefix 'user_0999' page", measure(lambda: store.get_all_profiles(limit=50, prefix="user_0999"), iterations=200))
+    for label, sql in (("old listing", OLD_LISTING),
+                       ("page", "SELECT user_id FROM users ORDER BY last_updated DESC LIMIT 50 OFFSET 0")):
+        plan = " / ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+        print(f"  plan, {label}: {plan}")
+
+    memory = MemoryBackend()
+    seed_memory(memory, count)
+    report(f"memory, full listing ({count})", measure(memory.get_all_profiles, iterations=10, warmup=1))
+    report("memory, first page of 50", measure(lambda: memory.get_all_profiles(limit=50), iterations=10, warmup=1))
+
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    print(f"app.py first run with {count} profiles: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{len(at.selectbox[0].options)} picker options")
+    report("app.py rerun", measure(at.run, iterations=10, warmup=1))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,73 @@
+"""
+Prompt size over a simulated 100-turn session: the old unbounded string
+concatenation (every session summary, every previous AI reply, reprs of mood
+samples and resources) versus PromptBuilder under PROMPT_TOKEN_BUDGET.
+A summary is logged every 10 turns, as if the summary button were pressed.
+
+    python -m benchmarks.bench_prompt
+"""
+import os
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.common import measure, report
+from prompt_builder import estimate_tokens
+import backend
+import main
+
+USER_ID = "bench_prompt"
+REPLY = ("That sounds really hard, and it makes sense that you feel drained. Try a slow breathing exercise: "
+         "in for four, hold for four, out for six. Would it help to write down what is on your mind before bed?")
+TURNS = 100
+
+
+def legacy_prompt(user_input, messages, previous_suggestions, habits_summary):
+    """The prompt as prepare_turn built it before PromptBuilder."""
+    emotion = backend.detect_emotion(user_input)
+    user_profile = backend.get_user_profile(USER_ID)
+    context = "".join(f"{'User' if m['role'] == 'user' else 'AI'}: {m['content']}\n" for m in messages[-5:])
+    mood_history = backend.get_mood_history(USER_ID, 5)
+    resources = backend.get_resources(emotion, profile=user_profile)
+    return (
+        "You are a kind and supportive mental wellness AI assistant.\n"
+        f"{main.adjust_tone(emotion, user_profile)}\n"
+        f"Session summary: {backend.get_session_summary(USER_ID)}\n"
+        f"Mood history: Your recent mood history: {mood_history}\n"
+        f"Conversation context:\n{context}\n"
+        f"User stated: {user_input}\n"
+        f"Previous AI suggestions: {previous_suggestions}\n\n"
+        f"User habits summary: {habits_summary}\n"
+        f"Daily wellness tip: {backend.get_daily_tip()}\n"
+        f"Guided exercises: {backend.get_guided_exercises(emotion, profile=user_profile)}\n"
+        f"Resources: {[dict(r) for r in resources]}\n"
+        "Respond empathetically, provide guidance, suggest follow-up exercises, "
+        "and keep responses concise and supportive."
+    )
+
+
+def run():
+    backend.create_profile(USER_ID)
+    messages, suggestions = [], []
+    legacy_total = new_total = 0
+    print(f"{'turn':>5} {'legacy tokens':>14} {'builder tokens':>15}")
+    for turn in range(1, TURNS + 1):
+        user_input = f"Work was stressful again today, day {turn}."
+        messages.append({"role": "user", "content": user_input})
+        legacy = estimate_tokens(legacy_prompt(user_input, messages, suggestions, "Sleeps late, skips breakfast."))
+        new = main.prepare_turn(user_input, messages, suggestions, "Sleeps late, skips breakfast.", USER_ID)["prompt_tokens"]
+        legacy_total += legacy
+        new_total += new
+        if turn in (1, 10, 25, 50, 100):
+            print(f"{turn:>5} {legacy:>14} {new:>15}")
+        messages.append({"role": "ai", "content": REPLY})
+        suggestions.append(REPLY)
+        if turn % 10 == 0:
+            backend.log_summary(USER_ID, f"User reported ongoing work stress through turn {turn}; breathing exercises helped a little.")
+    print(f"session total: legacy {legacy_total} tokens, builder {new_total} tokens "
+          f"({legacy_total / new_total:.1f}x fewer input tokens)")
+    report("prepare_turn at turn 100 (builder)",
+           measure(lambda: main.prepare_turn("One more turn.", messages, suggestions, "", USER_ID), iterations=200))
+
+
+if __name__ == "__main__":
+    run()
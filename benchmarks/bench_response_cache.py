@@ -0,0 +1,57 @@
+"""
+Response cache in front of the model (fake model, 500 ms per call):
+a message resubmitted with the conversation unchanged, a forced summary
+refresh repeated with no new messages, and a distress message, which
+always goes to the model.
+
+    python -m benchmarks.bench_response_cache
+"""
+import os
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.fakes import FakeGenerativeModel
+from response_cache import response_cache
+from storage import MemoryBackend
+import backend
+import main
+
+USER_ID = "bench_cache"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def run():
+    backend.set_storage(MemoryBackend())
+    backend.create_profile(USER_ID)
+    main.model = model = FakeGenerativeModel("Would you like a calming exercise?", latency=0.5)
+    messages = [{"role": "user", "content": "Feeling lonely and depressed"},
+                {"role": "ai", "content": "I'm here with you. Would you like a calming exercise?"}]
+    backend.log_conversation(USER_ID, [dict(m) for m in messages])
+    # Steady recent moods: the prompt carries the last five samples, so it only repeats if they do.
+    for _ in range(5):
+        backend.update_mood_history(USER_ID, backend.detect_emotion("yeah, sure"), backend.detect_emotion("yeah, sure"))
+    messages.append({"role": "user", "content": "yeah, sure"})
+
+    def turn(text="yeah, sure"):
+        main.get_wellness_response(text, messages, user_id=USER_ID)
+
+    print(f"turn, first submit        {timed(turn):8.1f} ms")
+    print(f"turn, resubmitted         {timed(turn):8.1f} ms")
+    print(f"summary refresh, first    {timed(lambda: main.refresh_rolling_summary(USER_ID, force=True)):8.1f} ms")
+    backend.update_rolling_summary(USER_ID, {})
+    print(f"summary refresh, repeated {timed(lambda: main.refresh_rolling_summary(USER_ID, force=True)):8.1f} ms")
+    distress = "I feel hopeless"
+    messages[-1]["content"] = distress
+    timed(lambda: turn(distress))
+    print(f"distress turn, repeated   {timed(lambda: turn(distress)):8.1f} ms (never cached)")
+    print(f"model calls {model.calls}, cache {response_cache.stats()}")
+
+
+if __name__ == "__main__":
+    run()
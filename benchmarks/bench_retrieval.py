@@ -0,0 +1,47 @@
+"""
+BM25 long-term memory at 100k stored messages (50k turns) for one user:
+time to bootstrap the index, cost of adding a turn as log_conversation does,
+and query latency with the top-k cut to what prepare_turn puts in the prompt.
+
+    python -m benchmarks.bench_retrieval
+"""
+import random
+import time
+
+from benchmarks.common import measure, report
+from retrieval_index import RetrievalIndex, group_turns
+
+MESSAGES = 100_000
+VOCAB = [f"word{i}" for i in range(5000)] + ["sleep", "work", "sister", "exam", "anxious", "wedding", "breathing"]
+
+
+def sentence(rng, words=14):
+    # Zipf-ish: a few common words, a long tail of rare ones.
+    return " ".join(VOCAB[min(int(rng.paretovariate(1.1)) - 1, len(VOCAB) - 1)] if rng.random() < 0.7
+                    else rng.choice(VOCAB) for _ in range(words))
+
+
+def run():
+    rng = random.Random(7)
+    history = []
+    for i in range(MESSAGES):
+        history.append({"role": "user" if i % 2 == 0 else "ai", "content": sentence(rng),
+                        "timestamp": f"2026-01-01T00:00:{i:06d}"})
+
+    index = RetrievalIndex(lambda user_id: history)
+    start = time.perf_counter()
+    index.search("bench", "warm up")
+    print(f"bootstrap {MESSAGES} messages ({len(group_turns(history))} turns): {time.perf_counter() - start:.2f} s")
+
+    new_turns = iter([[{"role": "user", "content": sentence(rng), "timestamp": "2026-02-01"},
+                       {"role": "ai", "content": sentence(rng), "timestamp": "2026-02-01"}] for _ in range(3000)])
+    report("add one turn (log_conversation)", measure(lambda: index.add("bench", next(new_turns)), iterations=2000))
+
+    queries = [sentence(rng, words=10) for _ in range(200)]
+    queries_iter = iter(queries * 10)
+    report("search top-3 (10-word query)", measure(lambda: index.search("bench", next(queries_iter), 3, 3), iterations=1000))
+    report("search top-3 (rare-word query)", measure(lambda: index.search("bench", "my sister wedding exam", 3, 3), iterations=1000))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,45 @@
+"""
+Sentiment cost per chat turn: the old pattern (VADER polarity_scores run
+separately by detect_mood, detect_emotion x2 in app.py, detect_emotion in
+get_wellness_response and the render_message fallback) versus one memoized
+analyze_sentiment call; plus batch scoring of stored messages.
+
+    python -m benchmarks.bench_sentiment
+"""
+from benchmarks.common import measure, report
+import backend
+
+TEXTS = [f"I feel {word} about work today, number {i}" for i, word in
+         enumerate(["anxious", "great", "tired", "hopeful", "angry", "calm", "sad", "okay"] * 250)]
+
+
+def turn_before(text):
+    backend.analyzer.polarity_scores(text)  # detect_mood(prompt)
+    backend.analyzer.polarity_scores(text)  # detect_emotion(prompt)
+    backend.analyzer.polarity_scores(text)  # get_emoji_for_mood(detect_emotion(prompt))
+    backend.analyzer.polarity_scores(text)  # detect_emotion inside get_wellness_response
+    backend.analyzer.polarity_scores(text)  # render_message fallback
+
+
+def turn_after(text):
+    backend.analyze_sentiment(text)  # app.py user message
+    backend.detect_emotion(text)     # get_wellness_response: cache hit
+
+
+def main():
+    state = {"i": 0}
+
+    def next_text():
+        state["i"] += 1
+        return TEXTS[state["i"] % len(TEXTS)] + str(state["i"])
+
+    report("turn, before (5x polarity_scores)", measure(lambda: turn_before(next_text()), iterations=2000))
+    report("turn, after (analyze_sentiment + hit)", measure(lambda: turn_after(next_text()), iterations=2000))
+    report("analyze_sentiment, cache hit", measure(lambda: backend.analyze_sentiment(TEXTS[0]), iterations=20000))
+    history = [{"role": "user", "content": t} for t in TEXTS * 5]
+    report(f"backfill_sentiment ({len(history)} messages)",
+           measure(lambda: backend.backfill_sentiment([dict(m) for m in history]), iterations=5, warmup=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Time until the user sees the first words of a reply: the old path
+(whole generate_content, translate, then a 10 ms/character typewriter)
+versus stream_wellness_response, with a fake model that takes 300 ms to the
+first token and 40 ms between chunks.
+
+    python -m benchmarks.bench_streaming
+"""
+import os
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.fakes import FakeGenerativeModel, FakeTranslator
+import backend
+import main
+
+REPLY = ("I'm sorry you're feeling this way. It makes sense to feel overwhelmed. "
+         "Try breathing in for four counts and out for six. "
+         "Would you like a short grounding exercise? I'm here with you.")
+ARGS = dict(conversation_messages=[], previous_suggestions=[], habits_summary="", user_id="bench_user",
+            profile={"name": "bench", "preferences": {"language": "English", "tone": "neutral"}})
+TYPEWRITER_DELAY = 0.01
+
+
+def old_path(target_lang):
+    start = time.perf_counter()
+    text = main.get_wellness_response("I feel overwhelmed", target_lang=target_lang, **ARGS)["text"]
+    first = time.perf_counter() - start + TYPEWRITER_DELAY
+    total = time.perf_counter() - start + TYPEWRITER_DELAY * len(text)
+    return first, total
+
+
+def streaming_path(target_lang):
+    start = time.perf_counter()
+    first = None
+    for _ in main.stream_wellness_response("I feel overwhelmed", target_lang=target_lang, **ARGS):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main_():
+    main.model = FakeGenerativeModel(REPLY, latency=0.3, chunk_latency=0.04)
+    backend.GoogleTranslator = FakeTranslator
+    for lang in ("en", "hi"):
+        for name, fn in (("generate + typewriter", old_path), ("streaming", streaming_path)):
+            first, total = fn(lang)
+            print(f"{name:<22} [{lang}] first text after {first * 1000:7.0f} ms, complete after {total * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main_()
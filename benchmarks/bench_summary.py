@@ -0,0 +1,62 @@
+"""
+Model calls and prompt tokens spent on session summaries over a 60-turn
+session where the summary button is pressed every 5 turns: the old button
+(a full get_wellness_response round trip plus log_summary) versus the
+rolling summary refreshed every SUMMARY_EVERY_TURNS turns, with the button
+reduced to a field read. The fake model takes 500 ms per call.
+
+    python -m benchmarks.bench_summary
+"""
+import os
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from benchmarks.fakes import FakeGenerativeModel
+from prompt_builder import CHARS_PER_TOKEN
+from storage import MemoryBackend
+import backend
+import main
+
+TURNS = 60
+PRESS_EVERY = 5
+REPLY = "That sounds hard. Try a slow breathing exercise and jot down what is on your mind before bed."
+
+
+def session(rolling):
+    backend.set_storage(MemoryBackend())
+    user_id = "bench_summary"
+    backend.create_profile(user_id)
+    model = main.model = FakeGenerativeModel("User is stressed about work; breathing exercises help a little.", latency=0.5)
+    messages, suggestions, press_times = [], [], []
+    for turn in range(1, TURNS + 1):
+        now = datetime.now(timezone.utc).isoformat()
+        turn_messages = [{"role": "user", "content": f"Work was stressful again, day {turn}.", "timestamp": now},
+                         {"role": "ai", "content": REPLY, "timestamp": now}]
+        messages.extend(turn_messages)
+        suggestions.append(REPLY)
+        backend.log_conversation(user_id, turn_messages)
+        if rolling:
+            main.refresh_rolling_summary(user_id)
+        if turn % PRESS_EVERY == 0:
+            start = time.perf_counter()
+            if rolling:
+                backend.get_rolling_summary(user_id)
+            else:
+                text = main.get_wellness_response("Please provide a concise session summary and mood trend.",
+                                                  messages, suggestions, user_id=user_id)["text"]
+                backend.log_summary(user_id, text)
+            press_times.append(time.perf_counter() - start)
+    return model.calls, model.prompt_chars // CHARS_PER_TOKEN, sum(press_times) / len(press_times)
+
+
+def run():
+    print(f"{TURNS} turns, summary button every {PRESS_EVERY} turns, rolling update every {main.SUMMARY_EVERY_TURNS} turns")
+    for name, rolling in (("summarize on button", False), ("rolling summary", True)):
+        calls, tokens, press = session(rolling)
+        print(f"{name:<20} model calls {calls:>3}   prompt tokens {tokens:>6}   button latency {press * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    run()
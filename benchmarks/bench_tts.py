@@ -0,0 +1,70 @@
+"""
+What speech synthesis costs the chat turn, with a stub engine taking
+300 ms + 2 ms/character: inline synthesis (the old blocking path), a
+background submit, and a repeated reply served from the content-addressed
+cache. Then time-to-first-audio and time-to-full-audio for a long reply,
+synthesized whole versus split into sentence chunks on the worker pool.
+
+    python -m benchmarks.bench_tts
+"""
+import time
+import tempfile
+
+from benchmarks.common import measure, report
+from benchmarks.fakes import FakeTTSEngine
+from tts_cache import AudioCache
+
+REPLY = "Try breathing in for four counts and out for six. I'm here with you."
+LONG_REPLY = (
+    "I'm really sorry you're carrying so much right now. It makes sense that you feel worn out. "
+    "Let's try something small together. Sit somewhere comfortable and rest your feet on the floor. "
+    "Breathe in slowly for four counts, hold for a moment, and breathe out for six. "
+    "Repeat that five times and notice how your shoulders feel afterwards. "
+    "If your thoughts wander, gently bring them back to the count. "
+    "Later today, try writing down one thing that went okay, however small. "
+    "Would you like a short grounding exercise for tonight as well? I'm here whenever you want to talk."
+)
+
+
+def first_and_full(cache, chunked, tag):
+    text = f"({tag}) {LONG_REPLY}".replace(". ", f". ({tag}) ")
+    start = time.perf_counter()
+    if chunked:
+        job = cache.submit_chunked(text, "en")
+        job.first_chunk()
+        first = time.perf_counter() - start
+        job.result()
+    else:
+        cache.synthesize(text, "en")
+        first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def run():
+    engine = FakeTTSEngine()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AudioCache(directory=directory, workers=4, engine=engine)
+        texts = iter(f"{REPLY} ({i})" for i in range(100000))
+
+        report("inline synthesis (turn blocked)", measure(lambda: cache.synthesize(next(texts), "en"), iterations=5, warmup=0))
+        futures = []
+        report("background submit (turn blocked)", measure(lambda: futures.append(cache.submit(next(texts), "en")), iterations=200, warmup=0))
+        for future in futures:
+            future.result()
+        cache.synthesize(REPLY, "en")
+        report("repeat reply, cache hit", measure(lambda: cache.synthesize(REPLY, "en"), iterations=2000))
+
+        print(f"long reply: {len(LONG_REPLY)} chars")
+        for name, chunked in (("whole", False), ("sentence chunks", True)):
+            runs = [first_and_full(cache, chunked, f"{name} {i}") for i in range(3)]
+            first = sum(r[0] for r in runs) / len(runs)
+            full = sum(r[1] for r in runs) / len(runs)
+            print(f"{name:<16} first audio after {first * 1000:7.0f} ms, full audio after {full * 1000:7.0f} ms")
+
+        cache.max_bytes = 0
+        print(f"engine calls {engine.calls}, evicted {cache.evict()} files over a 0-byte budget")
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    run()
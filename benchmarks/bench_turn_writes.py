@@ -0,0 +1,78 @@
+"""
+Storage writes for one chat turn. Before: prepare_turn's background mood
+write, then app.py's log_conversation() and update_mood_history(). After:
+one record_turn(). Reported per turn:
+  - Mongo round trips and mood samples stored (fake collections)
+  - LocalStore latency and SQLite transactions
+
+    python -m benchmarks.bench_turn_writes
+"""
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks.common import measure, report
+from benchmarks.fakes import FakeDatabase
+from storage import mongo_backend
+from local_store import LocalStore
+
+TURNS = 200
+
+
+def make_turn(i):
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {"role": "user", "content": f"turn {i}: I slept badly and feel anxious", "timestamp": now,
+         "mood": "stressed", "emotion": "anxiety", "emoji": "😰", "audio_path": None},
+        {"role": "ai", "content": "That sounds hard. Let's try a short breathing exercise.", "timestamp": now,
+         "mood": None, "emotion": "anxiety", "emoji": "😰", "audio_path": None}
+    ]
+
+
+def old_turn(store, user_id, i):
+    user_msg, ai_msg = make_turn(i)
+    store.update_mood_history(user_id, user_msg["emotion"], user_msg["emotion"])
+    store.log_conversation(user_id, [user_msg, ai_msg])
+    store.update_mood_history(user_id, user_msg["mood"], user_msg["emotion"])
+
+
+def new_turn(store, user_id, i):
+    user_msg, ai_msg = make_turn(i)
+    store.record_turn(user_id, [user_msg, ai_msg], {"mood": user_msg["mood"], "emotion": user_msg["emotion"]})
+
+
+def mongo_round_trips(write):
+    db = FakeDatabase()
+    store = mongo_backend(db)
+    for i in range(TURNS):
+        write(store, "bench", i)
+    trips = sum(c.round_trips for c in db.values())
+    return trips / TURNS, len(store.get_mood_history("bench")) / TURNS
+
+
+class CountingStore(LocalStore):
+    """Counts commits, i.e. SQLite transactions."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commits = 0
+        conn = self._conn()
+        conn.set_trace_callback(lambda sql: setattr(self, "commits", self.commits + (sql.strip().upper() == "COMMIT")))
+
+
+def run():
+    for name, write in (("before", old_turn), ("after", new_turn)):
+        trips, moods = mongo_round_trips(write)
+        print(f"mongo, {name:<6} round trips per turn {trips:5.2f}   mood samples per turn {moods:4.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, write in (("before", old_turn), ("after", new_turn)):
+            store = CountingStore(os.path.join(tmp, f"{name}.sqlite"))
+            counter = iter(range(10 ** 9))
+            stats = measure(lambda: write(store, "bench", next(counter)), iterations=TURNS, warmup=5)
+            report(f"sqlite turn, {name}", stats)
+            print(f"  transactions per turn {store.commits / (TURNS + 5):.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import time
+import atexit
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+# Benchmarks are run from the repository root: python -m benchmarks.<name>
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Every report() of this run, by name; written as JSON by save_results().
+RESULTS = {}
+
+
+def measure(fn, iterations=1000, warmup=10):
+    """Call fn() repeatedly and return latency stats in microseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "iterations": iterations,
+        "mean_us": total / iterations * 1e6,
+        "p50_us": samples[int(iterations * 0.50)] * 1e6,
+        "p95_us": samples[min(iterations - 1, int(iterations * 0.95))] * 1e6,
+        "p99_us": samples[min(iterations - 1, int(iterations * 0.99))] * 1e6,
+        "ops_per_sec": iterations / total if total else float("inf")
+    }
+
+
+def report(name, stats):
+    RESULTS[name] = stats
+    print(f"{name:<45} mean {stats['mean_us']:>10.2f} us   p50 {stats['p50_us']:>10.2f} us   "
+          f"p95 {stats['p95_us']:>10.2f} us   p99 {stats['p99_us']:>10.2f} us   {stats['ops_per_sec']:>12.0f} ops/s")
+
+
+def run_info(**config):
+    """Commit, interpreter and settings, so saved results say what they measured."""
+    try:
+        commit = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started": datetime.now(timezone.utc).isoformat(),
+        "config": config
+    }
+
+
+def save_results(path, info=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"run": info or run_info(), "results": RESULTS}, f, indent=2)
+    print(f"results written to {path}")
+
+
+def compare(baseline_path, threshold=10.0, config=None):
+    """
+    Print p50 and ops/sec against an earlier save_results() file. Returns
+    the names whose p50 got more than threshold percent slower.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nagainst {baseline_path} ({baseline.get('run', {}).get('commit')}):")
+    old_config = baseline.get("run", {}).get("config") or {}
+    changed = {key: old_config[key] for key in config or {} if key in old_config and old_config[key] != config[key]}
+    if changed:
+        print(f"⚠️ the baseline ran with different settings: {changed}")
+    print(f"{'case':<45} {'p50 before':>12} {'p50 now':>12} {'change':>8} {'ops/s now':>12}")
+    regressions = []
+    for name, stats in RESULTS.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            print(f"{name:<45} {'-':>12} {stats['p50_us']:>9.1f} us {'new':>8} {stats['ops_per_sec']:>12.0f}")
+            continue
+        change = (stats["p50_us"] - old["p50_us"]) / old["p50_us"] * 100 if old["p50_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  <- slower"
+        print(f"{name:<45} {old['p50_us']:>9.1f} us {stats['p50_us']:>9.1f} us {change:>+7.1f}% "
+              f"{stats['ops_per_sec']:>12.0f}{flag}")
+    return regressions
+
+
+# Any single benchmark can save its results too: BENCH_JSON=out.json python -m benchmarks.bench_tts
+if os.getenv("BENCH_JSON"):
+    atexit.register(lambda: RESULTS and save_results(os.environ["BENCH_JSON"]))
@@ -0,0 +1,350 @@
+"""Deterministic stand-ins for the network services the pipeline calls."""
+import re
+import copy
+import time
+import random
+from types import SimpleNamespace
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Mimics genai.GenerativeModel.generate_content with a fixed reply.
+    `latency` is the time to the first token; with stream=True the reply is
+    yielded a few words at a time, `chunk_latency` apart. A fraction
+    `error_rate` of calls raise `error` (after the latency) instead.
+    """
+
+    def __init__(self, reply="I hear you. Let's try a slow breathing exercise together.", latency=0.0, chunk_latency=0.0, words_per_chunk=4,
+                 error_rate=0.0, error=ConnectionError, seed=None):
+        self.reply = reply
+        self.error_rate = error_rate
+        self.error = error
+        self._rng = random.Random(seed)
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.words_per_chunk = words_per_chunk
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def _chunks(self):
+        words = self.reply.split(" ")
+        for i in range(0, len(words), self.words_per_chunk):
+            yield " ".join(words[i:i + self.words_per_chunk]) + (" " if i + self.words_per_chunk < len(words) else "")
+
+    def _stream(self):
+        if self.latency:
+            time.sleep(self.latency)
+        self._maybe_fail()
+        for i, chunk in enumerate(self._chunks()):
+            if i and self.chunk_latency:
+                time.sleep(self.chunk_latency)
+            yield FakeResponse(chunk)
+
+    def _maybe_fail(self):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise self.error("injected failure")
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        if stream:
+            return self._stream()
+        if self.latency:
+            time.sleep(self.latency)
+        self._maybe_fail()
+        if self.chunk_latency:
+            time.sleep(self.chunk_latency * (len(list(self._chunks())) - 1))
+        return FakeResponse(self.reply)
+
+
+class FakeTranslator:
+    """Mimics deep_translator.GoogleTranslator; prefixes text with the target code."""
+
+    latency = 0.0
+    calls = 0
+
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        FakeTranslator.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return "\n".join(f"[{self.target}] {line}" for line in text.split("\n"))
+
+    def translate_batch(self, texts):
+        return [self.translate(t) for t in texts]
+
+
+def _project(doc, projection):
+    if not projection:
+        return dict(doc)
+    include = {k: v for k, v in projection.items() if k != "_id"}
+    if include and all(v == 0 for v in include.values()):
+        out = {k: v for k, v in doc.items() if k not in include}
+    else:
+        out = {}
+        for k, v in include.items():
+            if k in doc:
+                out[k] = doc[k][v["$slice"]:] if isinstance(v, dict) and "$slice" in v else doc[k]
+    if projection.get("_id", 1) and "_id" in doc:
+        out["_id"] = doc["_id"]
+    return out
+
+
+def _compare(value, cond):
+    if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+        for op, arg in cond.items():
+            if op == "$exists" and (value is not None) != arg:
+                return False
+            if op == "$options":
+                continue
+            if op == "$regex":
+                flags = re.IGNORECASE if "i" in cond.get("$options", "") else 0
+                if not isinstance(value, str) or not re.search(arg, value, flags):
+                    return False
+                continue
+            if value is None and op != "$exists":
+                return False
+            if (op == "$lt" and not value < arg) or (op == "$lte" and not value <= arg) \
+                    or (op == "$gt" and not value > arg) or (op == "$gte" and not value >= arg):
+                return False
+        return True
+    return value == cond
+
+
+def _get_path(doc, path):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, list) and part.isdigit():
+            value = value[int(part)] if int(part) < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+def _match(doc, flt):
+    for key, cond in (flt or {}).items():
+        if key == "$or":
+            if not any(_match(doc, sub) for sub in cond):
+                return False
+        elif not _compare(_get_path(doc, key), cond):
+            return False
+    return True
+
+
+class FakeCursor(list):
+    """Projected documents; sorting looks at the full documents, as the server does."""
+
+    def __init__(self, pairs):
+        pairs = list(pairs)
+        super().__init__(projected for _, projected in pairs)
+        self._docs = [doc for doc, _ in pairs]
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        order = list(range(len(self)))
+        for field, sign in reversed(keys):
+            order.sort(key=lambda i: (self._docs[i].get(field) is not None, self._docs[i].get(field)), reverse=sign < 0)
+        self[:] = [self[i] for i in order]
+        self._docs = [self._docs[i] for i in order]
+        return self
+
+    def skip(self, n):
+        del self[:n]
+        del self._docs[:n]
+        return self
+
+    def limit(self, n):
+        if n:
+            del self[n:]
+            del self._docs[n:]
+        return self
+
+
+class FakeCollection:
+    """
+    Just enough of a pymongo Collection for MongoBackend: equality,
+    comparison and $regex filters, projections, $set/$setOnInsert/$push/
+    $inc/$min/$max/$unset updates, upserts and find_one_and_update. Indexes are recorded and only unique ones are checked, on insert. Counts round trips and the BSON bytes it returns
+    so benchmarks can report what would cross the network; each round trip sleeps `latency` seconds.
+    """
+
+    def __init__(self, latency=0.0):
+        self.docs = []
+        self.indexes = {}
+        self.bytes_returned = 0
+        self.round_trips = 0
+        self.latency = latency
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _new_id(self):
+        from bson import ObjectId
+        return ObjectId()
+
+    def _account(self, doc):
+        import bson
+        self.bytes_returned += len(bson.encode(doc))
+        return doc
+
+    def create_index(self, keys, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = kwargs.pop("name", None) or "_".join(f"{field}_{order}" for field, order in keys)
+        self.indexes[name] = dict(kwargs, key=keys)
+        return name
+
+    def index_information(self):
+        return dict(self.indexes)
+
+    def drop_index(self, name):
+        from pymongo.errors import OperationFailure
+        if self.indexes.pop(name, None) is None:
+            raise OperationFailure(f"index not found with name [{name}]", code=27)
+
+    def find_one(self, flt=None, projection=None):
+        self._round_trip()
+        for doc in self.docs:
+            if _match(doc, flt):
+                return self._account(_project(doc, projection))
+        return None
+
+    def find(self, flt=None, projection=None):
+        self._round_trip()
+        return FakeCursor((d, self._account(_project(d, projection))) for d in self.docs if _match(d, flt))
+
+    def _check_unique(self, doc):
+        from pymongo.errors import DuplicateKeyError
+        for name, index in self.indexes.items():
+            fields = [field for field, _ in index["key"]]
+            if index.get("unique") and any(all(d.get(f) == doc.get(f) for f in fields) for d in self.docs):
+                raise DuplicateKeyError(f"E11000 duplicate key error index: {name}", code=11000)
+
+    def insert_one(self, doc):
+        self._round_trip()
+        self._check_unique(doc)
+        self.docs.append(dict(doc, _id=self._new_id()))
+
+    def update_one(self, flt, update, upsert=False):
+        self._round_trip()
+        doc = next((d for d in self.docs if _match(d, flt)), None)
+        result = SimpleNamespace(matched_count=int(doc is not None), upserted_id=None)
+        if doc is None:
+            if not upsert:
+                return result
+            doc = {k: v for k, v in flt.items() if "." not in k and not k.startswith("$") and not isinstance(v, dict)}
+            doc["_id"] = self._new_id()
+            doc.update(update.get("$setOnInsert", {}))
+            self._check_unique(doc)
+            self.docs.append(doc)
+            result.upserted_id = doc["_id"]
+        self._apply(doc, update)
+        return result
+
+    def delete_many(self, flt):
+        self._round_trip()
+        kept = [d for d in self.docs if not _match(d, flt)]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return SimpleNamespace(deleted_count=deleted)
+
+    def update_many(self, flt, update):
+        self._round_trip()
+        docs = [d for d in self.docs if _match(d, flt)]
+        for doc in docs:
+            self._apply(doc, update)
+        return SimpleNamespace(matched_count=len(docs))
+
+    def find_one_and_update(self, flt, update, projection=None, sort=None):
+        """Updates the first match in `sort` order and returns it as it was before (no upsert)."""
+        self._round_trip()
+        cursor = FakeCursor((d, d) for d in self.docs if _match(d, flt))
+        if sort:
+            cursor.sort(sort)
+        if not cursor:
+            return None
+        doc = cursor[0]
+        before = _project(doc, projection) if projection else copy.deepcopy(doc)
+        self._account(before)
+        self._apply(doc, update)
+        return before
+
+    @staticmethod
+    def _apply(doc, update):
+        for key, value in update.get("$set", {}).items():
+            doc[key] = value
+        for key in update.get("$unset", {}):
+            doc.pop(key, None)
+        for key, value in update.get("$inc", {}).items():
+            *path, field = key.split(".")
+            target = doc
+            for part in path:
+                target = target.setdefault(part, {})
+            target[field] = target.get(field, 0) + value
+        for key, value in update.get("$min", {}).items():
+            doc[key] = value if doc.get(key) is None else min(doc[key], value)
+        for key, value in update.get("$max", {}).items():
+            doc[key] = value if doc.get(key) is None else max(doc[key], value)
+        for key, value in update.get("$push", {}).items():
+            items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+            doc.setdefault(key, []).extend(items)
+
+
+class FakeDatabase(dict):
+    """db["name"] returns the same FakeCollection every time; set_latency() applies to all of them."""
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+
+    def __missing__(self, name):
+        collection = self[name] = FakeCollection(self.latency)
+        return collection
+
+    def set_latency(self, latency):
+        self.latency = latency
+        for collection in self.values():
+            collection.latency = latency
+
+
+class SlowBackend:
+    """Wraps a storage backend so every call sleeps for latency seconds first (a remote round-trip)."""
+
+    def __init__(self, inner, latency=0.03):
+        self.inner = inner
+        self.latency = latency
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self.latency)
+            return attr(*args, **kwargs)
+        return call
+
+
+class FakeTTSEngine:
+    """Stands in for gTTS: sleeps latency + per_char * len(text), then writes a small dummy MP3."""
+
+    def __init__(self, latency=0.3, per_char=0.002):
+        self.latency = latency
+        self.per_char = per_char
+        self.calls = 0
+
+    def __call__(self, text, lang, path):
+        self.calls += 1
+        time.sleep(self.latency + self.per_char * len(text))
+        with open(path, "wb") as f:
+            f.write(b"ID3" + text.encode("utf-8")[:64])
@@ -0,0 +1,230 @@
+"""
+The core suite behind `python -m benchmarks`: translation, sentiment, every
+backend.py read and write, the prompt build, get_wellness_response end to
+end and app.py through AppTest. It runs against the fakes in
+benchmarks.fakes. setup() wires them in; each group function then reports
+its cases through common.report().
+"""
+import os
+import itertools
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import ROOT, measure, report
+from benchmarks.fakes import FakeDatabase, FakeGenerativeModel, FakeTranslator, FakeTTSEngine, SlowBackend
+import backend
+import main
+from tts_cache import audio_cache
+from storage import MemoryBackend, mongo_backend
+from local_store import LocalStore
+
+GROUPS = ("translation", "sentiment", "backend", "prompt", "pipeline", "app")
+
+APP_FILE = os.path.join(ROOT, "app.py")
+USER_ID = "suite_user"
+WRITER_ID = "suite_writer"
+TURNS = 100
+GOALS = 5
+OTHER_PROFILES = 200
+PROFILE = {"name": USER_ID, "age": 29, "preferences": {"language": "Hindi", "tone": "supportive"},
+           "habits_summary": "Walks in the evening, sleeps late."}
+LABELS = {f"label_{i}": f"Wellness label number {i}" for i in range(40)}
+USER_LINES = ["I have been feeling stressed about exams.", "I slept better last night.",
+              "Work is overwhelming and I can't focus.", "Today was calm, I went for a walk."]
+AI_LINES = ["That sounds hard. Would a short breathing exercise help?",
+            "That's great to hear. What helped you rest?",
+            "Let's break the work into one small next step.",
+            "Walks are a lovely habit. How did you feel afterwards?"]
+
+_fakes = {}
+
+
+def _iterations(options, count):
+    return max(1, int(count * options.scale))
+
+
+def _turn(i, start=None):
+    ts = (start or datetime.now(timezone.utc)) + timedelta(hours=i)
+    user_msg = {"role": "user", "content": USER_LINES[i % len(USER_LINES)], "timestamp": ts.isoformat(),
+                "mood": "stressed", "emotion": "anxiety" if i % 3 else "content", "emoji": None, "audio_path": None}
+    ai_msg = {"role": "ai", "content": AI_LINES[i % len(AI_LINES)], "timestamp": ts.isoformat(),
+              "mood": None, "emotion": user_msg["emotion"], "emoji": None, "audio_path": None}
+    sample = {"mood": user_msg["mood"], "emotion": user_msg["emotion"], "score": -0.4 if i % 3 else 0.4,
+              "timestamp": ts}
+    return user_msg, ai_msg, sample
+
+
+def seed():
+    backend.create_profile(USER_ID)
+    backend.update_user_profile(USER_ID, PROFILE)
+    backend.update_habits(USER_ID, PROFILE["habits_summary"])
+    for i in range(GOALS):
+        backend.add_goal(USER_ID, f"Goal {i}: sleep before midnight")
+    start = datetime.now(timezone.utc) - timedelta(hours=TURNS)
+    for i in range(TURNS):
+        backend.record_turn(USER_ID, *_turn(i, start))
+    backend.update_rolling_summary(USER_ID, {"text": "Stressed about exams; walks help.", "through": start.isoformat(),
+                                             "turns": TURNS, "updated": start.isoformat()})
+    backend.log_summary(USER_ID, "Stressed about exams; walks help.")
+    backend.create_profile(WRITER_ID)
+    backend.add_goal(WRITER_ID, "Writer goal: stretch every morning")
+    for i in range(OTHER_PROFILES):
+        backend.create_profile(f"profile_{i:04d}")
+
+
+def setup(options, scratch):
+    """Swap in the fakes, seed storage, then apply the configured storage latency."""
+    main.model = _fakes["model"] = FakeGenerativeModel(latency=options.model_latency, chunk_latency=options.chunk_latency)
+    FakeTranslator.latency = options.translate_latency
+    backend.GoogleTranslator = FakeTranslator
+    audio_cache.engine = FakeTTSEngine(latency=options.tts_latency, per_char=0.0)
+
+    if options.storage == "mongo":
+        db = FakeDatabase()
+        store = mongo_backend(db)
+    elif options.storage == "local":
+        store = LocalStore(os.path.join(scratch, "suite.sqlite"), legacy_json=None)
+    else:
+        store = MemoryBackend()
+    backend.set_storage(store)
+    seed()
+    if options.storage_latency:
+        if options.storage == "mongo":
+            db.set_latency(options.storage_latency)  # per round trip
+        else:
+            backend.set_storage(SlowBackend(store, options.storage_latency))  # per storage call
+
+
+def translation(options):
+    texts = (f"How are you feeling today, friend number {i}?" for i in itertools.count())
+    backend.translate_text("How are you feeling today?", "hi")
+    report("translate_text cached", measure(lambda: backend.translate_text("How are you feeling today?", "hi"),
+                                            iterations=_iterations(options, 5000)))
+    report("translate_text uncached", measure(lambda: backend.translate_text(next(texts), "hi"),
+                                              iterations=_iterations(options, 500)))
+    report("translate_text english (no-op)", measure(lambda: backend.translate_text("Hello", "en"),
+                                                     iterations=_iterations(options, 5000)))
+    backend.translate_ui_labels(LABELS, "Hindi")
+    report("translate_ui_labels 40 cached", measure(lambda: backend.translate_ui_labels(LABELS, "Hindi"),
+                                                    iterations=_iterations(options, 2000)))
+    batches = ({f"k{j}": f"{j} fresh label {i}" for j in range(40)} for i in itertools.count())
+    report("translate_ui_labels 40 uncached", measure(lambda: backend.translate_ui_labels(next(batches), "German"),
+                                                      iterations=_iterations(options, 200)))
+
+
+def sentiment(options):
+    texts = (f"I feel a bit anxious about meeting number {i} tomorrow" for i in itertools.count())
+    report("analyze_sentiment cached", measure(lambda: backend.analyze_sentiment(USER_LINES[0]),
+                                               iterations=_iterations(options, 20000)))
+    report("analyze_sentiment uncached", measure(lambda: backend.analyze_sentiment(next(texts)),
+                                                 iterations=_iterations(options, 2000)))
+    report("analyze_sentiment_batch 30 uncached",
+           measure(lambda: backend.analyze_sentiment_batch([next(texts) for _ in range(30)]),
+                   iterations=_iterations(options, 200)))
+    messages = [{"role": "user", "content": line} for line in USER_LINES * 8]
+    report("backfill_sentiment 32 messages", measure(lambda: backend.backfill_sentiment([dict(m) for m in messages]),
+                                                     iterations=_iterations(options, 2000)))
+
+
+def backend_calls(options):
+    profile = backend.get_user_profile(USER_ID)
+    _, cursor = backend.get_messages(USER_ID, 30)
+    goal_id = backend.get_goals(WRITER_ID)[0]["goal_id"]
+    reads = [
+        ("get_user_profile", lambda: backend.get_user_profile(USER_ID)),
+        ("get_goals", lambda: backend.get_goals(USER_ID)),
+        ("get_habits", lambda: backend.get_habits(USER_ID)),
+        ("get_rolling_summary", lambda: backend.get_rolling_summary(USER_ID)),
+        ("get_session_summary", lambda: backend.get_session_summary(USER_ID)),
+        ("get_conversation", lambda: backend.get_conversation(USER_ID)),
+        ("get_messages latest 30", lambda: backend.get_messages(USER_ID, 30)),
+        ("get_messages older page", lambda: backend.get_messages(USER_ID, 30, cursor)),
+        ("get_mood_history 5", lambda: backend.get_mood_history(USER_ID, 5)),
+        ("get_mood_history all", lambda: backend.get_mood_history(USER_ID)),
+        ("get_mood_summary", lambda: backend.get_mood_summary(USER_ID)),
+        ("get_mood_trends day", lambda: backend.get_mood_trends(USER_ID, "day")),
+        ("get_mood_trends week", lambda: backend.get_mood_trends(USER_ID, "week")),
+        ("search_memory", lambda: backend.search_memory(USER_ID, "stressed about exams")),
+        ("get_all_profiles page of 50", lambda: backend.get_all_profiles(limit=50)),
+        ("get_all_profiles prefix", lambda: backend.get_all_profiles(limit=50, prefix="profile_01")),
+        ("get_daily_tip", lambda: backend.get_daily_tip(profile)),
+        ("get_guided_exercises", lambda: backend.get_guided_exercises("anxiety", profile)),
+        ("get_resources", lambda: backend.get_resources("anxiety", profile)),
+    ]
+    for name, fn in reads:
+        report(f"read {name}", measure(fn, iterations=_iterations(options, 500)))
+    with backend.request_scope():
+        backend.get_user_profile(USER_ID)
+        report("read get_user_profile (request cache)", measure(lambda: backend.get_user_profile(USER_ID),
+                                                                iterations=_iterations(options, 5000)))
+
+    # Writes go to their own user so the reads above keep measuring the same data.
+    counter = itertools.count()
+    writes = [
+        ("record_turn", lambda: backend.record_turn(WRITER_ID, *_turn(next(counter)))),
+        ("log_conversation", lambda: backend.log_conversation(WRITER_ID, list(_turn(next(counter))[:2]))),
+        ("update_mood_history", lambda: backend.update_mood_history(WRITER_ID, "calm", "content")),
+        ("update_user_profile", lambda: backend.update_user_profile(WRITER_ID, dict(PROFILE, age=next(counter) % 90))),
+        ("update_habits", lambda: backend.update_habits(WRITER_ID, f"Walked {next(counter)} minutes")),
+        ("update_rolling_summary", lambda: backend.update_rolling_summary(WRITER_ID, {"text": f"summary {next(counter)}"})),
+        ("log_summary", lambda: backend.log_summary(WRITER_ID, f"summary {next(counter)}")),
+        ("add_goal", lambda: backend.add_goal(WRITER_ID, f"goal {next(counter)}")),
+        ("update_goal_progress", lambda: backend.update_goal_progress(WRITER_ID, goal_id, "In Progress")),
+        ("create_profile", lambda: backend.create_profile(f"new_profile_{next(counter)}")),
+    ]
+    for name, fn in writes:
+        report(f"write {name}", measure(fn, iterations=_iterations(options, 200)))
+
+
+def prompt(options):
+    messages, _ = backend.get_messages(USER_ID, 30)
+    suggestions = [m["content"] for m in messages if m["role"] == "ai"]
+    profile = backend.get_user_profile(USER_ID)
+    inputs = (f"I can't sleep before exam number {i}" for i in itertools.count())
+    turn = main.prepare_turn(next(inputs), messages, suggestions, profile["habits_summary"], USER_ID, profile)
+    print(f"  prompt: {turn['prompt_tokens']} tokens, {len(turn['prompt'])} characters")
+    report("prepare_turn (prompt build)", measure(
+        lambda: main.prepare_turn(next(inputs), messages, suggestions, profile["habits_summary"], USER_ID, profile),
+        iterations=_iterations(options, 500)))
+
+
+def pipeline(options):
+    messages, _ = backend.get_messages(USER_ID, 30)
+    suggestions = [m["content"] for m in messages if m["role"] == "ai"]
+    profile = backend.get_user_profile(USER_ID)
+    inputs = (f"Work is piling up, day {i}, and I feel tense" for i in itertools.count())
+
+    def respond(text, lang="hi"):
+        return main.get_wellness_response(text, messages, suggestions, lang, profile["habits_summary"], USER_ID, profile)
+
+    iterations = _iterations(options, 200)
+    report("get_wellness_response (hi)", measure(lambda: respond(next(inputs)), iterations=iterations))
+    report("get_wellness_response (en)", measure(lambda: respond(next(inputs), "en"), iterations=iterations))
+    respond("The same question again")
+    report("get_wellness_response (cached reply)", measure(lambda: respond("The same question again"),
+                                                           iterations=iterations))
+    report("stream_wellness_response (hi, drained)", measure(
+        lambda: list(main.stream_wellness_response(next(inputs), messages, suggestions, "hi",
+                                                   profile["habits_summary"], USER_ID, profile)),
+        iterations=iterations))
+
+
+def app(options):
+    from streamlit.testing.v1 import AppTest
+
+    def first_run():
+        at = AppTest.from_file(APP_FILE, default_timeout=120)
+        at.session_state["user_id"] = USER_ID
+        return at.run()
+
+    report("app.py first run", measure(first_run, iterations=_iterations(options, 10), warmup=1))
+    at = first_run()
+    report("app.py rerun", measure(at.run, iterations=_iterations(options, 20), warmup=1))
+    turns = itertools.count()
+    report("app.py chat turn", measure(lambda: at.chat_input[0].set_value(f"Turn {next(turns)}: I feel tense").run(),
+                                       iterations=_iterations(options, 10), warmup=1))
+    if at.exception:
+        print(f"  ⚠️ app.py raised: {at.exception[0].message}")
+
+
+RUNNERS = {"translation": translation, "sentiment": sentiment, "backend": backend_calls, "prompt": prompt,
+           "pipeline": pipeline, "app": app}
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import threading
+from types import MappingProxyType
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOGUE_DIR = os.getenv("CATALOGUE_DIR", os.path.join(BASE_DIR, "data"))
+TIPS_FILE = os.path.join(CATALOGUE_DIR, "daily_tips.json")
+RESOURCES_FILE = os.path.join(CATALOGUE_DIR, "resources.json")
+CATALOGUE_CHECK_INTERVAL = float(os.getenv("CATALOGUE_CHECK_INTERVAL", "2"))
+
+EMPTY = ()
+
+
+class Catalogue:
+    """
+    Daily tips and resources parsed once and indexed in memory.
+    Tips are indexed by tone, exercises and links by emotion. Every view is
+    read-only (tuples and mappingproxy), so callers can hand them out freely.
+    The files are re-read only when their mtimes change, and mtimes are
+    checked at most once every CATALOGUE_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self, tips_file=TIPS_FILE, resources_file=RESOURCES_FILE, check_interval=CATALOGUE_CHECK_INTERVAL):
+        self.tips_file = tips_file
+        self.resources_file = resources_file
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._next_check = 0.0
+        self.reloads = 0
+        self._tips = EMPTY
+        self._tips_by_tone = MappingProxyType({})
+        self._exercises = MappingProxyType({})
+        self._links = MappingProxyType({})
+
+    def _current_mtimes(self):
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (self.tips_file, self.resources_file))
+
+    def _load(self):
+        tips, resources = [], {}
+        try:
+            with open(self.tips_file, "r", encoding="utf-8") as f:
+                tips = [t for t in json.load(f) if t.get("tip")]
+        except (OSError, ValueError) as e:
+            print(f"Error loading daily tips: {e}")
+        try:
+            with open(self.resources_file, "r", encoding="utf-8") as f:
+                resources = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading resources: {e}")
+
+        by_tone = {}
+        for t in tips:
+            by_tone.setdefault(t.get("tone"), []).append(t["tip"])
+        self._tips = tuple(t["tip"] for t in tips)
+        self._tips_by_tone = MappingProxyType({tone: tuple(v) for tone, v in by_tone.items()})
+        self._exercises = MappingProxyType({
+            emotion: tuple(entry.get("exercises", [])) for emotion, entry in resources.items()
+        })
+        self._links = MappingProxyType({
+            emotion: tuple(MappingProxyType(dict(link)) for link in entry.get("links", []))
+            for emotion, entry in resources.items()
+        })
+        self.reloads += 1
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        with self._lock:
+            self._next_check = now + self.check_interval
+            mtimes = self._current_mtimes()
+            if force or mtimes != self._mtimes:
+                self._load()
+                self._mtimes = mtimes
+
+    def version(self):
+        """The (tips, resources) mtimes the in-memory copy was loaded from."""
+        self.refresh()
+        return self._mtimes
+
+    def tips(self, tone=None):
+        self.refresh()
+        if tone and tone in self._tips_by_tone:
+            return self._tips_by_tone[tone]
+        return self._tips
+
+    def exercises(self, emotion):
+        self.refresh()
+        return self._exercises.get(emotion, EMPTY)
+
+    def links(self, emotion):
+        self.refresh()
+        return self._links.get(emotion, EMPTY)
+
+    def all_strings(self):
+        """Every translatable string in the catalogue, de-duplicated in a stable order."""
+        self.refresh()
+        strings = list(self._tips)
+        for emotion, exercises in self._exercises.items():
+            strings.extend(exercises)
+            strings.extend(link["title"] for link in self._links.get(emotion, EMPTY) if link.get("title"))
+        return list(dict.fromkeys(strings))
+
+
+catalogue = Catalogue()
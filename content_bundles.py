@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+
+from catalogue import catalogue, CATALOGUE_DIR, TIPS_FILE, RESOURCES_FILE
+
+BUNDLE_DIR = os.getenv("CONTENT_BUNDLE_DIR", os.path.join(CATALOGUE_DIR, "bundles"))
+# Seconds before a failed background build is retried; doubles with each failure, up to BUNDLE_RETRY_MAX.
+BUNDLE_RETRY_SECONDS = float(os.getenv("BUNDLE_RETRY_SECONDS", "60"))
+BUNDLE_RETRY_MAX = float(os.getenv("BUNDLE_RETRY_MAX", "3600"))
+
+# Catalogue strings that live in code rather than in the JSON files.
+DEFAULT_TIP = "Remember to take a deep breath and smile 🙂."
+ENCOURAGING_EXERCISE = "Try a 5-minute power breathing exercise for positivity!"
+SUPPORTIVE_LINK = {"title": "Supportive Mental Health Article", "url": "https://example.com/support"}
+
+_bundles = {}
+_source_hash = {"stamp": None, "value": None}
+_building = set()
+# lang_code -> (consecutive failed builds, monotonic time of the next attempt)
+_failures = {}
+_lock = threading.Lock()
+
+
+class IncompleteBundle(Exception):
+    """Some catalogue strings could not be translated, so the bundle was not written."""
+
+
+def source_hash():
+    """sha256 over both catalogue files; recomputed only when their mtimes change."""
+    stamp = catalogue.version()
+    if _source_hash["stamp"] != stamp:
+        digest = hashlib.sha256()
+        for path in (TIPS_FILE, RESOURCES_FILE):
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        _source_hash["stamp"] = stamp
+        _source_hash["value"] = digest.hexdigest()
+    return _source_hash["value"]
+
+
+def collect_strings():
+    """Every translatable catalogue string, in a stable order."""
+    strings = [DEFAULT_TIP, ENCOURAGING_EXERCISE, SUPPORTIVE_LINK["title"]] + catalogue.all_strings()
+    return list(dict.fromkeys(strings))
+
+
+def bundle_path(lang_code):
+    return os.path.join(BUNDLE_DIR, f"{lang_code}.json")
+
+
+def build_bundle(lang_code, translate_fn):
+    """
+    Translate the whole catalogue into lang_code and write it to BUNDLE_DIR.
+    translate_fn(texts, lang_code, fallback=False) must return {source:
+    translated}, leaving out strings it could not translate; if any are
+    missing, IncompleteBundle is raised and nothing is written.
+    """
+    strings = collect_strings()
+    translated = translate_fn(strings, lang_code, fallback=False)
+    missing = [s for s in strings if not translated.get(s)]
+    if missing:
+        raise IncompleteBundle(f"{len(missing)} of {len(strings)} strings untranslated")
+    bundle = {
+        "lang": lang_code,
+        "source_hash": source_hash(),
+        "strings": {s: translated[s] for s in strings}
+    }
+    os.makedirs(BUNDLE_DIR, exist_ok=True)
+    tmp_path = f"{bundle_path(lang_code)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False)
+    os.replace(tmp_path, bundle_path(lang_code))
+    return bundle
+
+
+def _read_bundle(lang_code):
+    try:
+        with open(bundle_path(lang_code), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _rebuild(lang_code, translate_fn, current):
+    """Background build for get_bundle(); a failure is retried after an exponential backoff."""
+    try:
+        bundle = _read_bundle(lang_code)
+        if not bundle or bundle.get("source_hash") != current:
+            bundle = build_bundle(lang_code, translate_fn)
+    except Exception as e:
+        with _lock:
+            failures = _failures.get(lang_code, (0, 0.0))[0] + 1
+            delay = min(BUNDLE_RETRY_MAX, BUNDLE_RETRY_SECONDS * 2 ** (failures - 1))
+            _failures[lang_code] = (failures, time.monotonic() + delay)
+        print(f"⚠️ Content bundle for '{lang_code}' not built, retrying in {delay:.0f}s: {e}")
+    else:
+        with _lock:
+            _bundles[lang_code] = bundle
+            _failures.pop(lang_code, None)
+    finally:
+        with _lock:
+            _building.discard(lang_code)
+
+
+def get_bundle(lang_code, translate_fn):
+    """
+    Return the {English: translated} catalogue map for lang_code. Never
+    translates on the caller's thread: a missing or stale bundle is served
+    as it is (or empty, so callers show English) while one background build
+    runs. Build bundles ahead of time with build_all().
+    """
+    current = source_hash()
+    bundle = _bundles.get(lang_code)
+    if bundle and bundle["source_hash"] == current:
+        return bundle["strings"]
+    with _lock:
+        bundle = _bundles.get(lang_code)
+        if bundle is None:
+            bundle = _read_bundle(lang_code) or {}
+            bundle = _bundles[lang_code] = {"source_hash": bundle.get("source_hash"), "strings": bundle.get("strings") or {}}
+        if bundle["source_hash"] == current or lang_code in _building:
+            return bundle["strings"]
+        if time.monotonic() < _failures.get(lang_code, (0, 0.0))[1]:
+            return bundle["strings"]
+        _building.add(lang_code)
+    print(f"Content bundle for '{lang_code}' missing or stale, building it in the background.")
+    threading.Thread(target=_rebuild, args=(lang_code, translate_fn, current), name=f"bundle-{lang_code}", daemon=True).start()
+    return bundle["strings"]
+
+
+def build_all(translate_fn, lang_codes, force=False):
+    """Build every missing or stale bundle; returns the codes that could not be built."""
+    current = source_hash()
+    failed = []
+    for code in lang_codes:
+        existing = None if force else _read_bundle(code)
+        if existing and existing.get("source_hash") == current:
+            print(f"{code}: up to date")
+            continue
+        try:
+            bundle = build_bundle(code, translate_fn)
+        except Exception as e:
+            print(f"⚠️ {code}: not built: {e}")
+            failed.append(code)
+            continue
+        print(f"{code}: built {len(bundle['strings'])} strings")
+    return failed
+
+
+if __name__ == "__main__":
+    from backend import LANGUAGE_CODE_MAP, translate_batch
+
+    args = sys.argv[1:]
+    force = "--force" in args
+    codes = [a for a in args if not a.startswith("--")] or sorted(set(LANGUAGE_CODE_MAP.values()) - {"en"})
+    sys.exit(1 if build_all(translate_batch, codes, force=force) else 0)
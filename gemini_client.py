@@ -0,0 +1,261 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+GEMINI_RATE_PER_SEC = float(os.getenv("GEMINI_RATE_PER_SEC", "5"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5"))
+GEMINI_BREAKER_COOLDOWN = float(os.getenv("GEMINI_BREAKER_COOLDOWN", "30"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+OFFLINE_REPLY = (
+    "I'm having trouble reaching my language model right now, but I'm still here with you. "
+    "While we wait, try a slow breath: in for four counts, hold for four, out for six. "
+    "If you are in crisis, please contact a local helpline or someone you trust right away."
+)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class AdmissionTimeout(DeadlineExceeded):
+    """The deadline passed in our own rate limit or slot queue; the model was never called."""
+
+
+def _retryable_errors():
+    errors = (TimeoutError, ConnectionError, DeadlineExceeded)
+    try:
+        from google.api_core import exceptions as api
+        errors += (api.TooManyRequests, api.ResourceExhausted, api.ServiceUnavailable,
+                   api.InternalServerError, api.DeadlineExceeded, api.GatewayTimeout)
+    except ImportError:
+        pass
+    return errors
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts up to `capacity`; shared by every session in the process."""
+
+    def __init__(self, rate=GEMINI_RATE_PER_SEC, capacity=GEMINI_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline):
+        """Take one token, waiting until the monotonic `deadline` at most. Returns False if it ran out of time."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `cooldown` seconds; then lets a single probe through (half-open) and
+    closes again if it succeeds. A probe that ends without an answer about
+    the provider's health is released, so the next caller probes instead.
+    """
+
+    def __init__(self, threshold=GEMINI_BREAKER_THRESHOLD, cooldown=GEMINI_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def release(self):
+        """Give back a half-open probe that didn't tell us whether the provider recovered."""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class ModelOffline(Exception):
+    """The model couldn't be reached and the caller asked for no OfflineResponse stand-in."""
+
+
+class OfflineResponse:
+    """Stands in for a Gemini response when the model can't be reached; `offline` tells callers not to cache it."""
+    offline = True
+
+    def __init__(self, text=OFFLINE_REPLY):
+        self.text = text
+
+
+class LazyGenerativeModel:
+    """
+    genai.GenerativeModel built on the first call. Importing
+    google.generativeai takes about a second, so it is imported and
+    configured here rather than when main.py is loaded.
+    """
+
+    def __init__(self, model_name, api_key=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+                self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def generate_content(self, *args, **kwargs):
+        return self._get().generate_content(*args, **kwargs)
+
+
+class ResilientModel:
+    """
+    Wraps a genai.GenerativeModel (or anything with the same
+    generate_content) with a shared token-bucket rate limit, bounded
+    concurrency, a deadline covering every attempt, jittered exponential
+    retries on transient errors, and a circuit breaker. When the breaker is
+    open or retries run out it returns OfflineResponse instead of raising;
+    non-transient errors (bad request, auth) are raised as before.
+    """
+
+    def __init__(self, model, rate_limiter=None, breaker=None, max_concurrency=GEMINI_MAX_CONCURRENCY,
+                 timeout=GEMINI_TIMEOUT, max_retries=GEMINI_MAX_RETRIES):
+        self.model = model
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # Calls run here so a hung request can't outlive its deadline in the caller; the
+        # slot stays taken until the call really returns, which keeps the concurrency bound honest.
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="gemini")
+        self._retryable = None
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "timeouts": 0, "rate_limited": 0, "offline": 0}
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt, deadline):
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _call(self, fn, deadline):
+        """Run fn() in a slot, giving up at the deadline. The slot is released when fn returns."""
+        if not self.rate_limiter.acquire(deadline):
+            self._count("rate_limited")
+            raise AdmissionTimeout("rate limit wait exceeded the deadline")
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise AdmissionTimeout("no free model slot before the deadline")
+
+        def run():
+            try:
+                return fn()
+            finally:
+                self._slots.release()
+        future = self._pool.submit(run)
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            self._count("timeouts")
+            raise DeadlineExceeded("no response before the deadline")
+
+    def _with_retries(self, fn, timeout):
+        deadline = time.monotonic() + (timeout or self.timeout)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("offline")
+                return None
+            self._count("calls")
+            try:
+                result = self._call(lambda: fn(max(0.1, deadline - time.monotonic())), deadline)
+            except AdmissionTimeout:
+                # Local queueing says nothing about the provider, so it never counts toward the breaker.
+                self.breaker.release()
+                self._count("offline")
+                return None
+            except Exception as e:
+                if self._retryable is None:
+                    self._retryable = _retryable_errors()
+                if not isinstance(e, self._retryable):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                print(f"Gemini call failed (attempt {attempt + 1}): {e}")
+                if attempt >= self.max_retries or not self._backoff(attempt, deadline):
+                    self._count("offline")
+                    return None
+                attempt += 1
+                self._count("retries")
+                continue
+            self.breaker.record_success()
+            return result
+
+    def generate_content(self, prompt, stream=False, timeout=None, **kwargs):
+        if stream:
+            return self._stream(prompt, timeout, **kwargs)
+
+        def call(remaining):
+            return self.model.generate_content(prompt, request_options={"timeout": remaining}, **kwargs)
+        response = self._with_retries(call, timeout)
+        return OfflineResponse() if response is None else response
+
+    def _stream(self, prompt, timeout, **kwargs):
+        # Retries (and the concurrency slot) only cover the wait for the first chunk; after
+        # that the reply is already on screen, so a mid-stream failure is raised to the caller.
+        def first_chunk(remaining):
+            chunks = iter(self.model.generate_content(prompt, stream=True, request_options={"timeout": remaining}, **kwargs))
+            return next(chunks, None), chunks
+
+        started = self._with_retries(first_chunk, timeout)
+        if started is None:
+            yield OfflineResponse()
+            return
+        first, chunks = started
+        if first is not None:
+            yield first
+        yield from chunks
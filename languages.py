@@ -0,0 +1,29 @@
+"""Language names and ISO codes the translation calls accept."""
+
+LANGUAGE_CODE_MAP = {
+    "english": "en",
+    "german": "de",
+    "french": "fr",
+    "spanish": "es",
+    "hindi": "hi",
+    "albanian": "sq",
+    "afrikaans": "af",
+    "amharic": "am",
+    "arabic": "ar",
+    "bengali": "bn",
+    "chinese": "zh",
+    "japanese": "ja",
+    "korean": "ko",
+    "russian": "ru",
+    "turkish": "tr",
+    "urdu": "ur"
+}
+
+def resolve_language_code(lang):
+    """Accept either a language name ("Hindi") or an ISO code ("hi")."""
+    lang = (lang or "en").lower()
+    if lang in LANGUAGE_CODE_MAP:
+        return LANGUAGE_CODE_MAP[lang]
+    if lang in LANGUAGE_CODE_MAP.values():
+        return lang
+    return "en"
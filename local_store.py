@@ -0,0 +1,398 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from mood_analytics import sample_code_score
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_DB_FILE = os.getenv("LOCAL_DB_FILE", os.path.join(BASE_DIR, "local_offline_storage.sqlite"))
+LEGACY_JSON_FILE = os.getenv("LEGACY_JSON_FILE", "local_chat_storage.json")
+
+DEFAULT_HABITS = "User is new to wellness tracking."
+# How many recent messages/mood samples get_conversation returns.
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "50"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT,
+    habits_summary TEXT,
+    rolling_summary TEXT,
+    last_updated TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_last_updated ON users(last_updated);
+CREATE TABLE IF NOT EXISTS local_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    role TEXT,
+    content TEXT,
+    mood TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_local_messages_user ON local_messages(user_id, id);
+CREATE TABLE IF NOT EXISTS mood_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    mood TEXT,
+    emotion TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_mood_history_user ON mood_history(user_id, id);
+CREATE TABLE IF NOT EXISTS session_summaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    summary TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_session_summaries_user ON session_summaries(user_id, id);
+CREATE TABLE IF NOT EXISTS goals (
+    goal_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    text TEXT,
+    progress TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_goals_user ON goals(user_id);
+CREATE TABLE IF NOT EXISTS pending_writes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    arguments TEXT NOT NULL
+);
+"""
+
+# Columns added to the original local_messages, users and mood_history tables.
+MESSAGE_COLUMNS = {"emotion": "TEXT", "emoji": "TEXT", "audio_path": "TEXT", "message_id": "TEXT"}
+USER_COLUMNS = {"rolling_summary": "TEXT"}
+MOOD_COLUMNS = {"score": "REAL"}
+USER_FIELDS = ("user_id", "conversation", "last_updated", "session_summaries", "rolling_summary", "habits_summary", "mood_history", "goals", "profile")
+MESSAGE_FIELDS = ("role", "content", "mood", "emotion", "emoji", "audio_path", "timestamp", "message_id")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _iso(ts):
+    return ts.isoformat() if isinstance(ts, datetime) else ts or _now()
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode_value(obj):
+    if set(obj) == {"$date"}:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+class LocalStore:
+    """
+    SQLite-backed offline storage. Messages, mood samples, summaries and goals
+    are append-only rows indexed by user_id, so a write costs the same no
+    matter how much history exists. Every public write runs in one transaction.
+    """
+
+    def __init__(self, db_path=LOCAL_DB_FILE, legacy_json=LEGACY_JSON_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_schema()
+        if legacy_json and os.path.exists(legacy_json):
+            self.import_legacy_json(legacy_json)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        with conn:
+            conn.executescript(SCHEMA)
+            for table, columns in (("local_messages", MESSAGE_COLUMNS), ("users", USER_COLUMNS), ("mood_history", MOOD_COLUMNS)):
+                existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for column, col_type in columns.items():
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+            # Users that only exist through old local_messages rows.
+            conn.execute(
+                "INSERT OR IGNORE INTO users (user_id, last_updated) "
+                "SELECT user_id, MAX(timestamp) FROM local_messages WHERE user_id IS NOT NULL GROUP BY user_id"
+            )
+
+    def _touch(self, conn, user_id, last_updated=None):
+        conn.execute(
+            "INSERT INTO users (user_id, last_updated) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET last_updated = excluded.last_updated",
+            (user_id, last_updated or _now())
+        )
+
+    def _ensure_user(self, conn, user_id):
+        conn.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+
+    # ---------------------- conversation ----------------------
+    def _insert_messages(self, conn, user_id, messages):
+        conn.executemany(
+            "INSERT INTO local_messages (user_id, role, content, mood, emotion, emoji, audio_path, timestamp, message_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(user_id,) + tuple(msg.get(f) for f in MESSAGE_FIELDS) for msg in messages]
+        )
+
+    def log_conversation(self, user_id, messages):
+        conn = self._conn()
+        with conn:
+            self._insert_messages(conn, user_id, messages)
+            self._touch(conn, user_id)
+
+    def record_turn(self, user_id, messages, mood_sample=None):
+        """Both messages, the mood sample and last_updated in one transaction."""
+        conn = self._conn()
+        with conn:
+            self._insert_messages(conn, user_id, messages)
+            if mood_sample:
+                conn.execute(
+                    "INSERT INTO mood_history (user_id, mood, emotion, score, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, mood_sample.get("mood"), mood_sample.get("emotion"), mood_sample.get("score"),
+                     _iso(mood_sample.get("timestamp")))
+                )
+            self._touch(conn, user_id)
+
+    def get_messages(self, user_id, limit=None, before=None):
+        """Newest `limit` messages older than the `before` cursor (a row id), oldest first, plus the next cursor."""
+        query = ("SELECT id, role, content, mood, emotion, emoji, audio_path, timestamp, message_id "
+                 "FROM local_messages WHERE user_id = ?")
+        params = [user_id]
+        if before:
+            query += " AND id < ?"
+            params.append(int(before))
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self._conn().execute(query, params).fetchall()
+        cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            cursor = str(rows[-1]["id"])
+        messages = []
+        for row in reversed(rows):
+            msg = dict(row)
+            del msg["id"]
+            messages.append(msg)
+        return messages, cursor
+
+    def get_conversation(self, user_id):
+        doc = self.get_user_fields(user_id, [f for f in USER_FIELDS if f != "conversation"])
+        doc["conversation"], doc["conversation_cursor"] = self.get_messages(user_id, HISTORY_WINDOW)
+        return doc
+
+    def get_user_fields(self, user_id, fields):
+        """Read only the requested fields; list fields each cost one indexed query."""
+        doc = {}
+        if {"profile", "habits_summary", "rolling_summary", "last_updated"} & set(fields):
+            user = self._conn().execute(
+                "SELECT profile, habits_summary, rolling_summary, last_updated FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            doc["profile"] = json.loads(user["profile"]) if user and user["profile"] else {}
+            doc["habits_summary"] = (user["habits_summary"] if user else None) or DEFAULT_HABITS
+            doc["rolling_summary"] = json.loads(user["rolling_summary"]) if user and user["rolling_summary"] else None
+            doc["last_updated"] = user["last_updated"] if user else None
+        readers = {
+            "conversation": lambda uid: self.get_messages(uid, HISTORY_WINDOW)[0],
+            "session_summaries": self.get_session_summary,
+            "mood_history": lambda uid: self.get_mood_history(uid, HISTORY_WINDOW),
+            "goals": self.get_goals
+        }
+        for field, reader in readers.items():
+            if field in fields:
+                doc[field] = reader(user_id)
+        result = {field: doc.get(field) for field in fields}
+        if "user_id" in fields:
+            result["user_id"] = user_id
+        return result
+
+    # ---------------------- summaries ----------------------
+    def log_summary(self, user_id, summary_text):
+        conn = self._conn()
+        with conn:
+            self._ensure_user(conn, user_id)
+            conn.execute(
+                "INSERT INTO session_summaries (user_id, summary, timestamp) VALUES (?, ?, ?)",
+                (user_id, summary_text, _now())
+            )
+
+    def get_session_summary(self, user_id):
+        rows = self._conn().execute(
+            "SELECT summary, timestamp FROM session_summaries WHERE user_id = ? ORDER BY id", (user_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def update_rolling_summary(self, user_id, summary):
+        conn = self._conn()
+        with conn:
+            self._ensure_user(conn, user_id)
+            conn.execute("UPDATE users SET rolling_summary = ? WHERE user_id = ?", (json.dumps(summary), user_id))
+
+    # ---------------------- habits / mood ----------------------
+    def update_habits(self, user_id, habits_text):
+        conn = self._conn()
+        with conn:
+            self._ensure_user(conn, user_id)
+            conn.execute("UPDATE users SET habits_summary = ? WHERE user_id = ?", (habits_text, user_id))
+
+    def update_mood_history(self, user_id, mood, emotion, timestamp=None):
+        conn = self._conn()
+        with conn:
+            self._ensure_user(conn, user_id)
+            conn.execute(
+                "INSERT INTO mood_history (user_id, mood, emotion, timestamp) VALUES (?, ?, ?, ?)",
+                (user_id, mood, emotion, _iso(timestamp))
+            )
+
+    def get_mood_history(self, user_id, limit=None):
+        rows = self._conn().execute(
+            "SELECT mood, emotion, score, timestamp FROM mood_history WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (user_id, -1 if limit is None else limit)
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def get_mood_rollups(self, user_id):
+        """Day rollups over all of the user's mood samples, aggregated in SQLite (timestamps are UTC ISO strings)."""
+        rows = self._conn().execute(
+            "SELECT substr(timestamp, 1, 10) AS day, emotion, COUNT(*) AS n, COUNT(score) AS scored, "
+            "TOTAL(score) AS s, TOTAL(score * score) AS q "
+            "FROM mood_history WHERE user_id = ? AND timestamp IS NOT NULL GROUP BY day, emotion",
+            (user_id,)
+        ).fetchall()
+        rollups = {}
+        for row in rows:
+            # Samples stored without a score count with their emotion's default, as in MoodSeries.
+            code, default = sample_code_score({"emotion": row["emotion"]})
+            unscored = row["n"] - row["scored"]
+            entry = rollups.setdefault(row["day"], {}).setdefault(code, [0, 0.0, 0.0])
+            entry[0] += row["n"]
+            entry[1] += row["s"] + unscored * default
+            entry[2] += row["q"] + unscored * default * default
+        return rollups
+
+    # ---------------------- profile ----------------------
+    def update_user_profile(self, user_id, profile):
+        conn = self._conn()
+        with conn:
+            self._ensure_user(conn, user_id)
+            conn.execute(
+                "UPDATE users SET profile = ? WHERE user_id = ?",
+                (json.dumps(profile, ensure_ascii=False), user_id)
+            )
+
+    def get_all_profiles(self, limit=None, offset=0, prefix=None):
+        """
+        Walks idx_users_last_updated newest first (SQLite sorts NULLs last in
+        DESC order) and stops after `limit` rows; `prefix` is matched
+        case-insensitively with LIKE.
+        """
+        query, params = "SELECT user_id FROM users", []
+        if prefix:
+            query += " WHERE user_id LIKE ? ESCAPE '\\'"
+            params.append(re.sub(r"([\\%_])", r"\\\1", prefix) + "%")
+        query += " ORDER BY last_updated DESC LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        return [row["user_id"] for row in self._conn().execute(query, params)]
+
+    def create_profile(self, profile_name):
+        conn = self._conn()
+        with conn:
+            # A row created implicitly by another write gets the default profile too.
+            conn.execute(
+                "INSERT INTO users (user_id, profile, last_updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET profile = COALESCE(profile, excluded.profile)",
+                (profile_name, json.dumps({"name": profile_name, "preferences": {"language": "English", "tone": "neutral"}}), _now())
+            )
+
+    # ---------------------- goals ----------------------
+    def add_goal(self, user_id, goal):
+        conn = self._conn()
+        with conn:
+            self._ensure_user(conn, user_id)
+            conn.execute(
+                "INSERT INTO goals (goal_id, user_id, text, progress) VALUES (?, ?, ?, ?)",
+                (goal["goal_id"], user_id, goal["text"], goal["progress"])
+            )
+
+    def update_goal_progress(self, user_id, goal_id, progress):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE goals SET progress = ? WHERE user_id = ? AND goal_id = ?", (progress, user_id, goal_id)
+            )
+
+    def get_goals(self, user_id):
+        rows = self._conn().execute(
+            "SELECT goal_id, text, progress FROM goals WHERE user_id = ? ORDER BY rowid", (user_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # ---------------------- outage journal ----------------------
+    def journal_write(self, method, arguments):
+        """Remember a write taken while Mongo was down, so ProbingBackend can replay it later."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO pending_writes (method, arguments) VALUES (?, ?)",
+                (method, json.dumps(arguments, ensure_ascii=False, default=_encode_value))
+            )
+
+    def pending_writes(self, limit=None):
+        """Journaled writes, oldest first, as (id, method, keyword arguments)."""
+        rows = self._conn().execute(
+            "SELECT id, method, arguments FROM pending_writes ORDER BY id LIMIT ?", (-1 if limit is None else limit,)
+        ).fetchall()
+        return [(row["id"], row["method"], json.loads(row["arguments"], object_hook=_decode_value)) for row in rows]
+
+    def clear_pending_write(self, write_id):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM pending_writes WHERE id = ?", (write_id,))
+
+    # ---------------------- migration ----------------------
+    def import_legacy_json(self, path):
+        """One-time import of the old whole-file local_chat_storage.json."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not import {path}: {e}")
+            return
+        conn = self._conn()
+        with conn:
+            for user_id, doc in data.items():
+                self._ensure_user(conn, user_id)
+                conn.execute(
+                    "UPDATE users SET profile = ?, habits_summary = ?, last_updated = ? WHERE user_id = ?",
+                    (json.dumps(doc.get("profile") or {}, ensure_ascii=False), doc.get("habits_summary"),
+                     doc.get("last_updated"), user_id)
+                )
+                self._insert_messages(conn, user_id, doc.get("conversation", []))
+                conn.executemany(
+                    "INSERT INTO mood_history (user_id, mood, emotion, timestamp) VALUES (?, ?, ?, ?)",
+                    [(user_id, m.get("mood"), m.get("emotion"), m.get("timestamp")) for m in doc.get("mood_history", [])]
+                )
+                conn.executemany(
+                    "INSERT INTO session_summaries (user_id, summary, timestamp) VALUES (?, ?, ?)",
+                    [(user_id, s.get("summary"), s.get("timestamp")) for s in doc.get("session_summaries", [])]
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO goals (goal_id, user_id, text, progress) VALUES (?, ?, ?, ?)",
+                    [(g["goal_id"], user_id, g.get("text"), g.get("progress")) for g in doc.get("goals", [])]
+                )
+        os.replace(path, f"{path}.migrated")
+        print(f"Imported {len(data)} users from {path} into {self.db_path}.")
@@ -1,62 +1,49 @@
 import os
 import re
-import google.generativeai as genai
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
 from dotenv import load_dotenv
-from deep_translator import GoogleTranslator
 from datetime import datetime
 from backend import (
-    detect_emotion,
-    update_mood_history,
+    analyze_sentiment,
     get_mood_history,
-    get_session_summary,
+    get_mood_summary,
+    get_messages,
+    get_rolling_summary,
+    update_rolling_summary,
+    search_memory,
+    RETRIEVAL_TOP_K,
     get_user_profile,
     get_daily_tip,
     get_guided_exercises,
-    get_resources
+    get_resources,
+    translate_text
 )
-from gtts import gTTS
+# Re-exported for older callers; the TTS helpers live with the audio cache.
+from tts_cache import strip_markdown_for_tts, synthesize_speech, synthesize_speech_and_save
+from response_cache import response_cache
+from gemini_client import ResilientModel, LazyGenerativeModel, ModelOffline
+from prompt_builder import PromptBuilder, compact_moods, compact_resources, compact_list
+from mood_analytics import trend_line
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.0-flash")
+model = ResilientModel(LazyGenerativeModel("gemini-2.0-flash"))
 
+USER_INPUT_TOKEN_CAP = 400
+CONTEXT_MESSAGES = 5
+MEMORY_TOKEN_CAP = int(os.getenv("MEMORY_TOKEN_CAP", "240"))
 DISTRESS_KEYWORDS = ["suicidal", "hopeless", "can't go on", "end my life", "worthless"]
 
 def build_context(messages, last_n=5):
-    context = ""
-    for msg in messages[-last_n:]:
-        role = "User" if msg["role"] == "user" else "AI"
-        context += f"{role}: {msg['content']}\n"
-    return context
+    """The last few turns as 'User: ...' / 'AI: ...' lines, oldest first."""
+    return [f"{'User' if msg['role'] == 'user' else 'AI'}: {msg['content']}" for msg in messages[-last_n:]]
 
 def is_question(text):
     question_words = ["what", "why", "how", "when", "where", "do", "does", "is", "are", "?"]
     return any(word in text.lower() for word in question_words) or text.strip().endswith("?")
 
-def translate_text(text, target_lang="en"):
-    try:
-        if not target_lang or target_lang == "en":
-            return text
-        return GoogleTranslator(source="auto", target=target_lang).translate(text)
-    except Exception:
-        return text
-
-def strip_markdown_for_tts(text: str) -> str:
-    if not text:
-        return text
-    t = text
-    t = re.sub(r"```.*?```", "", t, flags=re.DOTALL)
-    t = re.sub(r"`(.+?)`", r"\1", t)
-    t = re.sub(r"\*\*(.+?)\*\*", r"\1", t)
-    t = re.sub(r"\*(.+?)\*", r"\1", t)
-    t = re.sub(r"__(.+?)__", r"\1", t)
-    t = re.sub(r"_(.+?)_", r"\1", t)
-    t = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", t)
-    t = re.sub(r"^#{1,6}\s*", "", t, flags=re.MULTILINE)
-    t = re.sub(r"\n{2,}", "\n", t)
-    t = t.replace("*", "").replace("`", "")
-    return t.strip()
-
 def adjust_tone(emotion, user_profile):
     tone = user_profile.get("preferences", {}).get("tone", "neutral")
     if tone != "neutral":
@@ -70,29 +57,90 @@ def adjust_tone(emotion, user_profile):
     else:
         return "Your tone should be neutral and balanced."
 
-def get_wellness_response(user_input, conversation_messages, previous_suggestions=None, target_lang="en", habits_summary="", user_id=None, profile=None):
+CONTEXT_WORKERS = int(os.getenv("CONTEXT_WORKERS", "8"))
+# Shared by all sessions; CONTEXT_WORKERS=0 runs every stage inline, one after another.
+CONTEXT_POOL = ThreadPoolExecutor(max_workers=CONTEXT_WORKERS, thread_name_prefix="context") if CONTEXT_WORKERS > 0 else None
+
+def _submit(timings, name, fn, *args):
+    """Run one context stage on the pool (or inline), recording its duration in timings[name]."""
+    def run():
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[name] = time.perf_counter() - start
+    if CONTEXT_POOL is None:
+        future = Future()
+        try:
+            future.set_result(run())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    # Each task gets its own copy of the caller's context so request-scoped caches carry over.
+    return CONTEXT_POOL.submit(contextvars.copy_context().run, run)
+
+def _log_background_error(future):
+    if future.exception() is not None:
+        print(f"Background write failed: {future.exception()}")
+
+def _profile_and_catalogue(user_id, profile, emotion):
+    user_profile = profile or get_user_profile(user_id)
+    return user_profile, get_guided_exercises(emotion, profile=user_profile), get_resources(emotion, profile=user_profile)
+
+def mood_sample_for(user_input):
+    """The {"mood", "emotion", "score"} sample stored with a turn for the user's message."""
+    sentiment = analyze_sentiment(user_input)
+    return {"mood": sentiment["mood"], "emotion": sentiment["emotion"], "score": sentiment["compound"]}
+
+def prepare_turn(user_input, conversation_messages, previous_suggestions=None, habits_summary="", user_id=None, profile=None,
+                 mood_sample=None):
+    """
+    Gather per-turn context and build the model prompt.
+    Independent reads run concurrently on CONTEXT_POOL, so pre-model latency
+    is that of the slowest dependency. Nothing is written here; the caller
+    stores the turn and mood_sample (mood_sample_for(user_input) if not
+    given) with backend.record_turn().
+    The prompt is assembled by PromptBuilder under PROMPT_TOKEN_BUDGET.
+    Returns {"prompt", "emotion", "mood_sample", "timings", "prompt_tokens", "prompt_report"}.
+    """
     if previous_suggestions is None:
         previous_suggestions = []
 
-    context = build_context(conversation_messages)
-    emotion = detect_emotion(user_input)
-    update_mood_history(user_id, emotion, emotion)
+    started = time.perf_counter()
+    timings = {}
+    context = build_context(conversation_messages, CONTEXT_MESSAGES)
+    if mood_sample is None:
+        mood_sample = mood_sample_for(user_input)
+    emotion = mood_sample["emotion"]
+
+    catalogue_future = _submit(timings, "profile_and_catalogue", _profile_and_catalogue, user_id, profile, emotion)
+    summary_future = _submit(timings, "rolling_summary", get_rolling_summary, user_id)
+    mood_future = _submit(timings, "mood_history", get_mood_history, user_id, 5)
+    trend_future = _submit(timings, "mood_trend", get_mood_summary, user_id)
+    tip_future = _submit(timings, "daily_tip", get_daily_tip)
+    # Turns already in the conversation context are not worth retrieving again.
+    recent = conversation_messages[-CONTEXT_MESSAGES:]
+    if recent and recent[-1].get("role") == "user" and recent[-1].get("content") == user_input:
+        recent = recent[:-1]  # the current message, which is not logged yet
+    recent_turns = sum(1 for m in recent if m.get("role") == "user")
+    memory_future = _submit(timings, "memory", search_memory, user_id, user_input, RETRIEVAL_TOP_K, recent_turns)
+
+    user_profile, guided_exercises, resources = catalogue_future.result()
+    rolling_summary = summary_future.result()
+    # This turn's sample is stored with the turn by record_turn(); count it here already.
+    mood_history = (mood_future.result() + [mood_sample])[-5:]
+    mood_trend = trend_line(trend_future.result())
+    daily_tip = tip_future.result()
+    memories = memory_future.result()
+    timings["context_total"] = time.perf_counter() - started
 
-    user_profile = profile or get_user_profile(user_id)
     tone_instruction = adjust_tone(emotion, user_profile)
-    session_summary = get_session_summary(user_id)
-    mood_history = get_mood_history(user_id)
-    mood_summary = f"Your recent mood history: {mood_history[-5:]}" if mood_history else ""
 
     if is_question(user_input):
         user_intro = f"User asked a question: {user_input}"
     else:
         user_intro = f"User stated: {user_input}"
 
-    previous_suggestions_text = ""
-    if previous_suggestions:
-        previous_suggestions_text = f"Previous AI suggestions: {previous_suggestions}\n"
-
     distress_alert = ""
     if any(word in user_input.lower() for word in DISTRESS_KEYWORDS):
         distress_alert = (
@@ -104,37 +152,85 @@ def get_wellness_response(user_input, conversation_messages, previous_suggestion
             "Reach out to a friend, family member, or professional."
         )
 
-    daily_tip = get_daily_tip()
-    guided_exercises = get_guided_exercises(emotion, profile=user_profile)
-    resources = get_resources(emotion, profile=user_profile)
-
-    prompt = (
-        "You are a kind and supportive mental wellness AI assistant.\n"
-        f"{tone_instruction}\n"
-        f"Session summary: {session_summary}\n"
-        f"Mood history: {mood_summary}\n"
-        f"Conversation context:\n{context}\n"
-        f"{user_intro}\n"
-        f"{previous_suggestions_text}"
-        f"{distress_alert}\n"
-        f"User habits summary: {habits_summary}\n"
-        f"Daily wellness tip: {daily_tip}\n"
-        f"Guided exercises: {guided_exercises}\n"
-        f"Resources: {resources}\n"
-        "Respond empathetically, provide guidance, suggest follow-up exercises, "
-        "and keep responses concise and supportive."
-    )
+    builder = PromptBuilder()
+    builder.add("system", f"You are a kind and supportive mental wellness AI assistant.\n{tone_instruction}", priority=0)
+    builder.add("session_summary", rolling_summary.get("text", ""), priority=3, cap=200, label="Session summary")
+    builder.add("memory", [f"({str(m.get('timestamp') or '')[:10]}) {m['text']}" for m in reversed(memories)],
+                priority=4, cap=MEMORY_TOKEN_CAP, label="Relevant earlier conversation", item_cap=80)
+    builder.add("mood_history", f"Recent moods (oldest first): {compact_moods(mood_history)}" if mood_history else "", priority=4, cap=40)
+    builder.add("mood_trend", mood_trend, priority=5, cap=50)
+    builder.add("context", context, priority=1, cap=400, label="Conversation context", item_cap=120)
+    builder.add("user", user_intro, priority=0, cap=USER_INPUT_TOKEN_CAP)
+    builder.add("previous_suggestions", previous_suggestions, priority=5, cap=240, label="Previous AI suggestions (most recent last)", item_cap=60)
+    builder.add("distress", distress_alert, priority=0)
+    builder.add("habits", f"User habits summary: {habits_summary}" if habits_summary else "", priority=4, cap=80)
+    builder.add("daily_tip", f"Daily wellness tip: {daily_tip}", priority=6, cap=60)
+    builder.add("exercises", compact_list(guided_exercises), priority=6, cap=120, label="Guided exercises")
+    builder.add("resources", compact_resources(resources), priority=7, cap=120, label="Resources")
+    builder.add("instructions", "Respond empathetically, provide guidance, suggest follow-up exercises, "
+                "and keep responses concise and supportive.", priority=0)
+    prompt, prompt_report = builder.build()
+    return {"prompt": prompt, "emotion": emotion, "mood_sample": mood_sample, "timings": timings, "prompt_tokens": prompt_report["prompt_tokens"],
+            "prompt_report": prompt_report, "distress": bool(distress_alert)}
 
-    try:
+def generate_reply(prompt, user_id=None, distress=False, offline_ok=True):
+    """
+    model.generate_content(prompt).text through the per-user response cache;
+    distress turns always go to the model. With offline_ok=False, an offline
+    stand-in raises ModelOffline instead of being returned as the reply.
+    """
+    if distress:
+        response_cache.bypass()
         response = model.generate_content(prompt)
-        display_text = response.text.strip()
-        translated_display = translate_text(display_text, target_lang)
+    else:
+        cached = response_cache.get(user_id, prompt)
+        if cached is not None:
+            return cached
+        response = model.generate_content(prompt)
+    offline = getattr(response, "offline", False)
+    if offline and not offline_ok:
+        raise ModelOffline("model unavailable")
+    text = response.text.strip()
+    if distress:
+        return text
+    if not offline:
+        response_cache.put(user_id, prompt, text)
+    return text
+
+def stream_reply(prompt, user_id=None, distress=False):
+    """Streaming generate_reply: a cached reply is yielded in one piece, a fresh one is cached once complete."""
+    if distress:
+        response_cache.bypass()
+    else:
+        cached = response_cache.get(user_id, prompt)
+        if cached is not None:
+            yield cached
+            return
+    parts = []
+    offline = False
+    for chunk in model.generate_content(prompt, stream=True):
+        offline = offline or getattr(chunk, "offline", False)
+        text = chunk.text or ""
+        parts.append(text)
+        yield text
+    if not distress and not offline:
+        response_cache.put(user_id, prompt, "".join(parts).strip())
+
+def get_wellness_response(user_input, conversation_messages, previous_suggestions=None, target_lang="en", habits_summary="", user_id=None, profile=None,
+                          mood_sample=None):
+    turn = prepare_turn(user_input, conversation_messages, previous_suggestions, habits_summary, user_id, profile, mood_sample)
+    emotion = turn["emotion"]
+    try:
+        display_text = generate_reply(turn["prompt"], user_id, turn["distress"])
+        translated_display = translate_text(display_text, target_lang, cache=False)
         tts_ready = strip_markdown_for_tts(translated_display)
         return {
             "text": translated_display,
             "tts_text": tts_ready,
             "emotion": emotion,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow().isoformat(),
+            "timings": turn["timings"],
+            "prompt_tokens": turn["prompt_tokens"]
         }
     except Exception as e:
         err_text = f"⚠️ Error contacting Gemini API: {str(e)}"
@@ -142,22 +238,127 @@ def get_wellness_response(user_input, conversation_messages, previous_suggestion
             "text": err_text,
             "tts_text": strip_markdown_for_tts(err_text),
             "emotion": emotion,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow().isoformat(),
+            "timings": turn["timings"],
+            "prompt_tokens": turn["prompt_tokens"]
         }
 
-def synthesize_speech_and_save(text, user_id="default_user", lang="en"):
-    from backend import make_audio_filename
+SUMMARY_EVERY_TURNS = int(os.getenv("SUMMARY_EVERY_TURNS", "6"))
+# Background summary refreshes wait on the model, so they get their own pool, never CONTEXT_POOL or the caller's thread.
+SUMMARY_WORKERS = max(1, int(os.getenv("SUMMARY_WORKERS", "2")))
+SUMMARY_POOL = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="summary")
+_summarizing = set()
+_summarizing_lock = threading.Lock()
+
+def _messages_since(user_id, summary):
+    """
+    Messages after the last summarized one, oldest first. Pages back with the
+    storage cursor until it reaches the message_id the summary stopped at
+    (summaries from before message ids fall back to its timestamp).
+    """
+    through_id, through = summary.get("through_id"), summary.get("through")
+    new, cursor = [], None
+    while True:
+        page, cursor = get_messages(user_id, SUMMARY_EVERY_TURNS * 4, cursor)
+        for i in range(len(page) - 1, -1, -1):
+            seen = page[i].get("message_id") == through_id if through_id else \
+                through is not None and str(page[i].get("timestamp")) <= through
+            if seen:
+                return page[i + 1:] + new
+        new = page + new
+        if cursor is None:
+            return new
+
+def refresh_rolling_summary(user_id, force=False):
+    """
+    Fold the messages logged since the last update into the user's rolling
+    summary once SUMMARY_EVERY_TURNS new turns have built up (or whenever
+    there is anything new, with force). The model sees only the previous
+    summary and at most SUMMARY_EVERY_TURNS * 4 of the oldest new messages,
+    so an update costs the same however long the history is, and a backlog
+    is worked off over the next refreshes. Returns the current summary dict.
+    """
+    summary = get_rolling_summary(user_id)
+    new = _messages_since(user_id, summary)
+    if not new or (len(new) < SUMMARY_EVERY_TURNS * 2 and not force):
+        return summary
+    new = new[:SUMMARY_EVERY_TURNS * 4]
+
+    builder = PromptBuilder()
+    builder.add("instructions", "You keep a running summary of a mental wellness conversation.", priority=0)
+    builder.add("previous", summary.get("text", ""), priority=1, cap=300, label="Summary so far")
+    builder.add("new", build_context(new, last_n=len(new)), priority=2, label="New messages", item_cap=120)
+    builder.add("format", "Reply with the updated summary only, under 120 words: main concerns, mood trend, "
+                "and what has helped.", priority=0)
+    prompt, _ = builder.build()
     try:
-        audio_path = make_audio_filename(user_id, role="ai")
-        tts = gTTS(text=text, lang=lang)
-        tts.save(audio_path)
-        return audio_path
-    except Exception:
+        # An offline stand-in is not a summary: keep the old one and fold these messages in next time.
+        text = generate_reply(prompt, user_id, offline_ok=False)
+    except Exception as e:
+        print(f"Rolling summary update failed: {e}")
+        return summary
+    summary = {
+        "text": text,
+        "through": str(new[-1].get("timestamp")),
+        "through_id": new[-1].get("message_id"),
+        "turns": summary.get("turns", 0) + sum(1 for m in new if m.get("role") == "user"),
+        "updated": datetime.utcnow().isoformat()
+    }
+    update_rolling_summary(user_id, summary)
+    return summary
+
+def schedule_summary_refresh(user_id):
+    """Run refresh_rolling_summary on SUMMARY_POOL, at most one at a time per user."""
+    with _summarizing_lock:
+        if user_id in _summarizing:
+            return
+        _summarizing.add(user_id)
+
+    def run():
         try:
-            import tempfile
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-            tts = gTTS(text=text, lang=lang)
-            tts.save(tmp.name)
-            return tmp.name
-        except Exception:
-            return None
+            refresh_rolling_summary(user_id)
+        finally:
+            with _summarizing_lock:
+                _summarizing.discard(user_id)
+    SUMMARY_POOL.submit(contextvars.copy_context().run, run).add_done_callback(_log_background_error)
+
+SENTENCE_END = re.compile(r"(?<=[.!?।。！？])\s+|\n+")
+
+def _complete_sentences(buffer):
+    """Split buffer into (finished sentences, unfinished tail)."""
+    parts = SENTENCE_END.split(buffer)
+    if len(parts) == 1:
+        return "", buffer
+    tail = parts[-1]
+    return buffer[:len(buffer) - len(tail)], tail
+
+def stream_wellness_response(user_input, conversation_messages, previous_suggestions=None, target_lang="en", habits_summary="", user_id=None, profile=None, stats=None,
+                             mood_sample=None):
+    """
+    Generator version of get_wellness_response: yields text chunks as Gemini
+    streams them. For non-English targets, text is buffered and translated a
+    sentence at a time so each yielded chunk is a complete translated sentence.
+    If a stats dict is given it receives the turn's timings and prompt_tokens.
+    """
+    turn = prepare_turn(user_input, conversation_messages, previous_suggestions, habits_summary, user_id, profile, mood_sample)
+    if stats is not None:
+        stats.update(timings=turn["timings"], prompt_tokens=turn["prompt_tokens"])
+    prompt = turn["prompt"]
+    translate = bool(target_lang) and target_lang != "en"
+    buffer = ""
+    try:
+        for text in stream_reply(prompt, user_id, turn["distress"]):
+            if not translate:
+                yield text
+                continue
+            buffer += text
+            sentences, buffer = _complete_sentences(buffer)
+            if sentences.strip():
+                # Keep the whitespace/newlines that ended the sentence so paragraphs survive.
+                yield translate_text(sentences.strip(), target_lang, cache=False) + sentences[len(sentences.rstrip()):]
+        if translate and buffer.strip():
+            yield translate_text(buffer.strip(), target_lang, cache=False)
+    except Exception as e:
+        if buffer.strip():
+            yield translate_text(buffer.strip(), target_lang, cache=False)
+        yield f"\n\n⚠️ Error contacting Gemini API: {str(e)}"
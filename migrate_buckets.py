@@ -0,0 +1,57 @@
+"""
+One-shot migration of the per-user `conversation` and `mood_history` arrays
+in the `pradhan` collection into bucketed `pradhan_messages` / `pradhan_moods`
+documents. Migrated buckets are marked `legacy`, and a user's legacy buckets
+are deleted before they are written again, so a run interrupted after
+writing some of a user's buckets (or before removing the arrays) leaves no
+duplicates when re-run. Arrays are removed from the user document once its
+buckets are written.
+
+    python migrate_buckets.py [--dry-run] [--limit N]
+"""
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from storage import connect_mongo, mongo_backend
+
+
+def migrate(backend, dry_run=False, limit=None):
+    users = messages = moods = 0
+    started = time.perf_counter()
+    query = {"$or": [{"conversation.0": {"$exists": True}}, {"mood_history.0": {"$exists": True}}]}
+    docs = backend.collection.find(query, {"user_id": 1, "conversation": 1, "mood_history": 1})
+    if limit:
+        docs = docs.limit(limit)
+    for doc in docs:
+        conversation = doc.get("conversation") or []
+        mood_history = doc.get("mood_history") or []
+        if not dry_run:
+            # Leftovers of an interrupted run for this user; the arrays are still the source of truth.
+            for buckets in (backend.message_buckets, backend.mood_buckets):
+                buckets.delete_many({"user_id": doc["user_id"], "legacy": True})
+            # Legacy entries predate every bucket, so they never share one with newer writes.
+            backend.append_items(backend.message_buckets, doc["user_id"], conversation, new_buckets=True)
+            backend.append_items(backend.mood_buckets, doc["user_id"], mood_history, new_buckets=True, stats=True)
+            backend.collection.update_one({"_id": doc["_id"]}, {"$unset": {"conversation": "", "mood_history": ""}})
+        users += 1
+        messages += len(conversation)
+        moods += len(mood_history)
+        if users % 100 == 0:
+            report(users, messages, moods, time.perf_counter() - started)
+    report(users, messages, moods, time.perf_counter() - started)
+    return users, messages, moods
+
+
+def report(users, messages, moods, elapsed):
+    elapsed = max(elapsed, 1e-9)
+    print(f"{users} users, {messages} messages, {moods} mood samples in {elapsed:.1f}s "
+          f"({users / elapsed:.1f} users/s, {(messages + moods) / elapsed:.0f} entries/s)")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    args = sys.argv[1:]
+    limit = int(args[args.index("--limit") + 1]) if "--limit" in args else None
+    migrate(mongo_backend(connect_mongo()), dry_run="--dry-run" in args, limit=limit)
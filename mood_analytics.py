@@ -0,0 +1,399 @@
+import os
+import math
+import time
+import bisect
+import threading
+from array import array
+from collections import OrderedDict, deque
+from datetime import datetime, timezone, date
+
+import numpy as np
+
+# Emotion labels from sentiment._emotion_from_compound, most to least positive.
+EMOTIONS = ("joy", "content", "neutral", "anxiety", "anger")
+EMOTION_CODES = {emotion: code for code, emotion in enumerate(EMOTIONS)}
+UNKNOWN = len(EMOTIONS)
+N_CODES = UNKNOWN + 1
+# Compound score assumed for samples stored without one: the middle of each emotion's band.
+EMOTION_SCORES = np.array([0.8, 0.4, 0.0, -0.4, -0.8, 0.0], dtype=np.float32)
+
+MOOD_ROLLING_WINDOW = int(os.getenv("MOOD_ROLLING_WINDOW", "7"))
+MOOD_ANALYTICS_MAX_USERS = int(os.getenv("MOOD_ANALYTICS_MAX_USERS", "256"))
+# Newest samples a series is bootstrapped from, which bounds a cold read on the chat path. Counts,
+# averages, volatility, distributions and check-in streaks come from storage's per-day rollups and
+# cover all history; the recent average, rolling average and positive streaks cover these samples.
+MOOD_BOOTSTRAP_SAMPLES = int(os.getenv("MOOD_BOOTSTRAP_SAMPLES", "2000"))
+# Seconds a cached series is served before it is rebuilt from storage, which picks up other workers' writes.
+MOOD_ANALYTICS_TTL = float(os.getenv("MOOD_ANALYTICS_TTL", "300"))
+DAY = 86400
+EPOCH_DATE = date(1970, 1, 1)
+
+
+def _epoch(ts):
+    if isinstance(ts, datetime):
+        return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(ts, str) and ts:
+        try:
+            return _epoch(datetime.fromisoformat(ts))
+        except ValueError:
+            return None
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    return None
+
+
+def _week(day):
+    # Day 0 (1970-01-01) was a Thursday; weeks start on Monday.
+    return (day + 3) // 7
+
+
+def sample_code_score(sample):
+    """(emotion code, compound score) of a stored sample; one stored without a score gets its emotion's default."""
+    code = EMOTION_CODES.get(sample.get("emotion"), UNKNOWN)
+    score = sample.get("score")
+    return code, float(EMOTION_SCORES[code]) if score is None else float(score)
+
+
+def samples_to_arrays(samples):
+    """Stored mood samples -> (codes uint8, epochs float64, scores float32), skipping samples without a usable timestamp."""
+    codes, epochs, scores = array("B"), array("d"), array("f")
+    for sample in samples:
+        ts = sample.get("timestamp")
+        epoch = ts.timestamp() if isinstance(ts, datetime) and ts.tzinfo else _epoch(ts)
+        if epoch is None:
+            continue
+        code, score = sample_code_score(sample)
+        codes.append(code)
+        epochs.append(epoch)
+        scores.append(score)
+    return (np.frombuffer(codes, dtype=np.uint8), np.frombuffer(epochs, dtype=np.float64),
+            np.frombuffer(scores, dtype=np.float32))
+
+
+def add_to_rollup(rollups, day, code, score):
+    """
+    Count one sample into storage-format day rollups:
+    {"YYYY-MM-DD": {emotion code: [count, score sum, squared score sum]}}.
+    """
+    entry = rollups.setdefault(day, {}).setdefault(code, [0, 0.0, 0.0])
+    entry[0] += 1
+    entry[1] += score
+    entry[2] += score * score
+
+
+def samples_to_rollups(samples):
+    """Day rollups (UTC days) for stored mood samples, skipping samples without a usable timestamp."""
+    rollups = {}
+    for sample in samples:
+        epoch = _epoch(sample.get("timestamp"))
+        if epoch is not None:
+            day = datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d")
+            add_to_rollup(rollups, day, *sample_code_score(sample))
+    return rollups
+
+
+def rollups_to_arrays(rollups):
+    """Day rollups -> (day numbers, counts [days x emotion codes], score sums, squared score sum), days in order."""
+    keyed = sorted(((date.fromisoformat(day) - EPOCH_DATE).days, entries) for day, entries in rollups.items())
+    days = np.array([day for day, _ in keyed], dtype=np.int64)
+    counts = np.zeros((len(keyed), N_CODES), dtype=np.int64)
+    sums = np.zeros(len(keyed))
+    squares = 0.0
+    for row, (_, entries) in enumerate(keyed):
+        for code, (count, total, squared) in entries.items():
+            counts[row, code] += count
+            sums[row] += total
+            squares += squared
+    return days, counts, sums, squares
+
+
+def _last_run(mask):
+    """(length of the trailing run of True, longest run of True) for a boolean array."""
+    if not len(mask):
+        return 0, 0
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    lengths = edges[1::2] - edges[::2]
+    if not len(lengths):
+        return 0, 0
+    trailing = int(lengths[-1]) if mask[-1] else 0
+    return trailing, int(lengths.max())
+
+
+class MoodSeries:
+    """
+    One user's newest mood samples as compact arrays (emotion code, epoch
+    seconds, compound score), plus rollups kept current by add(): per-day
+    and per-week counts and score sums, running mean and variance (Welford),
+    check-in and positive-mood streaks, and a rolling window of recent
+    scores. summary() reads only the rollups. Days are UTC. When built from
+    storage's day rollups the counts, averages and check-in streaks cover
+    all history while the arrays, positive streaks and rolling window cover
+    only the samples loaded.
+    """
+
+    def __init__(self, window=MOOD_ROLLING_WINDOW):
+        self._lock = threading.Lock()
+        self.codes = array("B")
+        self.epochs = array("d")
+        self.scores = array("f")
+        # day / week number -> [count per emotion code..., score sum], and the numbers in order
+        self.daily = {}
+        self.weekly = {}
+        self.day_keys = []
+        self.week_keys = []
+        self.totals = np.zeros(N_CODES, dtype=np.int64)
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.last_day = None
+        self.checkin_streak = 0
+        self.best_checkin_streak = 0
+        self.positive_streak = 0
+        self.best_positive_streak = 0
+        self.recent = deque(maxlen=window)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @staticmethod
+    def _bump(rollup, keys, key, code, score):
+        row = rollup.get(key)
+        if row is None:
+            row = rollup[key] = np.zeros(N_CODES + 1)
+            bisect.insort(keys, key)
+        row[code] += 1
+        row[N_CODES] += score
+
+    def add(self, code, epoch, score):
+        with self._lock:
+            self.codes.append(code)
+            self.epochs.append(epoch)
+            self.scores.append(score)
+            day = int(epoch // DAY)
+            self._bump(self.daily, self.day_keys, day, code, score)
+            self._bump(self.weekly, self.week_keys, _week(day), code, score)
+            self.totals[code] += 1
+            self.n += 1
+            delta = score - self._mean
+            self._mean += delta / self.n
+            self._m2 += delta * (score - self._mean)
+            if self.last_day is None or day > self.last_day:
+                self.checkin_streak = self.checkin_streak + 1 if self.last_day == day - 1 else 1
+                self.last_day = day
+                self.best_checkin_streak = max(self.best_checkin_streak, self.checkin_streak)
+            self.positive_streak = self.positive_streak + 1 if score > 0 else 0
+            self.best_positive_streak = max(self.best_positive_streak, self.positive_streak)
+            self.recent.append(score)
+
+    @classmethod
+    def from_arrays(cls, codes, epochs, scores, rollups=None, window=MOOD_ROLLING_WINDOW):
+        """
+        Build the series and every rollup in a few vectorized passes; samples
+        are sorted by time first. Day rollups come from `rollups` (the output
+        of rollups_to_arrays()) when given, else from the samples.
+        """
+        series = cls(window)
+        if len(codes) and np.any(np.diff(epochs) < 0):
+            order = np.argsort(epochs, kind="stable")
+            codes, epochs, scores = codes[order], epochs[order], scores[order]
+        codes = np.ascontiguousarray(codes, dtype=np.uint8)
+        epochs = np.ascontiguousarray(epochs, dtype=np.float64)
+        scores = np.ascontiguousarray(scores, dtype=np.float32)
+        series.codes.frombytes(codes.tobytes())
+        series.epochs.frombytes(epochs.tobytes())
+        series.scores.frombytes(scores.tobytes())
+
+        as_float = scores.astype(np.float64)
+        if rollups is None:
+            days, inverse = np.unique((epochs // DAY).astype(np.int64), return_inverse=True)
+            counts = np.bincount(inverse * N_CODES + codes, minlength=len(days) * N_CODES).reshape(len(days), N_CODES)
+            rollups = days, counts, np.bincount(inverse, weights=scores, minlength=len(days)), float((as_float ** 2).sum())
+        series._set_days(*rollups)
+        series.positive_streak, series.best_positive_streak = _last_run(scores > 0)
+        series.recent.extend(as_float[-window:].tolist())
+        return series
+
+    def _set_days(self, days, counts, sums, squares):
+        """Day and week rollups, totals, mean, variance and check-in streaks from per-day counts and score sums."""
+        if not len(days):
+            return
+        rows = np.column_stack((counts, sums))
+        self.day_keys.extend(days.tolist())
+        self.daily.update(zip(self.day_keys, rows))
+        weeks, inverse = np.unique(_week(days), return_inverse=True)
+        week_rows = np.zeros((len(weeks), N_CODES + 1))
+        np.add.at(week_rows, inverse, rows)
+        self.week_keys.extend(weeks.tolist())
+        self.weekly.update(zip(self.week_keys, week_rows))
+        self.totals = counts.sum(axis=0).astype(np.int64)
+        self.n = int(self.totals.sum())
+        total = float(sums.sum())
+        self._mean = total / self.n
+        self._m2 = max(0.0, squares - total * total / self.n)
+        consecutive = np.concatenate(([True], np.diff(days) == 1))
+        # A run of consecutive days starts wherever the gap is not one day.
+        starts = np.flatnonzero(~consecutive)
+        run_lengths = np.diff(np.concatenate(([0], starts, [len(days)])))
+        self.checkin_streak = int(run_lengths[-1])
+        self.best_checkin_streak = int(run_lengths.max())
+        self.last_day = int(days[-1])
+
+    def summary(self, today=None):
+        """Precomputed aggregates; streaks count as current only if the last check-in was today or yesterday (UTC)."""
+        with self._lock:
+            n = self.n
+            if not n or not self.recent:
+                return {"samples": 0}
+            today = int((today if today is not None else datetime.now(timezone.utc).timestamp()) // DAY)
+            active = self.last_day is not None and today - self.last_day <= 1
+            recent = list(self.recent)
+            recent_mean = sum(recent) / len(recent)
+            return {
+                "samples": n,
+                "average": self._mean,
+                "volatility": math.sqrt(self._m2 / n),
+                "recent_average": recent_mean,
+                "recent_volatility": math.sqrt(sum((s - recent_mean) ** 2 for s in recent) / len(recent)),
+                "dominant_emotion": EMOTIONS[int(np.argmax(self.totals[:UNKNOWN]))] if self.totals[:UNKNOWN].any() else None,
+                "checkin_streak": self.checkin_streak if active else 0,
+                "best_checkin_streak": self.best_checkin_streak,
+                "positive_streak": self.positive_streak,
+                "best_positive_streak": self.best_positive_streak
+            }
+
+    def distribution(self, period="day", last=14):
+        """
+        (period numbers, counts [periods x emotions], mean score per period)
+        for the last `last` days or weeks that have samples, oldest first.
+        Read from the rollups, so cost depends on `last`, not on history size.
+        """
+        rollup, ordered = (self.daily, self.day_keys) if period == "day" else (self.weekly, self.week_keys)
+        with self._lock:
+            keys = ordered[-last:]
+            rows = np.array([rollup[k] for k in keys]) if keys else np.zeros((0, N_CODES + 1))
+        counts = rows[:, :UNKNOWN].astype(np.int64)
+        totals = rows[:, :N_CODES].sum(axis=1)
+        means = np.divide(rows[:, N_CODES], totals, out=np.zeros(len(keys)), where=totals > 0)
+        return keys, counts, means
+
+    def rolling_average(self, window=MOOD_ROLLING_WINDOW, last=None):
+        """Mean compound score over each trailing window of samples (vectorized over the stored scores)."""
+        with self._lock:
+            scores = np.frombuffer(self.scores, dtype=np.float32)
+            if last is not None:
+                scores = scores[-(last + window - 1):]
+            scores = scores.astype(np.float64)
+        if not len(scores):
+            return scores
+        window = min(window, len(scores))
+        sums = np.cumsum(np.concatenate(([0.0], scores)))
+        return (sums[window:] - sums[:-window]) / window
+
+
+def period_start(period_number, period="day"):
+    """The UTC date a day or week number from distribution() starts on."""
+    day = period_number if period == "day" else period_number * 7 - 3
+    return datetime.fromtimestamp(day * DAY, tz=timezone.utc).date()
+
+
+def trend_line(summary):
+    """One prompt line from MoodSeries.summary(), or '' with too few samples to say anything."""
+    if summary.get("samples", 0) < 3:
+        return ""
+    parts = [f"average mood score {summary['average']:+.2f} over {summary['samples']} check-ins",
+             f"recent {summary['recent_average']:+.2f}",
+             f"volatility {summary['volatility']:.2f}"]
+    if summary["checkin_streak"] > 1:
+        parts.append(f"{summary['checkin_streak']}-day check-in streak")
+    if summary["positive_streak"] > 1:
+        parts.append(f"{summary['positive_streak']} positive check-ins in a row")
+    return "Mood trend: " + ", ".join(parts)
+
+
+class MoodAnalytics:
+    """
+    MoodSeries for the MOOD_ANALYTICS_MAX_USERS most recently used users.
+    A user's series is bootstrapped from storage on first read
+    (load_history(user_id) -> the newest mood samples, oldest first, and
+    load_rollups(user_id) -> storage's day rollups over all of them) and
+    kept current by add(). A series older than ttl seconds is rebuilt on
+    its next read, so samples other processes stored show up within that
+    long. Samples added while a bootstrap is loading are held and merged
+    into the new series, unless the load already returned them; samples
+    for users with no series and no bootstrap running are skipped, since a
+    later bootstrap reads them from storage.
+    """
+
+    def __init__(self, load_history, load_rollups=None, max_users=MOOD_ANALYTICS_MAX_USERS, ttl=MOOD_ANALYTICS_TTL):
+        self.load_history = load_history
+        self.load_rollups = load_rollups
+        self.max_users = max_users
+        self.ttl = ttl
+        # user_id -> (series, time.monotonic() it was built)
+        self._series = OrderedDict()
+        # user_id -> {"loaders": bootstraps running, "added": [(code, epoch, score), ...]}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def series(self, user_id, build=True):
+        with self._lock:
+            entry = self._series.get(user_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._series.move_to_end(user_id)
+                return entry[0]
+            if not build:
+                return None
+            # An expired series is dropped first, so writes made during the rebuild are held for it.
+            self._series.pop(user_id, None)
+            loading = self._loading.setdefault(user_id, {"loaders": 0, "added": []})
+            loading["loaders"] += 1
+        try:
+            # Rollups first: a sample stored between the two reads is then missing from the totals
+            # rather than counted twice.
+            rollups = rollups_to_arrays(self.load_rollups(user_id)) if self.load_rollups else None
+            codes, epochs, scores = samples_to_arrays(self.load_history(user_id))
+            with self._lock:
+                entry = self._series.get(user_id)
+                if entry is None:
+                    series = MoodSeries.from_arrays(codes, epochs, scores, rollups)
+                    # Storage keeps millisecond timestamps (Mongo), so that is the tolerance for "already loaded".
+                    for code, epoch, score in sorted(loading["added"], key=lambda s: s[1]):
+                        if not np.any(np.abs(epochs - epoch) < 1e-3):
+                            series.add(code, epoch, score)
+                    self._series[user_id] = (series, time.monotonic())
+                    while len(self._series) > self.max_users:
+                        self._series.popitem(last=False)
+                else:
+                    series = entry[0]
+        finally:
+            with self._lock:
+                loading["loaders"] -= 1
+                if not loading["loaders"]:
+                    self._loading.pop(user_id, None)
+        return series
+
+    def add(self, user_id, sample):
+        epoch = _epoch(sample.get("timestamp")) if sample.get("timestamp") is not None else datetime.now(timezone.utc).timestamp()
+        if epoch is None:
+            return
+        code, score = sample_code_score(sample)
+        with self._lock:
+            entry = self._series.get(user_id)
+            if entry is None:
+                loading = self._loading.get(user_id)
+                if loading is not None:
+                    loading["added"].append((code, epoch, score))
+                return
+        entry[0].add(code, epoch, score)
+
+    def summary(self, user_id):
+        return self.series(user_id).summary()
+
+    def forget(self, user_id):
+        with self._lock:
+            self._series.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
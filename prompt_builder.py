@@ -0,0 +1,117 @@
+import os
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+# Rough Gemini/SentencePiece ratio for English; close enough for budgeting.
+CHARS_PER_TOKEN = 4
+
+
+def _tokens_for_chars(chars):
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_tokens(text):
+    return _tokens_for_chars(len(text)) if text else 0
+
+
+def truncate_tokens(text, max_tokens):
+    """Cut text to about max_tokens, on a word boundary where possible."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - 1)
+    cut = text[:limit]
+    if " " in cut[limit // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip() + "…"
+
+
+def compact_moods(mood_history):
+    """Mood samples as 'anxiety → neutral → joy', oldest first, without timestamps."""
+    return " → ".join(m.get("emotion") or m.get("mood") or "?" for m in mood_history or [])
+
+
+def compact_resources(resources):
+    return "\n".join(f"- {r.get('title', '')}: {r.get('url', '')}" for r in resources or [])
+
+
+def compact_list(items):
+    return "\n".join(f"- {item}" for item in items or [])
+
+
+class PromptBuilder:
+    """
+    Assembles a prompt from named sections under a token budget.
+    Sections keep the order they were added in. Each has a priority (0 is
+    never cut, higher numbers are cut first) and an optional cap in tokens.
+    List sections lose their oldest items first and note how many were
+    omitted; text sections are truncated. Over budget, sections are shrunk
+    from the highest priority number down, and dropped if nothing fits.
+    """
+
+    def __init__(self, budget=PROMPT_TOKEN_BUDGET):
+        self.budget = budget
+        self._sections = []
+
+    def add(self, name, content, priority=5, cap=None, label=None, item_cap=None):
+        """content is a string or a list of strings (one per line, oldest first)."""
+        if not content:
+            return self
+        if isinstance(content, (list, tuple)):
+            items = [str(item) for item in content if item]
+            if item_cap:
+                items = [truncate_tokens(item, item_cap) for item in items]
+        else:
+            items = None
+        self._sections.append({
+            "name": name,
+            "label": label,
+            "priority": priority,
+            "items": items,
+            "text": None if items is not None else str(content),
+            "cap": cap
+        })
+        return self
+
+    def _render(self, section, max_tokens=None):
+        prefix = f"{section['label']}:\n" if section["label"] else ""
+        if section["items"] is None:
+            body = section["text"]
+            if max_tokens is not None:
+                body = truncate_tokens(body, max(0, max_tokens - estimate_tokens(prefix)))
+            return prefix + body if body else ""
+        items = section["items"]
+        kept, size = [], len(prefix)
+        for item in reversed(items):
+            omitted = len(items) - len(kept) - 1
+            note = len(f"(+{omitted} earlier omitted)\n") if omitted else 0
+            if max_tokens is not None and _tokens_for_chars(size + len(item) + 1 + note) > max_tokens:
+                break
+            kept.append(item)
+            size += len(item) + 1
+        if not kept:
+            return ""
+        kept.reverse()
+        omitted = len(items) - len(kept)
+        return prefix + (f"(+{omitted} earlier omitted)\n" if omitted else "") + "\n".join(kept)
+
+    def build(self):
+        """Returns (prompt, report) where report has total and per-section token counts."""
+        rendered = [self._render(s, s["cap"]) for s in self._sections]
+        total = sum(estimate_tokens(text) for text in rendered)
+        for i in sorted(range(len(self._sections)), key=lambda i: -self._sections[i]["priority"]):
+            if total <= self.budget:
+                break
+            if self._sections[i]["priority"] == 0:
+                continue
+            current = estimate_tokens(rendered[i])
+            allowed = current - (total - self.budget)
+            rendered[i] = self._render(self._sections[i], allowed) if allowed > 0 else ""
+            total += estimate_tokens(rendered[i]) - current
+
+        prompt = "\n".join(text for text in rendered if text)
+        report = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "budget": self.budget,
+            "sections": {s["name"]: estimate_tokens(text) for s, text in zip(self._sections, rendered)},
+            "dropped": [s["name"] for s, text in zip(self._sections, rendered) if not text]
+        }
+        return prompt, report
@@ -0,0 +1,94 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Seconds a cached model reply stays valid; 0 turns the cache off.
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Case and whitespace differences don't change the answer we want."""
+    return WHITESPACE.sub(" ", prompt or "").strip().lower()
+
+
+class ResponseCache:
+    """
+    In-process LRU of model replies keyed by sha256(user_id, normalized prompt).
+    Entries are scoped to the user whose prompt produced them and expire
+    after ttl seconds. Callers bypass the cache for distress turns, and
+    those bypasses are counted alongside hits, misses and expiries.
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bypassed = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _key(self, user_id, prompt):
+        return hashlib.sha256(f"{user_id}\0{normalize_prompt(prompt)}".encode("utf-8")).digest()
+
+    def get(self, user_id, prompt):
+        if not self.enabled:
+            return None
+        key = self._key(user_id, prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, text = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, user_id, prompt, text):
+        if not self.enabled or not text:
+            return
+        key = self._key(user_id, prompt)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,181 @@
+import os
+import re
+import math
+import threading
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+RETRIEVAL_MAX_USERS = int(os.getenv("RETRIEVAL_MAX_USERS", "256"))
+RETRIEVAL_BOOTSTRAP_MESSAGES = int(os.getenv("RETRIEVAL_BOOTSTRAP_MESSAGES", "5000"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an the and or but if so to of in on at for with about from by as is are was were be been am i me my "
+    "you your it its this that these those we our they them he she his her do does did have has had not no "
+    "can could would should will just very really what how when where why which who".split()
+)
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def group_turns(messages):
+    """Group messages into turns: a user message plus the AI replies that follow it."""
+    turns = []
+    for msg in messages:
+        if msg.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+
+def _turn_text(turn):
+    return "\n".join(f"{'User' if m.get('role') == 'user' else 'AI'}: {m.get('content', '')}" for m in turn)
+
+
+class TurnIndex:
+    """
+    BM25 index over one user's past turns. Postings are append-only
+    array('i') buffers (doc ids ascending, term frequencies), so adding a turn
+    costs O(terms in the turn); a query scores only the postings of its own
+    terms with NumPy views over those buffers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = []
+        self._doc_len = array("i")
+        self._postings = {}
+        self._total_len = 0
+
+    def __len__(self):
+        return len(self.turns)
+
+    def add(self, turn):
+        text = _turn_text(turn)
+        terms = tokenize(text)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        with self._lock:
+            doc_id = len(self.turns)
+            self.turns.append({"text": text, "timestamp": turn[0].get("timestamp")})
+            self._doc_len.append(len(terms))
+            self._total_len += len(terms)
+            for term, tf in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = (array("i"), array("i"))
+                posting[0].append(doc_id)
+                posting[1].append(tf)
+
+    def _score_term(self, scores, term, n, total, avgdl):
+        doc_ids, tfs = self._postings[term]
+        df = len(doc_ids)
+        idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+        docs = np.frombuffer(doc_ids, dtype=np.int32)
+        cut = int(np.searchsorted(docs, n))
+        if cut:
+            docs = docs[:cut]
+            tf = np.frombuffer(tfs, dtype=np.int32, count=cut)
+            lengths = np.frombuffer(self._doc_len, dtype=np.int32, count=n)[docs]
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths / avgdl))
+
+    def search(self, query, k=3, exclude_last=0):
+        """Top-k turns for query as [{"text", "timestamp", "score"}], best first, skipping the newest exclude_last."""
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self.turns)
+            n = total - exclude_last
+            terms = [t for t in terms if t in self._postings]
+            if n <= 0 or not terms or k <= 0:
+                return []
+            # NumPy views over the array buffers must be gone before the lock is released,
+            # or a concurrent add() could not grow them; the helpers keep them local.
+            avgdl = self._total_len / total or 1.0
+            scores = np.zeros(n, dtype=np.float64)
+            for term in terms:
+                self._score_term(scores, term, n, total, avgdl)
+            k = min(k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [dict(self.turns[i], score=float(scores[i])) for i in top if scores[i] > 0]
+
+
+class RetrievalIndex:
+    """
+    Per-user TurnIndex instances kept in memory for the RETRIEVAL_MAX_USERS
+    most recently used users. A user's index is bootstrapped from storage on
+    first search (load_history(user_id) -> messages, oldest first) and then
+    kept current by add(). Messages added while a bootstrap is loading are
+    held and indexed after it, unless the load already returned them (by
+    message_id); messages for users with no index and no bootstrap running
+    are skipped, since a later bootstrap reads them from storage.
+    """
+
+    def __init__(self, load_history, max_users=RETRIEVAL_MAX_USERS):
+        self.load_history = load_history
+        self.max_users = max_users
+        self._indexes = OrderedDict()
+        # user_id -> {"loaders": bootstraps running, "added": [message, ...]}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def _get(self, user_id, build=False):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                return index
+            if not build:
+                return None
+            loading = self._loading.setdefault(user_id, {"loaders": 0, "added": []})
+            loading["loaders"] += 1
+        try:
+            history = self.load_history(user_id)
+            index = TurnIndex()
+            for turn in group_turns(history):
+                index.add(turn)
+            with self._lock:
+                existing = self._indexes.get(user_id)
+                if existing is not None:
+                    return existing
+                seen = {m.get("message_id") for m in history} - {None}
+                for turn in group_turns([m for m in loading["added"] if m.get("message_id") not in seen]):
+                    index.add(turn)
+                self._indexes[user_id] = index
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+                return index
+        finally:
+            with self._lock:
+                loading["loaders"] -= 1
+                if not loading["loaders"]:
+                    self._loading.pop(user_id, None)
+
+    def add(self, user_id, messages):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                loading = self._loading.get(user_id)
+                if loading is not None:
+                    loading["added"].extend(messages)
+                return
+        for turn in group_turns(messages):
+            index.add(turn)
+
+    def search(self, user_id, query, k=3, exclude_last=0):
+        return self._get(user_id, build=True).search(query, k, exclude_last)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
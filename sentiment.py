@@ -0,0 +1,122 @@
+"""
+VADER sentiment for chat messages: mood, emotion and emoji labels. Pure CPU
+with no storage or network clients, so thin clients of the API (see
+api_client.py) import it without loading backend.py.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+analyzer = SentimentIntensityAnalyzer()
+
+MOOD_EMOJI_MAP = {
+    "happy": "🙂",
+    "calm": "😌",
+    "stressed": "😟",
+    "sad": "😢",
+    "joy": "😁",
+    "content": "😊",
+    "neutral": "😐",
+    "anxiety": "😰",
+    "anger": "😠"
+}
+
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "4096"))
+_sentiment_cache = OrderedDict()
+_sentiment_lock = threading.Lock()
+
+def _mood_from_compound(compound):
+    if compound >= 0.5:
+        return "happy"
+    elif compound <= -0.5:
+        return "sad"
+    elif compound > 0:
+        return "calm"
+    else:
+        return "stressed"
+
+def _emotion_from_compound(compound):
+    if compound >= 0.6:
+        return "joy"
+    elif 0.2 <= compound < 0.6:
+        return "content"
+    elif -0.2 < compound < 0.2:
+        return "neutral"
+    elif -0.6 < compound <= -0.2:
+        return "anxiety"
+    else:
+        return "anger"
+
+def _sentiment_key(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def _score(text):
+    compound = analyzer.polarity_scores(text)["compound"]
+    return {"compound": compound, "mood": _mood_from_compound(compound), "emotion": _emotion_from_compound(compound)}
+
+def analyze_sentiment(text):
+    """
+    Run VADER once and derive both mood and emotion from the compound score.
+    Results are memoized in a bounded LRU keyed by a hash of the text.
+    Returns {"compound": float, "mood": str, "emotion": str}.
+    """
+    text = text or ""
+    key = _sentiment_key(text)
+    with _sentiment_lock:
+        cached = _sentiment_cache.get(key)
+        if cached is not None:
+            _sentiment_cache.move_to_end(key)
+            return dict(cached)
+    result = _score(text)
+    with _sentiment_lock:
+        _sentiment_cache[key] = result
+        while len(_sentiment_cache) > SENTIMENT_CACHE_SIZE:
+            _sentiment_cache.popitem(last=False)
+    return dict(result)
+
+def analyze_sentiment_batch(texts):
+    """
+    Score many texts at once; duplicates and cached texts are scored only
+    once, and new scores go into the same LRU as analyze_sentiment().
+    """
+    texts = [t or "" for t in texts]
+    scored, fresh = {}, {}
+    for text in dict.fromkeys(texts):
+        key = _sentiment_key(text)
+        with _sentiment_lock:
+            cached = _sentiment_cache.get(key)
+            if cached is not None:
+                _sentiment_cache.move_to_end(key)
+        if cached is None:
+            cached = fresh[key] = _score(text)
+        scored[text] = cached
+    if fresh:
+        with _sentiment_lock:
+            _sentiment_cache.update(fresh)
+            while len(_sentiment_cache) > SENTIMENT_CACHE_SIZE:
+                _sentiment_cache.popitem(last=False)
+    return [dict(scored[t]) for t in texts]
+
+def backfill_sentiment(messages):
+    """Fill in mood/emotion/emoji on stored messages that predate sentiment tagging (in place)."""
+    missing = [m for m in messages if not m.get("emotion") or (m.get("role") == "user" and not m.get("mood"))]
+    if not missing:
+        return messages
+    results = analyze_sentiment_batch(m.get("content", "") for m in missing)
+    for msg, result in zip(missing, results):
+        if msg.get("role") == "user":
+            msg["mood"] = msg.get("mood") or result["mood"]
+        msg["emotion"] = msg.get("emotion") or result["emotion"]
+        msg["emoji"] = msg.get("emoji") or get_emoji_for_mood(msg["emotion"])
+    return messages
+
+def detect_mood(user_message):
+    return analyze_sentiment(user_message)["mood"]
+
+def detect_emotion(user_message):
+    return analyze_sentiment(user_message)["emotion"]
+
+def get_emoji_for_mood(mood_or_emotion):
+    return MOOD_EMOJI_MAP.get(mood_or_emotion, "🧠")
@@ -0,0 +1,778 @@
+import os
+import re
+import copy
+import time
+import inspect
+import threading
+from typing import Protocol
+from datetime import datetime, timezone
+
+from local_store import LocalStore, DEFAULT_HABITS, HISTORY_WINDOW
+from mood_analytics import add_to_rollup, sample_code_score, samples_to_rollups
+
+DEFAULT_MONGO_DB = "sreemoyee"
+DEFAULT_MONGO_COLLECTION = "pradhan"
+# Seconds between reconnect attempts while Mongo is down.
+MONGO_PROBE_INTERVAL = float(os.getenv("MONGO_PROBE_INTERVAL", "30"))
+# How long the first storage call waits for the initial probe before falling back to local storage.
+MONGO_FIRST_USE_WAIT = float(os.getenv("MONGO_FIRST_USE_WAIT", "1.5"))
+UNIQUE_USER_ID_INDEX = "user_id_unique"
+# MongoDB error codes.
+DUPLICATE_KEY = 11000
+INDEX_NOT_FOUND = 27
+# A page is (messages oldest-first, cursor for the next older page or None).
+
+
+def _empty_doc(user_id):
+    return {
+        "user_id": user_id,
+        "conversation": [],
+        "last_updated": None,
+        "session_summaries": [],
+        "rolling_summary": None,
+        "habits_summary": DEFAULT_HABITS,
+        "mood_history": [],
+        "goals": [],
+        "profile": {}
+    }
+
+
+def _new_profile(profile_name):
+    return {"name": profile_name, "preferences": {"language": "English", "tone": "neutral"}}
+
+
+class StorageBackend(Protocol):
+    """Operations every storage implementation provides to backend.py."""
+
+    def get_conversation(self, user_id): ...
+    def get_user_fields(self, user_id, fields): ...
+    def get_messages(self, user_id, limit=None, before=None): ...
+    def log_conversation(self, user_id, messages): ...
+    def record_turn(self, user_id, messages, mood_sample=None): ...
+    def log_summary(self, user_id, summary_text): ...
+    def get_session_summary(self, user_id): ...
+    def update_rolling_summary(self, user_id, summary): ...
+    def update_habits(self, user_id, habits_text): ...
+    def update_mood_history(self, user_id, mood, emotion, timestamp=None): ...
+    def get_mood_history(self, user_id, limit=None): ...
+    def get_mood_rollups(self, user_id): ...
+    def update_user_profile(self, user_id, profile): ...
+    def add_goal(self, user_id, goal): ...
+    def update_goal_progress(self, user_id, goal_id, progress): ...
+    def get_goals(self, user_id): ...
+    def get_all_profiles(self, limit=None, offset=0, prefix=None): ...
+    def create_profile(self, profile_name): ...
+
+
+BUCKET_SIZE = int(os.getenv("BUCKET_SIZE", "200"))
+# last_updated only orders the profile list, so record_turn refreshes it at most this often per user
+# and process. Intended: the list may lag real activity by up to this long (0 refreshes every turn).
+LAST_UPDATED_EVERY = float(os.getenv("LAST_UPDATED_EVERY", "60"))
+
+
+def _bucket_day(ts):
+    if isinstance(ts, str):
+        try:
+            ts = datetime.fromisoformat(ts)
+        except ValueError:
+            ts = None
+    if not isinstance(ts, datetime):
+        ts = datetime.now(timezone.utc)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.strftime("%Y-%m-%d"), ts
+
+
+# Cursor prefix for pages read from a user document's unmigrated arrays.
+LEGACY_CURSOR = "legacy:"
+
+
+def _mood_stats(items):
+    """A mood bucket's per-emotion counters: {"<emotion code>": {"n": count, "s": score sum, "q": squared score sum}}."""
+    stats = {}
+    for item in items:
+        code, score = sample_code_score(item)
+        entry = stats.setdefault(str(code), {"n": 0, "s": 0.0, "q": 0.0})
+        entry["n"] += 1
+        entry["s"] += score
+        entry["q"] += score * score
+    return stats
+
+
+def encode_cursor(bucket_id, offset):
+    return f"{bucket_id}:{offset}"
+
+
+def decode_cursor(cursor):
+    bucket_id, offset = cursor.rsplit(":", 1)
+    return bucket_id, int(offset)
+
+
+class MongoBackend:
+    """
+    Profile, habits, goals and summaries live in one small document per user
+    in `pradhan`. Messages and mood samples are stored in per-user, per-day
+    bucket documents of at most BUCKET_SIZE entries (`pradhan_messages`,
+    `pradhan_moods`), indexed on (user_id, first_ts) and (user_id, last_ts),
+    so no document grows without bound.
+    """
+
+    def __init__(self, collection, message_buckets, mood_buckets):
+        self.collection = collection
+        self.message_buckets = message_buckets
+        self.mood_buckets = mood_buckets
+        self._touched = {}
+        # (field, user_id) known to have no legacy array left on the user document.
+        self._no_legacy = set()
+
+    def ping(self):
+        self.collection.database.command("ping")
+
+    def ensure_indexes(self):
+        self._ensure_unique_user_id()
+        # The profile directory: get_all_profiles() is answered from this index alone.
+        self.collection.create_index([("last_updated", -1), ("user_id", 1)])
+        # Prefix search: an anchored, case-sensitive regex on the lowercased id is an index range scan.
+        self._backfill_user_keys()
+        self.collection.create_index([("user_key", 1), ("user_id", 1)], unique=True)
+        for buckets in (self.message_buckets, self.mood_buckets):
+            buckets.create_index([("user_id", 1), ("first_ts", -1), ("_id", -1)])
+            buckets.create_index([("user_id", 1), ("last_ts", -1)])
+
+    def _ensure_unique_user_id(self):
+        """
+        Upgrade the original non-unique user_id index, unless duplicate
+        documents prevent it. Workers may run this at the same time, so the
+        unique index gets its own name and a drop that lost the race is fine.
+        """
+        from pymongo.errors import OperationFailure
+        indexes = self.collection.index_information()
+        if indexes.get("user_id_1", {}).get("unique") or indexes.get(UNIQUE_USER_ID_INDEX, {}).get("unique"):
+            return
+        if "user_id_1" in indexes:
+            try:
+                self.collection.drop_index("user_id_1")
+            except OperationFailure as e:
+                if e.code != INDEX_NOT_FOUND:
+                    raise
+        try:
+            self.collection.create_index("user_id", unique=True, name=UNIQUE_USER_ID_INDEX)
+        except OperationFailure as e:
+            if e.code != DUPLICATE_KEY:
+                raise
+            self.collection.create_index("user_id")
+            print(f"⚠️ user_id index left non-unique, duplicate user documents exist: {e}")
+
+    def _backfill_user_keys(self):
+        """Set user_key on user documents written before it existed."""
+        for doc in self.collection.find({"user_key": {"$exists": False}}, {"user_id": 1}):
+            if isinstance(doc.get("user_id"), str):
+                self.collection.update_one({"_id": doc["_id"]}, {"$set": {"user_key": doc["user_id"].lower()}})
+
+    def _upsert_user(self, user_id, update):
+        """update_one on the user's document, creating it (with its user_key) if missing."""
+        update = dict(update, **{"$setOnInsert": dict(update.get("$setOnInsert", {}), user_key=user_id.lower())})
+        return self.collection.update_one({"user_id": user_id}, update, upsert=True)
+
+    # ---------------------- buckets ----------------------
+    def append_items(self, buckets, user_id, items, new_buckets=False, stats=False):
+        """
+        Push items into the user's open bucket for each item's day: one
+        guarded find_one_and_update, so an append is one round trip. Only the
+        newest bucket of a day is open; when it is missing or too full it is
+        closed and a new open one inserted. Buckets of a day therefore hold
+        consecutive runs. new_buckets=True inserts closed buckets marked
+        legacy, for history older than what is already stored
+        (migrate_buckets.py). stats=True (mood buckets) keeps the bucket's
+        `stats` counters (_mood_stats) in the same update.
+        """
+        by_day = {}
+        for item in items:
+            day, ts = _bucket_day(item.get("timestamp"))
+            by_day.setdefault(day, []).append((ts, item))
+        for day, entries in by_day.items():
+            while entries:
+                chunk, entries = entries[:BUCKET_SIZE], entries[BUCKET_SIZE:]
+                first_ts = min(ts for ts, _ in chunk)
+                last_ts = max(ts for ts, _ in chunk)
+                chunk_stats = _mood_stats(item for _, item in chunk) if stats else {}
+                inc = {"count": len(chunk)}
+                inc.update((f"stats.{code}.{field}", value) for code, entry in chunk_stats.items() for field, value in entry.items())
+                if not new_buckets and buckets.find_one_and_update(
+                    {"user_id": user_id, "day": day, "open": True, "count": {"$lte": BUCKET_SIZE - len(chunk)}},
+                    {
+                        "$push": {"items": {"$each": [item for _, item in chunk]}},
+                        "$inc": inc,
+                        "$min": {"first_ts": first_ts},
+                        "$max": {"last_ts": last_ts}
+                    },
+                    projection={"_id": 1},
+                    sort=[("last_ts", -1), ("_id", -1)]
+                ) is not None:
+                    continue
+                # No open bucket for the day yet, or it is too full: close it and start the next one.
+                if not new_buckets:
+                    buckets.update_many({"user_id": user_id, "day": day, "open": True}, {"$unset": {"open": ""}})
+                bucket = {"user_id": user_id, "day": day, "items": [item for _, item in chunk],
+                          "count": len(chunk), "first_ts": first_ts, "last_ts": last_ts}
+                if stats:
+                    bucket["stats"] = chunk_stats
+                bucket["legacy" if new_buckets else "open"] = True
+                buckets.insert_one(bucket)
+
+    def _read_window(self, buckets, user_id, limit=None, before=None):
+        """
+        Newest-last list of at most `limit` items older than `before`, plus a
+        cursor for the next older page. The cursor is None once the oldest
+        bucket has been read; a cursor at a bucket boundary may yield an
+        empty final page.
+        """
+        query = {"user_id": user_id}
+        offset = None
+        if before:
+            from bson import ObjectId
+            bucket_id, offset = decode_cursor(before)
+            anchor = buckets.find_one({"_id": ObjectId(bucket_id)}, {"first_ts": 1})
+            if anchor is None:
+                return [], None
+            query["$or"] = [
+                {"first_ts": {"$lt": anchor["first_ts"]}},
+                {"first_ts": anchor["first_ts"], "_id": {"$lte": anchor["_id"]}}
+            ]
+        page = []
+        cursor = None
+        for bucket in buckets.find(query, {"items": 1, "first_ts": 1}).sort([("first_ts", -1), ("_id", -1)]):
+            items = bucket.get("items", [])
+            if offset is not None and str(bucket["_id"]) == before.rsplit(":", 1)[0]:
+                items = items[:offset]
+            need = None if limit is None else limit - len(page)
+            if need is not None and len(items) > need:
+                page = items[len(items) - need:] + page
+                cursor = encode_cursor(bucket["_id"], len(items) - need)
+                break
+            page = items + page
+            if need is not None and len(items) == need:
+                cursor = encode_cursor(bucket["_id"], 0)
+                break
+        return page, cursor
+
+    def _legacy_page(self, user_id, field, limit=None, skip=0):
+        """
+        Items of a `conversation` or `mood_history` array on the user
+        document that migrate_buckets.py has not moved yet; they predate every
+        bucket. Returns the `limit` items before the newest `skip`, oldest
+        first, and a cursor for the page before them. Once the array is gone
+        the user is remembered and no longer read.
+        """
+        if (field, user_id) in self._no_legacy:
+            return [], None
+        projection = {field: {"$slice": -(skip + limit)} if limit else 1, "_id": 0}
+        doc = self.collection.find_one({"user_id": user_id}, projection) or {}
+        if field not in doc:
+            self._no_legacy.add((field, user_id))
+            return [], None
+        fetched = doc[field] or []
+        page = fetched[:max(0, len(fetched) - skip)]
+        cursor = f"{LEGACY_CURSOR}{skip + limit}" if limit and len(fetched) == skip + limit else None
+        return page, cursor
+
+    def _with_legacy(self, user_id, field, limit, page, cursor):
+        """Continue a bucket page into the legacy array once the oldest bucket has been read."""
+        if cursor is not None or (limit is not None and len(page) >= limit):
+            return page, cursor
+        older, cursor = self._legacy_page(user_id, field, None if limit is None else limit - len(page))
+        return older + page, cursor
+
+    def get_messages(self, user_id, limit=None, before=None):
+        if before and before.startswith(LEGACY_CURSOR):
+            return self._legacy_page(user_id, "conversation", limit, int(before[len(LEGACY_CURSOR):]))
+        page, cursor = self._read_window(self.message_buckets, user_id, limit, before)
+        return self._with_legacy(user_id, "conversation", limit, page, cursor)
+
+    # ---------------------- user document ----------------------
+    def get_conversation(self, user_id):
+        doc = self.collection.find_one({"user_id": user_id}, {"conversation": 0, "mood_history": 0})
+        if not doc:
+            doc = _empty_doc(user_id)
+        for key, value in _empty_doc(user_id).items():
+            doc.setdefault(key, value)
+        doc["conversation"], doc["conversation_cursor"] = self.get_messages(user_id, HISTORY_WINDOW)
+        doc["mood_history"] = self.get_mood_history(user_id, HISTORY_WINDOW)
+        return doc
+
+    def get_user_fields(self, user_id, fields):
+        """Only the requested top-level fields, via a Mongo projection."""
+        bucketed = {"conversation": lambda: self.get_messages(user_id, HISTORY_WINDOW)[0],
+                    "mood_history": lambda: self.get_mood_history(user_id, HISTORY_WINDOW)}
+        doc = {}
+        plain = [field for field in fields if field not in bucketed]
+        if plain:
+            projection = {field: 1 for field in plain}
+            projection["_id"] = 0
+            doc = self.collection.find_one({"user_id": user_id}, projection) or {}
+        defaults = _empty_doc(user_id)
+        result = {field: doc.get(field, defaults.get(field)) for field in plain}
+        for field in fields:
+            if field in bucketed:
+                result[field] = bucketed[field]()
+        return result
+
+    def log_conversation(self, user_id, messages):
+        self.append_items(self.message_buckets, user_id, messages)
+        self._upsert_user(user_id, {"$set": {"last_updated": datetime.now(timezone.utc)}})
+
+    def record_turn(self, user_id, messages, mood_sample=None):
+        """
+        Messages and mood samples live in separate bucket collections, so a
+        turn is one find_one_and_update into each: two round trips, plus an
+        insert when a bucket fills up. last_updated on the user document is
+        refreshed only if this process has not done so in the last
+        LAST_UPDATED_EVERY seconds for the user, which saves a round trip on
+        most turns. Messages and moods are unaffected: get_all_profiles() is
+        the only reader, and its order may lag by that long.
+        """
+        self.append_items(self.message_buckets, user_id, messages)
+        if mood_sample:
+            self.append_items(self.mood_buckets, user_id, [dict(mood_sample, timestamp=mood_sample.get("timestamp") or datetime.now(timezone.utc))],
+                              stats=True)
+        now = time.monotonic()
+        touched = self._touched.get(user_id)
+        if touched is None or now - touched >= LAST_UPDATED_EVERY:
+            self._touched[user_id] = now
+            self._upsert_user(user_id, {"$set": {"last_updated": datetime.now(timezone.utc)}})
+
+    def log_summary(self, user_id, summary_text):
+        self._upsert_user(user_id, {"$push": {"session_summaries": {"summary": summary_text, "timestamp": datetime.now(timezone.utc)}}})
+
+    def get_session_summary(self, user_id):
+        return self.get_user_fields(user_id, ("session_summaries",))["session_summaries"]
+
+    def update_rolling_summary(self, user_id, summary):
+        self._upsert_user(user_id, {"$set": {"rolling_summary": summary}})
+
+    def update_habits(self, user_id, habits_text):
+        self._upsert_user(user_id, {"$set": {"habits_summary": habits_text}})
+
+    def update_mood_history(self, user_id, mood, emotion, timestamp=None):
+        self.append_items(self.mood_buckets, user_id, [{"mood": mood, "emotion": emotion, "timestamp": timestamp or datetime.now(timezone.utc)}],
+                          stats=True)
+
+    def get_mood_history(self, user_id, limit=None):
+        page, cursor = self._read_window(self.mood_buckets, user_id, limit)
+        return self._with_legacy(user_id, "mood_history", limit, page, cursor)[0]
+
+    def get_mood_rollups(self, user_id):
+        """
+        Day rollups over all of the user's mood samples, summed from each
+        bucket's `stats` counters without reading its items. Buckets written
+        before the counters existed are counted from their items, and so is
+        an unmigrated mood_history array; while that array exists the legacy
+        buckets are skipped, since a re-run of the migration rewrites them.
+        """
+        legacy = (self.collection.find_one({"user_id": user_id}, {"mood_history": 1, "_id": 0}) or {}).get("mood_history")
+        rollups = samples_to_rollups(legacy or [])
+        query = {"user_id": user_id}
+        if legacy is not None:
+            query["legacy"] = {"$exists": False}
+        for bucket in self.mood_buckets.find(dict(query, stats={"$exists": True}), {"day": 1, "stats": 1}):
+            for code, entry in bucket["stats"].items():
+                target = rollups.setdefault(bucket["day"], {}).setdefault(int(code), [0, 0.0, 0.0])
+                target[0] += entry["n"]
+                target[1] += entry["s"]
+                target[2] += entry["q"]
+        for bucket in self.mood_buckets.find(dict(query, stats={"$exists": False}), {"day": 1, "items": 1}):
+            for item in bucket.get("items", []):
+                add_to_rollup(rollups, bucket["day"], *sample_code_score(item))
+        return rollups
+
+    def update_user_profile(self, user_id, profile):
+        self._upsert_user(user_id, {"$set": {"profile": profile}})
+
+    def add_goal(self, user_id, goal):
+        self._upsert_user(user_id, {"$push": {"goals": goal}})
+
+    def update_goal_progress(self, user_id, goal_id, progress):
+        self.collection.update_one({"user_id": user_id, "goals.goal_id": goal_id}, {"$set": {"goals.$.progress": progress}})
+
+    def get_goals(self, user_id):
+        return self.get_user_fields(user_id, ("goals",))["goals"]
+
+    def get_all_profiles(self, limit=None, offset=0, prefix=None):
+        """
+        User ids, most recently active first (to within LAST_UPDATED_EVERY
+        seconds, see record_turn), optionally filtered by a case-insensitive prefix.
+        """
+        query = {"user_key": {"$regex": f"^{re.escape(prefix.lower())}"}} if prefix else {}
+        cursor = (self.collection.find(query, {"_id": 0, "user_id": 1})
+                  .sort([("last_updated", -1), ("user_id", 1)])
+                  .skip(offset)
+                  .limit(limit or 0))
+        return [doc["user_id"] for doc in cursor]
+
+    def create_profile(self, profile_name):
+        """Create the user with the default profile, or give it one if another write created it without."""
+        from pymongo.errors import DuplicateKeyError
+        try:
+            self.collection.update_one(
+                {"user_id": profile_name, "profile": {"$exists": False}},
+                {"$set": {"profile": _new_profile(profile_name)},
+                 "$setOnInsert": {"user_key": profile_name.lower(), "last_updated": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            pass  # the user already has a profile, or a concurrent upsert created it first
+
+
+class MemoryBackend:
+    """
+    Process-local dict storage with no I/O. Meant for load tests and
+    benchmarks; nothing survives a restart.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def _doc(self, user_id):
+        doc = self._users.get(user_id)
+        if doc is None:
+            doc = self._users[user_id] = _empty_doc(user_id)
+        return doc
+
+    def get_conversation(self, user_id):
+        with self._lock:
+            doc = self._users.get(user_id)
+            if doc is None:
+                return _empty_doc(user_id)
+            doc = {
+                key: list(value) if isinstance(value, list) else copy.deepcopy(value) if isinstance(value, dict) else value
+                for key, value in doc.items()
+            }
+        doc["conversation"], doc["conversation_cursor"] = self.get_messages(user_id, HISTORY_WINDOW)
+        doc["mood_history"] = doc["mood_history"][-HISTORY_WINDOW:]
+        return doc
+
+    def get_messages(self, user_id, limit=None, before=None):
+        with self._lock:
+            messages = self._users.get(user_id, {}).get("conversation", [])
+            end = int(before) if before else len(messages)
+            start = 0 if limit is None else max(0, end - limit)
+            return [dict(m) for m in messages[start:end]], (str(start) if start > 0 else None)
+
+    def get_user_fields(self, user_id, fields):
+        with self._lock:
+            doc = self._users.get(user_id) or _empty_doc(user_id)
+            result = {}
+            for field in fields:
+                value = doc.get(field)
+                if field in ("conversation", "mood_history"):
+                    value = value[-HISTORY_WINDOW:]
+                result[field] = copy.deepcopy(value)
+            return result
+
+    def log_conversation(self, user_id, messages):
+        with self._lock:
+            doc = self._doc(user_id)
+            doc["conversation"].extend(dict(m) for m in messages)
+            doc["last_updated"] = datetime.now(timezone.utc)
+
+    def record_turn(self, user_id, messages, mood_sample=None):
+        with self._lock:
+            doc = self._doc(user_id)
+            doc["conversation"].extend(dict(m) for m in messages)
+            now = datetime.now(timezone.utc)
+            if mood_sample:
+                doc["mood_history"].append(dict(mood_sample, timestamp=mood_sample.get("timestamp") or now))
+            doc["last_updated"] = now
+
+    def log_summary(self, user_id, summary_text):
+        with self._lock:
+            self._doc(user_id)["session_summaries"].append({"summary": summary_text, "timestamp": datetime.now(timezone.utc)})
+
+    def get_session_summary(self, user_id):
+        with self._lock:
+            return list(self._users.get(user_id, {}).get("session_summaries", []))
+
+    def update_rolling_summary(self, user_id, summary):
+        with self._lock:
+            self._doc(user_id)["rolling_summary"] = dict(summary)
+
+    def update_habits(self, user_id, habits_text):
+        with self._lock:
+            self._doc(user_id)["habits_summary"] = habits_text
+
+    def update_mood_history(self, user_id, mood, emotion, timestamp=None):
+        with self._lock:
+            self._doc(user_id)["mood_history"].append({"mood": mood, "emotion": emotion, "timestamp": timestamp or datetime.now(timezone.utc)})
+
+    def get_mood_history(self, user_id, limit=None):
+        with self._lock:
+            history = self._users.get(user_id, {}).get("mood_history", [])
+            return list(history if limit is None else history[-limit:])
+
+    def get_mood_rollups(self, user_id):
+        return samples_to_rollups(self.get_mood_history(user_id))
+
+    def update_user_profile(self, user_id, profile):
+        with self._lock:
+            self._doc(user_id)["profile"] = dict(profile)
+
+    def add_goal(self, user_id, goal):
+        with self._lock:
+            self._doc(user_id)["goals"].append(dict(goal))
+
+    def update_goal_progress(self, user_id, goal_id, progress):
+        with self._lock:
+            for goal in self._users.get(user_id, {}).get("goals", []):
+                if goal["goal_id"] == goal_id:
+                    goal["progress"] = progress
+
+    def get_goals(self, user_id):
+        with self._lock:
+            return [dict(g) for g in self._users.get(user_id, {}).get("goals", [])]
+
+    def get_all_profiles(self, limit=None, offset=0, prefix=None):
+        with self._lock:
+            oldest = datetime.min.replace(tzinfo=timezone.utc)
+            prefix = (prefix or "").lower()
+            docs = [d for d in self._users.values() if d["user_id"].lower().startswith(prefix)]
+            docs.sort(key=lambda d: d["last_updated"] or oldest, reverse=True)
+            return [doc["user_id"] for doc in docs[offset:None if limit is None else offset + limit]]
+
+    def create_profile(self, profile_name):
+        with self._lock:
+            # A user created implicitly by another write gets the default profile too.
+            created = profile_name not in self._users
+            doc = self._doc(profile_name)
+            if not doc["profile"]:
+                doc["profile"] = _new_profile(profile_name)
+            if created:
+                doc["last_updated"] = datetime.now(timezone.utc)
+
+
+def connect_mongo(uri=None):
+    import certifi
+    from pymongo import MongoClient
+    client = MongoClient(
+        uri or os.getenv("MONGO_URI"),
+        tls=True,
+        tlsCAFile=certifi.where(),
+        serverSelectionTimeoutMS=5000
+    )
+    try:
+        client.server_info()
+    except Exception:
+        client.close()
+        raise
+    return client[os.getenv("MONGO_DB", DEFAULT_MONGO_DB)]
+
+
+def mongo_backend(db):
+    name = os.getenv("MONGO_COLLECTION", DEFAULT_MONGO_COLLECTION)
+    backend = MongoBackend(db[name], db[f"{name}_messages"], db[f"{name}_moods"])
+    backend.ensure_indexes()
+    return backend
+
+
+# StorageBackend methods that change data; ProbingBackend routes these differently from reads.
+WRITE_METHODS = frozenset({
+    "log_conversation", "record_turn", "log_summary", "update_rolling_summary", "update_habits",
+    "update_mood_history", "update_user_profile", "add_goal", "update_goal_progress", "create_profile"
+})
+
+
+class ProbingBackend:
+    """
+    Mongo when it answers, a fallback backend (local SQLite) when it doesn't.
+    Nothing connects at construction. The first storage call starts a probe
+    on a background thread; reads wait at most first_use_wait for it, writes
+    wait until it has decided, so nothing is written locally while Mongo is
+    healthy. While Mongo is down it is re-probed every probe_interval seconds.
+    Writes made during an outage go to the fallback and into its journal
+    (LocalStore.journal_write), and are replayed into Mongo, oldest first,
+    once it answers again; new writes wait for the replay. A connection
+    failure during a call marks Mongo down and serves that call from the
+    fallback. With fallback=None calls wait for the first probe and raise
+    ConnectionError while Mongo is down.
+    """
+
+    def __init__(self, connect=None, fallback=LocalStore, probe_interval=MONGO_PROBE_INTERVAL,
+                 first_use_wait=MONGO_FIRST_USE_WAIT):
+        self._connect = connect or (lambda: mongo_backend(connect_mongo()))
+        self._fallback_factory = fallback
+        self.probe_interval = probe_interval
+        self.first_use_wait = first_use_wait
+        self._mongo = None
+        self._fallback = None
+        self._healthy = False
+        self._probing = False
+        self._next_probe = 0.0
+        self._last_error = None
+        self._wait_until = None
+        self._probed = threading.Event()
+        # Cleared while journaled writes are replayed into Mongo.
+        self._replayed = threading.Event()
+        self._replayed.set()
+        # Held by fallback writes and by the switch back to Mongo, so no write lands locally after the replay starts.
+        self._write_gate = threading.Lock()
+        self._lock = threading.Lock()
+
+    def _maybe_probe(self):
+        with self._lock:
+            if self._healthy or self._probing or time.monotonic() < self._next_probe:
+                return
+            self._probing = True
+        threading.Thread(target=self._probe, name="mongo-probe", daemon=True).start()
+
+    def _probe(self):
+        try:
+            if self._mongo is None:
+                self._mongo = self._connect()
+            else:
+                self._mongo.ping()
+        except Exception as e:
+            self._mark_down(e)
+        else:
+            with self._write_gate:
+                pending = self._local().pending_writes() if self._fallback_factory else []
+                if pending:
+                    self._replayed.clear()
+                with self._lock:
+                    recovered = self._last_error is not None
+                    self._healthy = True
+                    self._last_error = None
+            if recovered:
+                print("✅ MongoDB reachable again, using it for storage.")
+            if pending:
+                self._replay(pending)
+        finally:
+            with self._lock:
+                self._probing = False
+            self._probed.set()
+
+    def _replay(self, pending):
+        from pymongo.errors import ConnectionFailure
+        local = self._local()
+        replayed = 0
+        try:
+            for write_id, method, arguments in pending:
+                try:
+                    getattr(self._mongo, method)(**arguments)
+                    replayed += 1
+                except ConnectionFailure:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Dropped journaled {method} that MongoDB rejected: {e}")
+                local.clear_pending_write(write_id)
+        except ConnectionFailure as e:
+            self._mark_down(e)
+        finally:
+            self._replayed.set()
+        print(f"Replayed {replayed} of {len(pending)} writes made while MongoDB was down.")
+
+    def _mark_down(self, error):
+        with self._lock:
+            first = self._last_error is None
+            self._healthy = False
+            self._last_error = error
+            self._next_probe = time.monotonic() + self.probe_interval
+        if first:
+            fallback = "using local SQLite storage" if self._fallback_factory else "storage unavailable"
+            print(f"⚠️ MongoDB not reachable, {fallback}.")
+
+    def _local(self):
+        with self._lock:
+            if self._fallback is None:
+                self._fallback = self._fallback_factory()
+            return self._fallback
+
+    def _active(self):
+        self._maybe_probe()
+        if not self._probed.is_set():
+            if self._fallback_factory is None:
+                self._probed.wait()
+            else:
+                # Every read in the first first_use_wait seconds shares one deadline.
+                if self._wait_until is None:
+                    self._wait_until = time.monotonic() + self.first_use_wait
+                self._probed.wait(max(0.0, self._wait_until - time.monotonic()))
+        if self._healthy:
+            return self._mongo
+        if self._fallback_factory is None:
+            raise ConnectionError(f"MongoDB not reachable: {self._last_error}")
+        return self._local()
+
+    def _write(self, name, args, kwargs):
+        from pymongo.errors import ConnectionFailure
+        self._maybe_probe()
+        self._probed.wait()
+        while True:
+            self._replayed.wait()
+            if self._healthy:
+                try:
+                    return getattr(self._mongo, name)(*args, **kwargs)
+                except ConnectionFailure as e:
+                    self._mark_down(e)
+                    if self._fallback_factory is None:
+                        raise
+            if self._fallback_factory is None:
+                raise ConnectionError(f"MongoDB not reachable: {self._last_error}")
+            with self._write_gate:
+                if self._healthy:
+                    continue  # Mongo came back while we waited; the replay may still be running
+                local = self._local()
+                method = getattr(local, name)
+                arguments = inspect.signature(method).bind(*args, **kwargs).arguments
+                sample = arguments.get("mood_sample")
+                # Stamp mood samples now, so the replay keeps the time of the turn.
+                if sample and not sample.get("timestamp"):
+                    arguments["mood_sample"] = dict(sample, timestamp=datetime.now(timezone.utc))
+                if name == "update_mood_history" and not arguments.get("timestamp"):
+                    arguments["timestamp"] = datetime.now(timezone.utc)
+                result = method(**arguments)
+                local.journal_write(name, arguments)
+                return result
+
+    def status(self):
+        with self._lock:
+            return {
+                "active": "mongo" if self._healthy else ("local" if self._fallback_factory else None),
+                "probed": self._probed.is_set(),
+                "last_error": str(self._last_error) if self._last_error else None
+            }
+
+    def __getattr__(self, name):
+        if name in WRITE_METHODS:
+            return lambda *args, **kwargs: self._write(name, args, kwargs)
+        backend = self._active()
+        attr = getattr(backend, name)
+        if backend is not self._mongo or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            from pymongo.errors import ConnectionFailure
+            try:
+                return attr(*args, **kwargs)
+            except ConnectionFailure as e:
+                self._mark_down(e)
+                if self._fallback_factory is None:
+                    raise
+                return getattr(self._local(), name)(*args, **kwargs)
+        return call
+
+
+def create_backend(kind=None):
+    """
+    Build the configured StorageBackend without connecting to anything.
+    STORAGE_BACKEND selects it: auto (default) uses Mongo while it is
+    reachable and local SQLite otherwise (see ProbingBackend); mongo, local
+    and memory force one implementation.
+    """
+    kind = (kind or os.getenv("STORAGE_BACKEND", "auto")).lower()
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "local":
+        return LocalStore()
+    if kind not in ("auto", "mongo"):
+        raise ValueError(f"Unknown STORAGE_BACKEND '{kind}'")
+    return ProbingBackend(fallback=LocalStore if kind == "auto" else None)
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Set before any module under test is imported: caches, bundles, audio and
+# SQLite files go to a scratch directory, storage is in-process, and app.py
+# runs against the pipeline directly.
+SCRATCH = tempfile.mkdtemp(prefix="wellness-tests-")
+os.environ.pop("WELLNESS_API_URL", None)
+os.environ.update(
+    STORAGE_BACKEND="memory",
+    TRANSLATION_CACHE_DB=os.path.join(SCRATCH, "translations.sqlite"),
+    CONTENT_BUNDLE_DIR=os.path.join(SCRATCH, "bundles"),
+    AUDIO_CACHE_DIR=os.path.join(SCRATCH, "audio"),
+    LOCAL_DB_FILE=os.path.join(SCRATCH, "local.sqlite"),
+    LEGACY_JSON_FILE=os.path.join(SCRATCH, "local_chat_storage.json")
+)
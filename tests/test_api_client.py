@@ -0,0 +1,15 @@
+import os
+import sys
+import subprocess
+
+from conftest import ROOT
+
+
+def test_thin_client_does_not_load_the_pipeline():
+    # A fresh interpreter: api_client picks its mode at import.
+    script = ("import sys, api_client, tts_cache; "
+              "print(sorted(m for m in ('backend', 'main', 'storage', 'gemini_client', 'translation_cache') "
+              "if m in sys.modules))")
+    env = dict(os.environ, WELLNESS_API_URL="http://127.0.0.1:9")
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,88 @@
+import json
+
+from tornado.testing import AsyncHTTPTestCase
+
+import api_server
+from benchmarks.fakes import FakeGenerativeModel, FakeTranslator
+
+TOKEN = "test-token"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+
+
+class ApiServerTest(AsyncHTTPTestCase):
+    """Handlers against the --fake pipeline: in-memory storage, fake model and translator."""
+
+    def setUp(self):
+        backend, pipeline = api_server.load_pipeline(fakes=True)
+        self._saved = (backend.GoogleTranslator, pipeline.model, FakeTranslator.latency)
+        FakeTranslator.latency = 0.0
+        self.model = pipeline.model = FakeGenerativeModel(reply="Breathe in slowly. You are doing well.")
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        api_server.backend.GoogleTranslator, api_server.pipeline.model, FakeTranslator.latency = self._saved
+
+    def get_app(self):
+        return api_server.make_app(workers=4, max_inflight=8, token=TOKEN)
+
+    def call(self, method, path, body=None, headers=AUTH):
+        response = self.fetch(path, method=method, headers=headers,
+                              body=None if body is None else json.dumps(body), allow_nonstandard_methods=True)
+        return response.code, (json.loads(response.body) if response.body and response.headers.get(
+            "Content-Type", "").startswith("application/json") else response.body)
+
+    def test_token_is_required(self):
+        assert self.call("GET", "/profiles", headers={})[0] == 401
+        assert self.call("GET", "/profiles", headers={"Authorization": "Bearer nope"})[0] == 401
+        assert self.call("GET", "/profiles")[0] == 200
+
+    def test_health_needs_no_token(self):
+        code, body = self.call("GET", "/health", headers={})
+        assert code == 200 and body["max_inflight"] == 8
+
+    def test_chat_streams_reply(self):
+        code, body = self.call("POST", "/chat", {"message": "I can't sleep", "user_id": "api_chat"})
+        assert code == 200 and body.decode() == self.model.reply
+        assert self.call("POST", "/chat", {})[0] == 400
+
+    def test_chat_uses_the_clients_mood_sample(self):
+        pipeline, prepare_turn, seen = api_server.pipeline, api_server.pipeline.prepare_turn, []
+        pipeline.prepare_turn = lambda *args, **kwargs: seen.append(prepare_turn(*args, **kwargs)) or seen[-1]
+        try:
+            sample = {"mood": "calm", "emotion": "content", "score": 0.4}
+            self.call("POST", "/chat", {"message": "I can't sleep", "user_id": "api_mood", "mood_sample": sample})
+        finally:
+            pipeline.prepare_turn = prepare_turn
+        assert seen[0]["mood_sample"] == sample
+
+    def test_turn_round_trip(self):
+        turn = {"user_msg": {"role": "user", "content": "hello"}, "ai_msg": {"role": "ai", "content": "hi"},
+                "mood_sample": {"mood": "calm", "emotion": "content", "score": 0.4}}
+        assert self.call("POST", "/users/api%20turn/turns", turn)[0] == 204
+        code, page = self.call("GET", "/users/api%20turn/messages?limit=10")
+        assert code == 200 and [m["content"] for m in page["messages"]] == ["hello", "hi"]
+        code, mood = self.call("GET", "/users/api%20turn/mood")
+        assert [m["mood"] for m in mood] == ["calm"]
+
+    def test_profiles_and_goals(self):
+        assert self.call("POST", "/profiles", {"name": "api_profile"})[0] == 201
+        code, profiles = self.call("GET", "/profiles?prefix=API_P")
+        assert code == 200 and profiles == ["api_profile"]
+        assert self.call("POST", "/users/api_profile/goals", {"text": "walk daily"})[0] == 201
+        goal = self.call("GET", "/users/api_profile/goals")[1][0]
+        assert self.call("PUT", f"/users/api_profile/goals/{goal['goal_id']}", {"progress": "Done"})[0] == 204
+        assert self.call("GET", "/users/api_profile/goals")[1][0]["progress"] == "Done"
+
+    def test_bad_requests(self):
+        assert self.call("GET", "/users/x/mood/trends?period=year")[0] == 400
+        assert self.call("GET", "/users/x/messages?limit=ten")[0] == 400
+        code, _ = self.call("POST", "/translate", {"texts": "not a list"})
+        assert code == 400
+
+    def test_rejects_when_saturated(self):
+        self._app.inflight = 8
+        response = self.fetch("/profiles", headers=AUTH)
+        assert response.code == 503 and response.headers["Retry-After"] == "1"
+        assert self._app.rejected == 1
+        self._app.inflight = 0
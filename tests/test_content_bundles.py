@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+
+import content_bundles
+
+
+@pytest.fixture(autouse=True)
+def bundle_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(content_bundles, "BUNDLE_DIR", str(tmp_path))
+    monkeypatch.setattr(content_bundles, "_bundles", {})
+    monkeypatch.setattr(content_bundles, "_failures", {})
+    monkeypatch.setattr(content_bundles, "_building", set())
+    return tmp_path
+
+
+class Translator:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, texts, lang_code, fallback=True):
+        self.calls += 1
+        if self.fail:
+            # Like backend.translate_batch when the service is down: nothing translated.
+            return {t: t for t in texts} if fallback else {}
+        return {t: f"[{lang_code}] {t}" for t in texts}
+
+
+def _settle():
+    deadline = time.monotonic() + 5
+    while content_bundles._building:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_incomplete_build_is_not_written():
+    with pytest.raises(content_bundles.IncompleteBundle):
+        content_bundles.build_bundle("hi", Translator(fail=True))
+    assert not os.path.exists(content_bundles.bundle_path("hi"))
+
+
+def test_get_bundle_builds_in_background():
+    translate = Translator()
+    assert content_bundles.get_bundle("hi", translate) == {}
+    _settle()
+    strings = content_bundles.get_bundle("hi", translate)
+    assert strings[content_bundles.DEFAULT_TIP] == f"[hi] {content_bundles.DEFAULT_TIP}"
+    assert content_bundles._read_bundle("hi")["source_hash"] == content_bundles.source_hash()
+    content_bundles.get_bundle("hi", translate)
+    assert translate.calls == 1
+
+
+def test_failed_build_backs_off(monkeypatch):
+    monkeypatch.setattr(content_bundles, "BUNDLE_RETRY_SECONDS", 0.2)
+    translate = Translator(fail=True)
+    for _ in range(5):
+        assert content_bundles.get_bundle("de", translate) == {}
+        _settle()
+    assert translate.calls == 1
+    assert not os.path.exists(content_bundles.bundle_path("de"))
+
+    translate.fail = False
+    time.sleep(0.25)
+    content_bundles.get_bundle("de", translate)
+    _settle()
+    assert translate.calls == 2
+    assert content_bundles.get_bundle("de", translate)
+    assert content_bundles._failures == {}
+
+
+def test_build_all_reports_failures():
+    assert content_bundles.build_all(Translator(fail=True), ["fr"]) == ["fr"]
+    assert content_bundles.build_all(Translator(), ["fr"]) == []
+    assert content_bundles._read_bundle("fr")["lang"] == "fr"
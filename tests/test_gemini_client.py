@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeGenerativeModel
+from gemini_client import CircuitBreaker, OfflineResponse, ResilientModel, TokenBucket
+
+
+def _open_breaker(breaker):
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_breaker_opens_after_threshold_and_closes_after_probe():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    _open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_non_transient_error_releases_half_open_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    _open_breaker(breaker)
+    time.sleep(0.06)
+    model = ResilientModel(FakeGenerativeModel(error_rate=1.0, error=ValueError), breaker=breaker, timeout=1)
+    with pytest.raises(ValueError):
+        model.generate_content("hi")
+    assert breaker.state == "open"
+    model.model = FakeGenerativeModel()
+    assert model.generate_content("hi").text == model.model.reply
+    assert breaker.state == "closed"
+
+
+def test_local_queueing_does_not_open_breaker():
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    limiter = TokenBucket(rate=0.01, capacity=1)
+    model = ResilientModel(FakeGenerativeModel(), rate_limiter=limiter, breaker=breaker, timeout=0.05)
+    assert not isinstance(model.generate_content("first"), OfflineResponse)
+    for _ in range(3):
+        assert isinstance(model.generate_content("queued"), OfflineResponse)
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert model.stats["rate_limited"] == 3
+
+
+def test_transient_errors_retry_then_go_offline():
+    breaker = CircuitBreaker(threshold=10, cooldown=60)
+    model = ResilientModel(FakeGenerativeModel(error_rate=1.0), breaker=breaker, timeout=5, max_retries=1)
+    assert isinstance(model.generate_content("hi"), OfflineResponse)
+    assert breaker.failures == 2 and model.stats["retries"] == 1
@@ -0,0 +1,120 @@
+import pytest
+
+import storage
+from benchmarks.fakes import FakeDatabase
+from storage import MongoBackend, mongo_backend
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    monkeypatch.setattr(storage, "BUCKET_SIZE", 3)
+    return mongo_backend(FakeDatabase())
+
+
+def _msgs(*texts, minute=0):
+    return [{"role": "user", "content": t, "timestamp": f"2025-03-01T10:{minute + i:02d}:00+00:00"}
+            for i, t in enumerate(texts)]
+
+
+def _all_pages(backend, user_id, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = backend.get_messages(user_id, limit, cursor)
+        pages.insert(0, [m["content"] for m in page])
+        if cursor is None:
+            return [c for page in pages for c in page]
+
+
+def test_appends_go_to_newest_bucket(mongo):
+    mongo.log_conversation("u", _msgs("a", "b"))
+    mongo.log_conversation("u", _msgs("c", "d", minute=2))  # doesn't fit beside a, b
+    mongo.log_conversation("u", _msgs("e", minute=4))  # fits both buckets; must go to the newer
+    buckets = sorted(mongo.message_buckets.docs, key=lambda b: b["first_ts"])
+    assert [[m["content"] for m in b["items"]] for b in buckets] == [["a", "b"], ["c", "d", "e"]]
+    assert [m["content"] for m in mongo.get_messages("u")[0]] == ["a", "b", "c", "d", "e"]
+    assert _all_pages(mongo, "u", 2) == ["a", "b", "c", "d", "e"]
+
+
+def test_legacy_history_is_merged_until_migrated(mongo):
+    mongo.collection.insert_one({"user_id": "old", "conversation": _msgs("l1", "l2", "l3"),
+                                 "mood_history": [{"mood": "sad", "timestamp": "2025-02-01T09:00:00+00:00"}]})
+    mongo.record_turn("old", _msgs("n1", "n2", minute=30), {"mood": "calm", "emotion": "content"})
+
+    assert [m["content"] for m in mongo.get_messages("old")[0]] == ["l1", "l2", "l3", "n1", "n2"]
+    assert _all_pages(mongo, "old", 2) == ["l1", "l2", "l3", "n1", "n2"]
+    assert [m["mood"] for m in mongo.get_mood_history("old", 5)] == ["sad", "calm"]
+    assert [m["mood"] for m in mongo.get_mood_history("old", 1)] == ["calm"]
+
+    from migrate_buckets import migrate
+    migrate(mongo)
+    mongo.collection.round_trips = 0
+    mongo.get_messages("old")
+    mongo.get_messages("old")
+    assert mongo.collection.round_trips == 1  # the missing array is noticed once, then skipped
+    assert _all_pages(mongo, "old", 2) == ["l1", "l2", "l3", "n1", "n2"]
+
+
+def test_profile_prefix_uses_lowercased_key():
+    db = FakeDatabase()
+    db["pradhan"].insert_one({"user_id": "Alice", "last_updated": None})  # written before user_key existed
+    mongo = mongo_backend(db)
+    mongo.create_profile("alex")
+    mongo.update_habits("ALBERT", "walks")
+    assert "user_key_1_user_id_1" in mongo.collection.index_information()
+    assert sorted(mongo.get_all_profiles(prefix="AL")) == ["ALBERT", "Alice", "alex"]
+    assert mongo.get_all_profiles(prefix="ali") == ["Alice"]
+    assert mongo.get_all_profiles(prefix="a.") == []
+
+
+def test_unique_user_id_upgrade_tolerates_a_concurrent_worker():
+    db = FakeDatabase()
+    db["pradhan"].create_index("user_id")
+    stale = db["pradhan"].index_information()
+    mongo_backend(db)
+    # A second worker that read the indexes before the first one upgraded them.
+    late = MongoBackend(db["pradhan"], db["pradhan_messages"], db["pradhan_moods"])
+    late.collection.index_information = lambda: stale
+    late.ensure_indexes()
+    indexes = db["pradhan"].indexes
+    assert "user_id_1" not in indexes and indexes[storage.UNIQUE_USER_ID_INDEX]["unique"]
+
+
+@pytest.mark.parametrize("backend", ["mongo", "memory"])
+def test_create_profile_fills_in_an_implicit_user(backend, mongo):
+    store = mongo if backend == "mongo" else storage.MemoryBackend()
+    store.update_habits("implicit", "walks")
+    store.create_profile("implicit")
+    assert store.get_user_fields("implicit", ("profile",))["profile"]["name"] == "implicit"
+    store.update_user_profile("implicit", {"name": "Renamed"})
+    store.create_profile("implicit")  # an existing profile is kept
+    assert store.get_user_fields("implicit", ("profile",))["profile"] == {"name": "Renamed"}
+
+
+def test_append_is_one_round_trip_until_the_bucket_fills(mongo):
+    mongo.log_conversation("rt", _msgs("a"))  # first append: lookup, close, insert
+    before = mongo.message_buckets.round_trips
+    mongo.log_conversation("rt", _msgs("b", minute=1))
+    mongo.log_conversation("rt", _msgs("c", minute=2))
+    assert mongo.message_buckets.round_trips - before == 2
+    assert [b.get("open") for b in mongo.message_buckets.docs] == [True]
+
+
+def test_migration_rerun_after_a_crash_leaves_no_duplicates(mongo, monkeypatch):
+    from migrate_buckets import migrate
+    mongo.collection.insert_one({"user_id": "crash", "conversation": _msgs("l1", "l2", "l3", "l4"),
+                                 "mood_history": [{"mood": "sad", "timestamp": "2025-02-01T09:00:00+00:00"}]})
+    update_one = mongo.collection.update_one
+
+    def crash(flt, update, **kwargs):
+        if "$unset" in update:
+            raise RuntimeError("interrupted")
+        return update_one(flt, update, **kwargs)
+
+    monkeypatch.setattr(mongo.collection, "update_one", crash)
+    with pytest.raises(RuntimeError):
+        migrate(mongo)
+    monkeypatch.setattr(mongo.collection, "update_one", update_one)
+    migrate(mongo)
+    mongo._no_legacy.clear()
+    assert _all_pages(mongo, "crash", 2) == ["l1", "l2", "l3", "l4"]
+    assert [m["mood"] for m in mongo.get_mood_history("crash")] == ["sad"]
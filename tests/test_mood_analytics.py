@@ -0,0 +1,116 @@
+import threading
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import storage
+from benchmarks.fakes import FakeDatabase
+from local_store import LocalStore
+from mood_analytics import MoodAnalytics, MoodSeries, EMOTION_CODES, samples_to_arrays, samples_to_rollups
+from storage import MemoryBackend, mongo_backend
+
+
+def _sample(day, emotion="content"):
+    return {"mood": "calm", "emotion": emotion, "score": 0.4,
+            "timestamp": datetime(2026, 1, 1, 12, tzinfo=timezone.utc) + timedelta(days=day)}
+
+
+def test_add_during_bootstrap_is_kept_once():
+    stored = [_sample(0), _sample(1)]
+    loading, release = threading.Event(), threading.Event()
+
+    def load_history(user_id):
+        loading.set()
+        assert release.wait(5)
+        return list(stored)
+
+    analytics = MoodAnalytics(load_history)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(analytics.series("u")))
+    reader.start()
+    assert loading.wait(5)
+
+    # One turn storage already returns, and one it wrote after the read.
+    already_read, after_read = _sample(2, "joy"), _sample(3, "anxiety")
+    stored.append(already_read)
+    analytics.add("u", already_read)
+    analytics.add("u", after_read)
+    release.set()
+    reader.join(5)
+
+    series = result[0]
+    assert len(series.codes) == 4
+    assert series.codes[-1] == EMOTION_CODES["anxiety"]
+    assert not analytics._loading
+
+
+def test_add_without_series_or_bootstrap_is_skipped():
+    analytics = MoodAnalytics(lambda user_id: [])
+    analytics.add("u", _sample(0))
+    assert analytics.series("u", build=False) is None
+
+
+def test_distribution_keeps_days_in_order():
+    series = MoodSeries()
+    base = datetime(2026, 1, 10, tzinfo=timezone.utc).timestamp()
+    for day in (5, 1, 3, 1, 9):
+        series.add(EMOTION_CODES["content"], base + day * 86400, 0.5)
+    days, counts, _ = series.distribution("day", last=3)
+    assert list(days) == sorted(days)
+    assert len(days) == 3 and counts.sum() == 3
+
+
+def _history(count):
+    emotions = ("joy", "content", "neutral", "anxiety", "anger")
+    return [dict(_sample(i // 3, emotions[i % 5]), score=None if i % 4 == 0 else 0.1 * (i % 7) - 0.3) for i in range(count)]
+
+
+def _assert_same_rollups(got, want):
+    assert got.keys() == want.keys()
+    for day, entries in want.items():
+        assert got[day].keys() == entries.keys()
+        for code, (count, total, squared) in entries.items():
+            assert got[day][code][0] == count
+            assert got[day][code][1] == pytest.approx(total) and got[day][code][2] == pytest.approx(squared)
+
+
+def test_storage_rollups_cover_all_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "BUCKET_SIZE", 4)
+    history = _history(40)
+    want = samples_to_rollups(history)
+    mongo = mongo_backend(FakeDatabase())
+    local = LocalStore(str(tmp_path / "local.sqlite"), None)
+    for backend in (mongo, local, MemoryBackend()):
+        for sample in history:
+            backend.record_turn("u", [], sample)
+        _assert_same_rollups(backend.get_mood_rollups("u"), want)
+    # Buckets written before the counters existed are counted from their items.
+    for bucket in mongo.mood_buckets.docs:
+        bucket.pop("stats")
+    _assert_same_rollups(mongo.get_mood_rollups("u"), want)
+
+
+def test_summary_is_not_limited_to_the_bootstrap_window():
+    store = MemoryBackend()
+    history = _history(40)
+    for sample in history:
+        store.record_turn("u", [], sample)
+    analytics = MoodAnalytics(lambda user_id: store.get_mood_history(user_id, 5), store.get_mood_rollups)
+    summary = analytics.summary("u")
+    full = MoodSeries.from_arrays(*samples_to_arrays(history)).summary()
+    assert summary["samples"] == full["samples"] == 40
+    assert summary["average"] == pytest.approx(full["average"], abs=1e-6)
+    assert summary["volatility"] == pytest.approx(full["volatility"], abs=1e-6)
+    assert summary["best_checkin_streak"] == full["best_checkin_streak"]
+    assert len(analytics.series("u").codes) == 5
+
+
+def test_expired_series_sees_other_processes_writes():
+    store = MemoryBackend()
+    store.record_turn("u", [], _sample(0))
+    analytics = MoodAnalytics(store.get_mood_history, store.get_mood_rollups, ttl=60)
+    assert analytics.summary("u")["samples"] == 1
+    store.record_turn("u", [], _sample(1))  # written by another worker
+    assert analytics.summary("u")["samples"] == 1
+    analytics.ttl = 0
+    assert analytics.summary("u")["samples"] == 2
@@ -0,0 +1,63 @@
+import pytest
+
+import backend
+import main
+from storage import MemoryBackend, WRITE_METHODS
+
+
+class RecordingBackend(MemoryBackend):
+    """MemoryBackend that lists the names of write methods looked up while `recording` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.recording = False
+        self.writes = []
+
+    def __getattribute__(self, name):
+        if name in WRITE_METHODS and object.__getattribute__(self, "recording"):
+            object.__getattribute__(self, "writes").append(name)
+        return object.__getattribute__(self, name)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RecordingBackend()
+    monkeypatch.setattr(backend, "storage", store)
+    return store
+
+
+def _mood_line(prompt):
+    return next(line for line in prompt.splitlines() if line.startswith("Recent moods"))
+
+
+def test_mood_history_is_read_without_a_concurrent_write(store):
+    for i, emotion in enumerate(["joy", "anxiety", "neutral"]):
+        backend.record_turn("moods", {"role": "user", "content": f"u{i}"}, {"role": "ai", "content": f"a{i}"},
+                            {"mood": emotion, "emotion": emotion, "score": 0.0})
+    store.recording = True
+    lines = {_mood_line(main.prepare_turn("I feel fine today", [], user_id="moods")["prompt"]) for _ in range(20)}
+    store.recording = False
+
+    assert store.writes == []
+    assert len(lines) == 1
+    assert lines.pop().startswith("Recent moods (oldest first): joy → anxiety → neutral → ")
+    assert len(store.get_mood_history("moods")) == 3
+
+
+def test_prompt_ends_with_the_sample_the_caller_stores(store):
+    sample = {"mood": "calm", "emotion": "content", "score": 0.3}
+    turn = main.prepare_turn("whatever", [], user_id="caller_sample", mood_sample=sample)
+    assert turn["emotion"] == "content" and turn["mood_sample"] is sample
+    assert _mood_line(turn["prompt"]) == "Recent moods (oldest first): content"
+
+    default = main.prepare_turn("I am so happy and grateful today!", [], user_id="caller_sample")
+    assert default["mood_sample"] == main.mood_sample_for("I am so happy and grateful today!")
+
+
+def test_mood_update_stamps_storage_and_rollups_alike(store):
+    backend.mood_analytics.forget("stamped")
+    backend.update_mood_history("stamped", "calm", "content")
+    series = backend.mood_analytics.series("stamped")
+    backend.update_mood_history("stamped", "tense", "anxiety")
+    stored = [sample["timestamp"].timestamp() for sample in store.get_mood_history("stamped")]
+    assert list(series.epochs) == stored
@@ -0,0 +1,76 @@
+import time
+import threading
+
+from pymongo.errors import ConnectionFailure
+
+from benchmarks.fakes import FakeDatabase
+from local_store import LocalStore
+from storage import ProbingBackend, mongo_backend
+
+
+def _turn(text):
+    return [{"role": "user", "content": text, "timestamp": "2025-01-01T10:00:00+00:00"}]
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class FlakyConnect:
+    """connect() for ProbingBackend: slow, and failing while `down` is set."""
+
+    def __init__(self, delay=0.0, down=False):
+        self.delay = delay
+        self.down = threading.Event()
+        if down:
+            self.down.set()
+        self.db = FakeDatabase()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        if self.down.is_set():
+            raise ConnectionFailure("connection refused")
+        return mongo_backend(self.db)
+
+
+def test_write_waits_for_slow_first_probe(tmp_path):
+    connect = FlakyConnect(delay=0.3)
+    store = ProbingBackend(connect, fallback=lambda: LocalStore(str(tmp_path / "local.sqlite"), None),
+                           first_use_wait=0.05)
+    store.log_conversation("u1", _turn("hello"))
+    assert store.status()["active"] == "mongo"
+    assert [m["content"] for m in store.get_messages("u1")[0]] == ["hello"]
+    assert LocalStore(str(tmp_path / "local.sqlite"), None).get_messages("u1")[0] == []
+
+
+def test_outage_writes_are_replayed_after_recovery(tmp_path):
+    connect = FlakyConnect(down=True)
+    store = ProbingBackend(connect, fallback=lambda: LocalStore(str(tmp_path / "local.sqlite"), None),
+                           probe_interval=0.0)
+    store.record_turn("u1", _turn("during outage"), {"mood": "sad", "emotion": "lonely", "score": -0.4})
+    store.update_habits("u1", "walks daily")
+    assert store.status()["active"] == "local"
+    assert len(store._local().pending_writes()) == 2
+
+    connect.down.clear()
+    _wait_for(lambda: store.get_messages("u1")[0] and store.status()["active"] == "mongo")
+    store.log_conversation("u1", _turn("after recovery"))
+
+    assert [m["content"] for m in store.get_messages("u1")[0]] == ["during outage", "after recovery"]
+    assert store.get_user_fields("u1", ["habits_summary"])["habits_summary"] == "walks daily"
+    mood = store.get_mood_history("u1")
+    assert [m["mood"] for m in mood] == ["sad"]
+    assert store._local().pending_writes() == []
+
+
+def test_mongo_only_raises_while_down():
+    store = ProbingBackend(FlakyConnect(down=True), fallback=None)
+    try:
+        store.update_habits("u1", "x")
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("expected ConnectionError")
@@ -0,0 +1,41 @@
+import threading
+
+from retrieval_index import RetrievalIndex
+
+
+def _turn(i, topic):
+    return [{"role": "user", "content": f"I keep thinking about {topic}", "message_id": f"u{i}"},
+            {"role": "ai", "content": "Let's talk it through.", "message_id": f"a{i}"}]
+
+
+def test_turns_added_during_bootstrap_are_indexed_once():
+    stored = _turn(0, "exams")
+    loading, release = threading.Event(), threading.Event()
+
+    def load_history(user_id):
+        loading.set()
+        assert release.wait(5)
+        return list(stored)
+
+    index = RetrievalIndex(load_history)
+    reader = threading.Thread(target=index.search, args=("u", "exams"))
+    reader.start()
+    assert loading.wait(5)
+
+    # One turn storage already returns, and one it wrote after the read.
+    already_read, after_read = _turn(1, "sleep"), _turn(2, "piano")
+    stored.extend(already_read)
+    index.add("u", already_read)
+    index.add("u", after_read)
+    release.set()
+    reader.join(5)
+
+    assert len(index._get("u").turns) == 3
+    assert "piano" in index.search("u", "piano")[0]["text"]
+    assert not index._loading
+
+
+def test_add_without_index_or_bootstrap_is_skipped():
+    index = RetrievalIndex(lambda user_id: [])
+    index.add("u", _turn(0, "exams"))
+    assert index._get("u") is None
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+import backend
+import main
+from benchmarks.fakes import FakeGenerativeModel
+from gemini_client import OfflineResponse
+from storage import MemoryBackend
+
+
+class RecordingModel(FakeGenerativeModel):
+    def __init__(self):
+        super().__init__(reply="summary")
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.prompts.append(prompt)
+        return super().generate_content(prompt, stream, **kwargs)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(backend, "storage", MemoryBackend())
+    model = RecordingModel()
+    monkeypatch.setattr(main, "model", model)
+    return model
+
+
+def _log_turns(user_id, first, count):
+    for i in range(first, first + count):
+        # Same timestamp for every message: ordering must not depend on it.
+        backend.record_turn(user_id, {"role": "user", "content": f"u{i}", "timestamp": "2025-01-01T00:00:00"},
+                            {"role": "ai", "content": f"a{i}", "timestamp": "2025-01-01T00:00:00"})
+
+
+def _folded(model):
+    return {line.split(": ", 1)[1] for prompt in model.prompts for line in prompt.splitlines() if ": " in line}
+
+
+def test_backlog_is_folded_in_full(model):
+    _log_turns("s", 0, 30)  # 60 messages, well past one refresh's page
+    while True:
+        before = len(model.prompts)
+        main.refresh_rolling_summary("s", force=True)
+        if len(model.prompts) == before:
+            break
+    assert {f"u{i}" for i in range(30)} | {f"a{i}" for i in range(30)} <= _folded(model)
+    assert main._messages_since("s", backend.get_rolling_summary("s")) == []
+
+
+def test_messages_sharing_the_through_timestamp_are_not_skipped(model):
+    _log_turns("t", 0, main.SUMMARY_EVERY_TURNS)
+    summary = main.refresh_rolling_summary("t")
+    assert summary["turns"] == main.SUMMARY_EVERY_TURNS
+    _log_turns("t", 100, 1)
+    assert [m["content"] for m in main._messages_since("t", summary)] == ["u100", "a100"]
+
+
+def test_offline_reply_is_not_saved_as_the_summary(model, monkeypatch):
+    class Offline:
+        def generate_content(self, prompt, stream=False, **kwargs):
+            return OfflineResponse()
+
+    _log_turns("o", 0, main.SUMMARY_EVERY_TURNS)
+    monkeypatch.setattr(main, "model", Offline())
+    assert main.refresh_rolling_summary("o", force=True) == backend.get_rolling_summary("o")
+    assert not backend.get_rolling_summary("o").get("text")
+
+    monkeypatch.setattr(main, "model", model)
+    assert main.refresh_rolling_summary("o", force=True)["turns"] == main.SUMMARY_EVERY_TURNS
+
+
+def test_scheduled_refresh_never_runs_inline_or_on_the_context_pool(model, monkeypatch):
+    monkeypatch.setattr(main, "CONTEXT_POOL", None)  # CONTEXT_WORKERS=0
+    ran = threading.Event()
+    threads = []
+
+    def refresh(user_id):
+        threads.append(threading.current_thread().name)
+        ran.set()
+
+    monkeypatch.setattr(main, "refresh_rolling_summary", refresh)
+    main.schedule_summary_refresh("bg")
+    assert ran.wait(5)
+    assert threads[0].startswith("summary")
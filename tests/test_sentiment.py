@@ -0,0 +1,14 @@
+import sentiment
+
+
+def test_batch_scores_fill_the_lru(monkeypatch):
+    monkeypatch.setattr(sentiment, "_sentiment_cache", type(sentiment._sentiment_cache)())
+    monkeypatch.setattr(sentiment, "SENTIMENT_CACHE_SIZE", 2)
+    results = sentiment.analyze_sentiment_batch(["I am happy", "I am sad", "so calm", "I am happy"])
+    assert results[0] == results[3]
+    assert len(sentiment._sentiment_cache) == 2
+
+    calls = []
+    monkeypatch.setattr(sentiment, "_score", lambda text: calls.append(text) or {})
+    assert sentiment.analyze_sentiment("so calm") == results[2]
+    assert calls == []
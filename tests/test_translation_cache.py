@@ -0,0 +1,51 @@
+import os
+import sqlite3
+
+import translation_cache
+from translation_cache import TranslationCache
+
+
+def test_disk_tier_opens_on_first_use(tmp_path):
+    path = str(tmp_path / "translations.sqlite")
+    cache = TranslationCache(path)
+    assert not os.path.exists(path)
+    assert cache.get("Hello", "hi") is None
+    assert os.path.exists(path)
+
+
+def test_disk_pruning_drops_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(translation_cache, "PRUNE_EVERY", 1)
+    path = str(tmp_path / "translations.sqlite")
+    writer = TranslationCache(path, max_disk_entries=3)
+    for text in ("old but read", "b", "c"):
+        writer.put(text, "de", text.upper())
+    # Another process reads the oldest entry from disk, then writes a new one.
+    reader = TranslationCache(path, max_disk_entries=3)
+    assert reader.get("old but read", "de") == "OLD BUT READ"
+    reader.put("d", "de", "D")
+    with sqlite3.connect(path) as conn:
+        left = {row[0] for row in conn.execute("SELECT text FROM translations")}
+    assert left == {"old but read", "c", "d"}
+
+
+def test_files_without_last_used_are_upgraded(tmp_path):
+    path = str(tmp_path / "translations.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE translations (text TEXT NOT NULL, lang TEXT NOT NULL, translated TEXT NOT NULL, "
+                     "created REAL NOT NULL, PRIMARY KEY (text, lang))")
+        conn.execute("INSERT INTO translations VALUES ('Hello', 'hi', 'नमस्ते', 1.0)")
+    assert TranslationCache(path).get("Hello", "hi") == "नमस्ते"
+
+
+def test_chat_replies_bypass_the_cache(monkeypatch):
+    import backend
+    import main
+    from benchmarks.fakes import FakeGenerativeModel, FakeTranslator
+
+    monkeypatch.setattr(backend, "GoogleTranslator", FakeTranslator)
+    monkeypatch.setattr(FakeTranslator, "latency", 0.0)
+    monkeypatch.setattr(main, "model", FakeGenerativeModel(reply="A private reply. Second sentence."))
+    assert "".join(main.stream_wellness_response("I feel low", [], target_lang="hi", user_id="private_user"))
+    assert main.get_wellness_response("I feel low today", [], target_lang="hi", user_id="private_user")["text"]
+    for text in ("A private reply.", "Second sentence.", "A private reply. Second sentence."):
+        assert backend.translation_cache.get(text, "hi") is None
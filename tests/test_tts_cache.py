@@ -0,0 +1,35 @@
+import os
+import threading
+
+from tts_cache import AudioCache
+
+
+class GatedEngine:
+    """Writes a small file per chunk; texts containing 'slow' wait for `gate`."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+
+    def __call__(self, text, lang, path):
+        if "slow" in text:
+            assert self.gate.wait(5)
+        with open(path, "wb") as f:
+            f.write(text.encode("utf-8"))
+
+
+def test_evict_keeps_chunks_of_unjoined_jobs(tmp_path):
+    engine = GatedEngine()
+    cache = AudioCache(str(tmp_path), max_bytes=0, max_age=0, workers=2, engine=engine)
+    job = cache.submit_chunked("First sentence. Second one here. And a slow last one.", "en", max_chars=20)
+    assert len(job.parts) == 3
+    for future in job.chunks[:2]:
+        future.result(5)
+
+    assert cache.evict() == 0  # over every limit, but all three chunks are pinned
+    engine.gate.set()
+    path = job.result(5)
+    assert path and open(path, "rb").read() == b"First sentence.Second one here.And a slow last one."
+
+    assert cache.evict() == 4  # nothing pinned once joined
+    assert cache._pinned == {}
+    assert not os.listdir(tmp_path)
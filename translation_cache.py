@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRANSLATION_CACHE_DB = os.getenv("TRANSLATION_CACHE_DB", os.path.join(BASE_DIR, "translation_cache.sqlite"))
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "4096"))
+TRANSLATION_CACHE_DISK_SIZE = int(os.getenv("TRANSLATION_CACHE_DISK_SIZE", "200000"))
+TRANSLATION_CACHE_WARMUP = os.getenv("TRANSLATION_CACHE_WARMUP")
+
+PRUNE_EVERY = 256
+# Hit keys are collected in memory and written to the disk tier's last_used in batches of this many.
+TOUCH_FLUSH_EVERY = 256
+
+
+class TranslationCache:
+    """
+    Two-tier cache for translations keyed by (text, target_lang_code).
+    Tier 1 is an in-process LRU, tier 2 a SQLite file shared by every
+    Streamlit worker process on the host, opened on first use. The disk
+    tier is an LRU too: hits update last_used (in batches), and pruning
+    drops the least recently used rows.
+    """
+
+    def __init__(self, db_path=TRANSLATION_CACHE_DB, max_entries=TRANSLATION_CACHE_SIZE, max_disk_entries=TRANSLATION_CACHE_DISK_SIZE):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._conn = None
+        self._disk_disabled = False
+        # (text, lang) hit since last_used was last written; the flush stamps them with its own time.
+        self._touched = set()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _db(self):
+        """The disk tier's connection, opened on first use; None if it can't be opened. Call with the lock held."""
+        if self._conn is None and not self._disk_disabled:
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "text TEXT NOT NULL, lang TEXT NOT NULL, translated TEXT NOT NULL, created REAL NOT NULL, "
+                    "last_used REAL, PRIMARY KEY (text, lang))"
+                )
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(translations)")}
+                if "last_used" not in columns:
+                    # Files from before last_used: rank existing rows by when they were written.
+                    with conn:
+                        conn.execute("ALTER TABLE translations ADD COLUMN last_used REAL")
+                        conn.execute("UPDATE translations SET last_used = created")
+                conn.execute("DROP INDEX IF EXISTS idx_translations_created")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)")
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"⚠️ Translation cache disk tier disabled: {e}")
+                self._disk_disabled = True
+        return self._conn
+
+    def _touch(self, key):
+        self._touched.add(key)
+        if len(self._touched) >= TOUCH_FLUSH_EVERY:
+            self._flush_touched()
+
+    def _flush_touched(self):
+        touched, self._touched = self._touched, set()
+        conn = self._db()
+        if conn is None or not touched:
+            return
+        now = time.time()
+        try:
+            with conn:
+                conn.executemany(
+                    "UPDATE translations SET last_used = MAX(COALESCE(last_used, 0), ?) WHERE text = ? AND lang = ?",
+                    [(now, text, lang) for text, lang in touched]
+                )
+        except sqlite3.Error as e:
+            print(f"Translation cache write error: {e}")
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, text, lang):
+        key = (text, lang)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                # No size check: keys only enter the LRU through put_many or a disk hit, which both flush.
+                self._touched.add(key)
+                return self._lru[key]
+            row = None
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT translated FROM translations WHERE text = ? AND lang = ?", key
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Translation cache read error: {e}")
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, row[0])
+            self._touch(key)
+            return row[0]
+
+    def put(self, text, lang, translated):
+        self.put_many(lang, {text: translated})
+
+    def put_many(self, lang, translations):
+        """Store a {source_text: translated_text} mapping for one language."""
+        if not translations:
+            return
+        now = time.time()
+        with self._lock:
+            for text, translated in translations.items():
+                self._remember((text, lang), translated)
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO translations (text, lang, translated, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                        [(text, lang, translated, now, now) for text, translated in translations.items()]
+                    )
+                self._writes_since_prune += len(translations)
+                # Already writing: hits recorded so far go out too, so other processes' pruning sees them.
+                self._flush_touched()
+                if self._writes_since_prune >= PRUNE_EVERY:
+                    self._writes_since_prune = 0
+                    self._prune_disk()
+            except sqlite3.Error as e:
+                print(f"Translation cache write error: {e}")
+
+    def _prune_disk(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+            self.evictions += overflow
+
+    def warm_up(self, path):
+        """
+        Load pre-translated strings from a JSON file shaped like
+        {"hi": {"Save Profile": "प्रोफ़ाइल सहेजें", ...}, "de": {...}}.
+        Returns the number of entries loaded.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Translation cache warm-up skipped ({path}): {e}")
+            return 0
+        loaded = 0
+        for lang, translations in data.items():
+            if isinstance(translations, dict):
+                self.put_many(lang, translations)
+                loaded += len(translations)
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._touched.clear()
+            conn = self._db()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM translations")
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._lru),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+
+translation_cache = TranslationCache()
+if TRANSLATION_CACHE_WARMUP:
+    translation_cache.warm_up(TRANSLATION_CACHE_WARMUP)
@@ -0,0 +1,330 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(os.getcwd(), "audio_cache"))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "200"))
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_MB", "200")) * 1024 * 1024
+AUDIO_CACHE_MAX_AGE = float(os.getenv("AUDIO_CACHE_MAX_AGE_DAYS", "30")) * 86400
+EVICT_EVERY = 32
+
+
+def gtts_engine(text, lang, path):
+    from gtts import gTTS
+    gTTS(text=text, lang=lang).save(path)
+
+
+def audio_key(text, lang):
+    return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+TTS_CHUNKED = os.getenv("TTS_CHUNKED", "1") == "1"
+SENTENCE_END = re.compile(r"(?<=[.!?।。！？])\s+|\n+")
+
+
+def split_for_speech(text, max_chars=TTS_CHUNK_CHARS):
+    """
+    Split text at sentence boundaries into chunks of up to max_chars.
+    The first chunk is the first sentence alone so playback can start early;
+    later sentences are packed together to keep the number of requests down.
+    """
+    sentences = [s.strip() for s in SENTENCE_END.split(text or "") if s.strip()]
+    if not sentences:
+        return []
+    chunks = [sentences[0]]
+    current = ""
+    for sentence in sentences[1:]:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SpeechJob:
+    """
+    Audio for one reply: per-chunk futures in playback order plus a future
+    for the joined file at path; parts are the chunk files being joined.
+    """
+
+    def __init__(self, path, chunks, done, parts=()):
+        self.path = path
+        self.chunks = chunks
+        self.done = done
+        self.parts = list(parts)
+
+    def ready_chunks(self):
+        """Paths of the chunks that can be played right now (the finished prefix)."""
+        ready = []
+        for future in self.chunks:
+            if not future.done() or future.result() is None:
+                break
+            ready.append(future.result())
+        return ready
+
+    def first_chunk(self, timeout=None):
+        return self.chunks[0].result(timeout) if self.chunks else None
+
+    def result(self, timeout=None):
+        return self.done.result(timeout)
+
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class AudioCache:
+    """
+    Content-addressed store of synthesized speech: one MP3 per (text, lang),
+    named by its hash, so a repeated reply costs a stat() instead of a gTTS
+    call. Synthesis runs on a small worker pool; concurrent requests for the
+    same audio share one job, and long texts can be split into sentence
+    chunks that are synthesized in parallel (submit_chunked). Files older than max_age are dropped, then the
+    least recently used ones until the directory fits in max_bytes.
+    """
+
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES, max_age=AUDIO_CACHE_MAX_AGE,
+                 workers=TTS_WORKERS, engine=gtts_engine):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.engine = engine
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._lock = threading.RLock()
+        self._pending = {}
+        self._jobs = {}
+        # Chunk files of unjoined jobs -> number of jobs using them; evict() leaves these alone.
+        self._pinned = {}
+        self._writes_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, text, lang):
+        return os.path.join(self.directory, f"{audio_key(text, lang)}_{lang}.mp3")
+
+    def lookup(self, text, lang):
+        """Path of the cached audio for (text, lang), or None if it has not been synthesized."""
+        path = self.path_for(text, lang)
+        try:
+            os.utime(path)  # mtime doubles as last-use time for eviction
+        except OSError:
+            return None
+        return path
+
+    def is_pending(self, path):
+        with self._lock:
+            return path in self._pending
+
+    def submit(self, text, lang):
+        """Future resolving to the audio path (None if synthesis failed); never blocks on gTTS."""
+        path = self.lookup(text, lang)
+        with self._lock:
+            if path:
+                self.hits += 1
+                return _resolved(path)
+            path = self.path_for(text, lang)
+            if path in self._pending:
+                self.hits += 1
+                return self._pending[path]
+            self.misses += 1
+            future = self._pending[path] = self._pool.submit(self._synthesize, text, lang, path)
+        return future
+
+    def synthesize(self, text, lang):
+        """Blocking form of submit()."""
+        return self.submit(text, lang).result()
+
+    def submit_chunked(self, text, lang, max_chars=TTS_CHUNK_CHARS):
+        """
+        Synthesize text as sentence chunks in parallel and join them into one
+        MP3 at path_for(text, lang). Each chunk is cached on its own, so the
+        first one is playable (job.ready_chunks()) before the rest finish.
+        """
+        chunks = split_for_speech(text, max_chars)
+        path = self.path_for(text, lang)
+        if not chunks:
+            return SpeechJob(path, [], _resolved(None))
+        if len(chunks) == 1:
+            future = self.submit(chunks[0], lang)
+            return SpeechJob(self.path_for(chunks[0], lang), [future], future)
+        cached = self.lookup(text, lang)
+        with self._lock:
+            if cached:
+                self.hits += 1
+                done = _resolved(cached)
+                return SpeechJob(path, [done], done)
+            if path in self._jobs:
+                self.hits += 1
+                return self._jobs[path]
+            done = self._pending[path] = Future()
+            parts = [self.path_for(chunk, lang) for chunk in chunks]
+            for part in parts:
+                self._pinned[part] = self._pinned.get(part, 0) + 1
+            job = self._jobs[path] = SpeechJob(path, [self.submit(chunk, lang) for chunk in chunks], done, parts)
+        remaining = [len(job.chunks)]
+        counter_lock = threading.Lock()
+
+        def on_chunk_done(_):
+            with counter_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._join(job)
+
+        for future in job.chunks:
+            future.add_done_callback(on_chunk_done)
+        return job
+
+    def playlist(self, path):
+        """Chunk paths already playable for a chunked job still being joined at path."""
+        with self._lock:
+            job = self._jobs.get(path)
+        return job.ready_chunks() if job else []
+
+    def _join(self, job):
+        # MP3 is a plain sequence of frames, so chunk files concatenate byte for byte.
+        tmp_path = f"{job.path}.{threading.get_ident()}.tmp"
+        result = None
+        try:
+            parts = [future.result() for future in job.chunks]
+            if None in parts:
+                raise RuntimeError("a chunk failed to synthesize")
+            with open(tmp_path, "wb") as out:
+                for part in parts:
+                    with open(part, "rb") as f:
+                        out.write(f.read())
+            os.replace(tmp_path, job.path)
+            result = job.path
+        except Exception as e:
+            self.errors += 1
+            print(f"TTS join failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            with self._lock:
+                self._pending.pop(job.path, None)
+                self._jobs.pop(job.path, None)
+                for part in job.parts:
+                    if self._pinned.get(part, 0) > 1:
+                        self._pinned[part] -= 1
+                    else:
+                        self._pinned.pop(part, None)
+        job.done.set_result(result)
+
+    def _synthesize(self, text, lang, path):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            self.engine(text, lang, tmp_path)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            self.errors += 1
+            print(f"TTS synthesis failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+                self._writes_since_evict += 1
+                due = self._writes_since_evict >= EVICT_EVERY
+                if due:
+                    self._writes_since_evict = 0
+            if due:
+                self.evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Apply the age and size limits now, skipping audio still being
+        synthesized or joined. Returns the number of files removed.
+        """
+        removed = 0
+        cutoff = time.time() - self.max_age
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            with self._lock:
+                # Removed under the lock, so a job starting now can't pin a file that is about to go.
+                if path in self._pending or path in self._pinned:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def stats(self):
+        entries = self._entries()
+        requests = self.hits + self.misses
+        return {
+            "files": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "pending": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / requests if requests else 0.0
+        }
+
+
+audio_cache = AudioCache()
+
+
+def strip_markdown_for_tts(text: str) -> str:
+    if not text:
+        return text
+    t = text
+    t = re.sub(r"```.*?```", "", t, flags=re.DOTALL)
+    t = re.sub(r"`(.+?)`", r"\1", t)
+    t = re.sub(r"\*\*(.+?)\*\*", r"\1", t)
+    t = re.sub(r"\*(.+?)\*", r"\1", t)
+    t = re.sub(r"__(.+?)__", r"\1", t)
+    t = re.sub(r"_(.+?)_", r"\1", t)
+    t = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", t)
+    t = re.sub(r"^#{1,6}\s*", "", t, flags=re.MULTILINE)
+    t = re.sub(r"\n{2,}", "\n", t)
+    t = t.replace("*", "").replace("`", "")
+    return t.strip()
+
+
+def synthesize_speech(text, lang="en", chunked=TTS_CHUNKED):
+    """
+    Queue TTS for text with markdown stripped. Returns a SpeechJob whose path
+    is known immediately; in chunked mode sentences are synthesized in
+    parallel and job.ready_chunks() is playable before the joined file is.
+    """
+    text = strip_markdown_for_tts(text)
+    if chunked:
+        return audio_cache.submit_chunked(text, lang)
+    future = audio_cache.submit(text, lang)
+    return SpeechJob(audio_cache.path_for(text, lang), [future], future)
+
+
+def synthesize_speech_and_save(text, user_id="default_user", lang="en", chunked=TTS_CHUNKED):
+    """Blocking TTS. Audio is content-addressed, so user_id no longer affects the file name."""
+    return synthesize_speech(text, lang, chunked).result()